@@ -0,0 +1,145 @@
+import argparse
+import collections
+import glob
+import logging
+import os
+import sys
+import time
+
+from SqlToWord import iter_sql_file_tables, select_renderer, load_overrides, merge_config, RENDERER_EXTENSIONS
+from WorkerPool import worker_config, init_config_worker, iter_pool
+
+logger = logging.getLogger(__name__)
+
+# 目录输入时查找的 SQL 文件扩展名，压缩文件按文件头识别格式后流式解压
+SQL_SUFFIXES = ('.sql', '.sql.gz', '.sql.bz2', '.sql.xz')
+
+
+def find_sql_files(patterns):
+    """
+    展开命令行给出的文件、通配符和目录（目录下递归查找 .sql 及 .sql.gz / .sql.bz2 / .sql.xz 文件）
+    :param patterns: 路径或通配符列表
+    :return: [(SQL 文件路径, 相对输出目录的路径)]，按给出顺序去重
+    """
+    found = {}
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, files in os.walk(pattern):
+                for name in sorted(files):
+                    if name.lower().endswith(SQL_SUFFIXES):
+                        path = os.path.join(root, name)
+                        found.setdefault(os.path.abspath(path), (path, os.path.relpath(path, pattern)))
+            continue
+        paths = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for path in paths:
+            found.setdefault(os.path.abspath(path), (path, os.path.basename(path)))
+    return list(found.values())
+
+
+def output_path_for(relative_path, output_dir, renderer):
+    """根据 SQL 文件的相对路径和文档生成方式生成输出文档路径，a.sql.gz 与 a.sql 同样输出为 a.docx"""
+    suffix = next((suffix for suffix in SQL_SUFFIXES if relative_path.lower().endswith(suffix)), None)
+    stem = relative_path[:-len(suffix)] if suffix else os.path.splitext(relative_path)[0]
+    return os.path.join(output_dir, stem + RENDERER_EXTENSIONS[renderer])
+
+
+def convert_file(sql_path, output_path, renderer):
+    """
+    转换单个 SQL 文件，异常时返回错误信息而不抛出
+    :return: {'sql_path', 'output_path', 'tables', 'bytes', 'seconds', 'error'}
+    """
+    result = {'sql_path': sql_path, 'output_path': output_path, 'tables': 0, 'bytes': 0, 'seconds': 0.0,
+              'error': None}
+    start = time.perf_counter()
+    try:
+        result['bytes'] = os.path.getsize(sql_path)
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+
+        def counted(tables):
+            for table in tables:
+                result['tables'] += 1
+                yield table
+
+        select_renderer(renderer)(counted(iter_sql_file_tables(sql_path)), output_path, **worker_config)
+    except Exception as e:
+        result['error'] = f'{type(e).__name__}: {e}'
+        # 不保留写了一半的文档
+        if os.path.exists(output_path):
+            os.remove(output_path)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def failed_result(job, error):
+    """工作进程异常退出（如进程池不可用）时单个文件的转换结果"""
+    sql_path, output_path, _ = job
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    return {'sql_path': sql_path, 'output_path': output_path, 'tables': 0, 'bytes': 0, 'seconds': 0.0,
+            'error': f'{type(error).__name__}: {error}'}
+
+
+def iter_results(jobs, renderer, overrides, processes):
+    """
+    使用进程池转换多个文件，同时在途的任务数有上限，按提交顺序产出结果
+    :param jobs: [(SQL 文件路径, 输出文档路径)]
+    :param renderer: 文档生成方式
+    :param overrides: JSON 形式的配置项字典列表，见 load_overrides，各工作进程由此合并样式配置
+    :param processes: 进程数，1 表示在当前进程中依次转换
+    :return: 转换结果生成器，工作进程异常退出时对应文件的结果为失败
+    """
+    return iter_pool(convert_file, ((sql_path, output_path, renderer) for sql_path, output_path in jobs), processes,
+                     init_config_worker, (overrides,), failed_result)
+
+
+def main(argv=None):
+    """
+    批量转换命令行入口
+    :param argv: 命令行参数，默认取 sys.argv
+    :return: 退出码，有文件转换失败时为 1
+    """
+    parser = argparse.ArgumentParser(description='批量将 SQL 文件转换为数据库设计 Word 文档')
+    parser.add_argument('inputs', nargs='+', help='SQL 文件、通配符（如 "schemas/**/*.sql"）或目录')
+    parser.add_argument('-o', '--output-dir', default='.', help='输出目录，目录输入会保留子目录结构')
+    parser.add_argument('--config', help='JSON 样式配置文件，只需写出与默认值不同的项')
+    parser.add_argument('--renderer', choices=tuple(RENDERER_EXTENSIONS), default='stream', help='文档生成方式')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='并行转换的进程数')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    overrides = load_overrides(args.config)
+    # 在主进程中校验配置，配置有误时不启动工作进程
+    merge_config(*overrides)
+    files = find_sql_files(args.inputs)
+    if not files:
+        parser.error('没有找到 SQL 文件')
+
+    jobs = [(sql_path, output_path_for(relative_path, args.output_dir, args.renderer)) for sql_path, relative_path in files]
+    outputs = collections.Counter(os.path.abspath(output_path) for _, output_path in jobs)
+    duplicates = [path for path, count in outputs.items() if count > 1]
+    if duplicates:
+        parser.error(f"多个 SQL 文件对应同一输出文档：{'、'.join(duplicates)}")
+
+    start = time.perf_counter()
+    succeeded = failed = tables = total_bytes = 0
+    for result in iter_results(jobs, args.renderer, overrides, min(args.jobs, len(jobs))):
+        if result['error']:
+            failed += 1
+            logger.error("失败 %s：%s", result['sql_path'], result['error'])
+        else:
+            succeeded += 1
+            tables += result['tables']
+            total_bytes += result['bytes']
+            logger.info("完成 %s -> %s：%d 张表，%.3f 秒", result['sql_path'], result['output_path'],
+                        result['tables'], result['seconds'])
+
+    seconds = time.perf_counter() - start
+    logger.info("共 %d 个文件，成功 %d 个，失败 %d 个；%d 张表，%.1f MB，耗时 %.2f 秒"
+                "（%.1f 文件/秒，%.0f 表/秒，%.2f MB/秒）", len(jobs), succeeded, failed, tables,
+                total_bytes / (1 << 20), seconds, len(jobs) / seconds, tables / seconds,
+                total_bytes / (1 << 20) / seconds)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+import argparse
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from SqlToWord import (parse_sql, parse_fields, build_word_doc, default_config, iter_create_statements,
+                       split_create_table, save_document)
+
+# 生成注释用的多字节字符
+COMMENT_CHARS = '床位房间老人亲属设备菜单字典编号名称状态备注创建更新时间删除标识联系方式身份证照片入院离院黑名单'
+
+# 列类型
+COLUMN_TYPES = (
+    'int NOT NULL',
+    'bigint UNSIGNED NOT NULL DEFAULT 0',
+    "varchar(255) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NOT NULL DEFAULT ''",
+    'varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_general_ci NULL DEFAULT NULL',
+    'decimal(10,2) NOT NULL DEFAULT 0.00',
+    "enum('a','b','c') NOT NULL DEFAULT 'a'",
+    'datetime NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP',
+    'text NULL',
+)
+
+# parse_fields 的最坏输入长度：单列定义后紧跟一段不含空白和逗号的字符
+WORST_CASE_LENGTH = 20000
+
+# 命令行 --validate 端到端测试的表数量（作为提交前检查时的典型规模）
+VALIDATE_TABLES = 1000
+
+# 分表结构测试的分表数
+SHARDED_TABLES = 256
+
+# 压缩级别测试：0 不压缩、1 最快、6 默认、9 最小
+COMPRESS_LEVELS = (0, 1, 6, 9)
+
+
+def comment_text(rng, length):
+    """生成指定长度的多字节注释，夹带需要转义的引号"""
+    text = ''.join(rng.choice(COMMENT_CHARS) for _ in range(length))
+    return text[:length // 2] + "''" + text[length // 2:]
+
+
+def generate_dump(tables, columns, inserts=2, comment_length=40, seed=0):
+    """
+    生成模拟 mysqldump 输出的 SQL 内容
+    包含多字节长注释、KEY/CONSTRAINT 行、分区表以及穿插的 INSERT 数据
+    :param tables: 表数量
+    :param columns: 每张表的列数
+    :param inserts: 每张表后的 INSERT 语句数
+    :param comment_length: 注释长度（字符数）
+    :param seed: 随机种子，相同参数生成相同内容
+    :return: SQL 内容
+    """
+    rng = random.Random(seed)
+    parts = ['/*!40101 SET NAMES utf8mb4 */;\n', 'SET FOREIGN_KEY_CHECKS = 0;\n\n']
+    for table_index in range(tables):
+        name = f'table_{table_index}'
+        lines = [f'  `id` bigint NOT NULL AUTO_INCREMENT COMMENT \'{comment_text(rng, comment_length)}\'']
+        for column_index in range(columns - 1):
+            lines.append(f'  `column_{column_index}` {rng.choice(COLUMN_TYPES)} '
+                         f'COMMENT \'{comment_text(rng, comment_length)}\'')
+        lines.append('  PRIMARY KEY (`id`) USING BTREE')
+        lines.append(f'  KEY `idx_{name}` (`column_0`, `column_1`) USING BTREE')
+        if table_index:
+            lines.append(f'  CONSTRAINT `fk_{name}` FOREIGN KEY (`column_0`) '
+                         f'REFERENCES `table_{table_index - 1}` (`id`) ON DELETE CASCADE')
+        partition = ''
+        if table_index % 10 == 9:
+            partition = ('\nPARTITION BY RANGE (`id`) (PARTITION p0 VALUES LESS THAN (1000), '
+                         'PARTITION p1 VALUES LESS THAN MAXVALUE)')
+
+        parts.append(f'-- ----------------------------\n-- Table structure for {name}\n'
+                     f'-- ----------------------------\n')
+        parts.append(f'DROP TABLE IF EXISTS `{name}`;\n')
+        parts.append(f'CREATE TABLE `{name}` (\n' + ',\n'.join(lines) +
+                     f'\n) ENGINE = InnoDB CHARACTER SET = utf8mb4 '
+                     f'COMMENT = \'{comment_text(rng, comment_length // 4)}\'{partition};\n\n')
+        for _ in range(inserts):
+            values = ', '.join(f"({row}, '{comment_text(rng, 8)}; CREATE TABLE x (', '/* -- */')"
+                               for row in range(20))
+            parts.append(f'INSERT INTO `{name}` VALUES {values};\n')
+        parts.append('\n')
+    return ''.join(parts)
+
+
+def generate_sharded_dump(shards=SHARDED_TABLES, columns=20, comment_length=40, seed=0):
+    """
+    生成分表结构的 SQL 内容：同一张表的 shards 个分表（table_000…），列定义完全相同
+    :return: SQL 内容
+    """
+    template = generate_dump(1, columns, 0, comment_length, seed)
+    # 只替换表名，索引名等列定义内容保持相同
+    return ''.join(template.replace('`table_0`', f'`table_{shard:03d}`').replace('for table_0', f'for table_{shard:03d}')
+                   for shard in range(shards))
+
+
+def worst_case_definition(length=WORST_CASE_LENGTH):
+    """parse_fields 的最坏输入：旧实现在此输入上耗时随长度平方增长"""
+    return '`id` int ' + 'x' * length
+
+
+def measure(func, repeat=1, memory=True):
+    """
+    测量函数耗时（多次运行取最短）及一次运行的内存峰值
+    :param func: 无参数函数
+    :param repeat: 计时运行次数
+    :param memory: 是否使用 tracemalloc 额外运行一次记录内存峰值
+    :return: (最后一次的返回值, 秒数, 内存峰值字节数或 None)
+    """
+    seconds = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def stage_result(seconds, peak, amount, unit):
+    """单个阶段的测量结果，吞吐量为每秒处理的数量"""
+    return {
+        'seconds': round(seconds, 6),
+        'throughput': round(amount / seconds, 3) if seconds else None,
+        'unit': unit,
+        'peak_bytes': peak,
+    }
+
+
+def run_benchmark(tables=100, columns=20, inserts=2, comment_length=40, repeat=3, memory=True, seed=0):
+    """
+    运行各阶段基准测试
+    :return: 测量结果
+    """
+    config = default_config()
+    dump = generate_dump(tables, columns, inserts, comment_length, seed)
+    dump_mb = len(dump.encode('utf-8')) / (1 << 20)
+    stages = {}
+
+    parsed, seconds, peak = measure(lambda: list(parse_sql(dump)), repeat, memory)
+    stages['parse_sql'] = stage_result(seconds, peak, dump_mb, 'MB/s')
+
+    definitions = [split_create_table(statement)['create_definition']
+                   for statement in iter_create_statements(io.StringIO(dump))]
+    _, seconds, peak = measure(lambda: [parse_fields(definition) for definition in definitions], repeat, memory)
+    stages['parse_fields'] = stage_result(seconds, peak, tables * columns, 'columns/s')
+
+    from MappedInput import iter_mapped_statements
+    with tempfile.TemporaryDirectory() as directory:
+        sql_path = os.path.join(directory, 'dump.sql')
+        with open(sql_path, 'w', encoding='utf-8') as f:
+            f.write(dump)
+
+        def split_text():
+            with open(sql_path, 'r', encoding='utf-8') as f:
+                return list(iter_create_statements(f))
+
+        _, seconds, peak = measure(split_text, repeat, memory)
+        stages['split_text'] = stage_result(seconds, peak, dump_mb, 'MB/s')
+        _, seconds, peak = measure(lambda: list(iter_mapped_statements(sql_path)), repeat, memory)
+        stages['split_mapped'] = stage_result(seconds, peak, dump_mb, 'MB/s')
+
+        # 压缩文件流式解压后切分，吞吐量按解压后的大小计算
+        for name, compress in (('gzip', gzip.compress), ('bz2', bz2.compress), ('xz', lzma.compress)):
+            compressed_path = f'{sql_path}.{name}'
+            with open(compressed_path, 'wb') as f:
+                f.write(compress(dump.encode('utf-8')))
+            _, seconds, peak = measure(lambda: list(iter_mapped_statements(compressed_path)), repeat, memory)
+            stages[f'split_{name}'] = stage_result(seconds, peak, dump_mb, 'MB/s')
+
+    # 命令行启动开销：子进程导入模块，以及 --validate 检查的端到端耗时（不记录内存）
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    _, seconds, _ = measure(lambda: subprocess.run([sys.executable, '-c', 'import SqlToWord'], cwd=src_dir,
+                                                   check=True), repeat, False)
+    stages['import'] = stage_result(seconds, None, 1, 'imports/s')
+    with tempfile.TemporaryDirectory() as directory:
+        sql_path = os.path.join(directory, 'validate.sql')
+        with open(sql_path, 'w', encoding='utf-8') as f:
+            f.write(generate_dump(VALIDATE_TABLES, columns, inserts, comment_length, seed))
+        command = [sys.executable, 'SqlToWord.py', sql_path, '--validate']
+        _, seconds, _ = measure(lambda: subprocess.run(command, cwd=src_dir, stdout=subprocess.DEVNULL, check=True),
+                                repeat, False)
+        stages['validate_cli'] = stage_result(seconds, None, VALIDATE_TABLES, 'tables/s')
+
+    worst = worst_case_definition()
+    _, seconds, peak = measure(lambda: parse_fields(worst), repeat, memory)
+    stages['parse_fields_worst_case'] = stage_result(seconds, peak, len(worst) / 1000, 'kchars/s')
+
+    doc, seconds, peak = measure(lambda: build_word_doc(parsed, **config), 1, memory)
+    stages['generate_word_doc'] = stage_result(seconds, peak, tables, 'tables/s')
+
+    _, seconds, peak = measure(lambda: doc.save(io.BytesIO()), repeat, memory)
+    stages['doc.save'] = stage_result(seconds, peak, tables, 'tables/s')
+
+    # 压缩级别：文档大小与保存耗时的取舍，output_bytes 为输出文档大小
+    for level in COMPRESS_LEVELS:
+        output = io.BytesIO()
+        _, seconds, _ = measure(lambda: save_document(doc, io.BytesIO(), level), repeat, False)
+        save_document(doc, output, level)
+        stages[f'save_document_level_{level}'] = dict(stage_result(seconds, None, tables, 'tables/s'),
+                                                       output_bytes=len(output.getvalue()))
+
+    from DocxStream import generate_word_doc_stream
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'stream.docx')
+        _, seconds, peak = measure(lambda: generate_word_doc_stream(parsed, output_path, **config), repeat, memory)
+    stages['generate_word_doc_stream'] = stage_result(seconds, peak, tables, 'tables/s')
+
+    from DocxStream import compile_styles, render_table_xml, write_package
+    compiled = compile_styles(config['default_style'], config['head_style'], config['content_style'],
+                              config['title_style'], config['table_style'])
+    fragments = [render_table_xml(table_data, index, compiled, config['basic_num'])
+                 for index, table_data in enumerate(parsed)]
+    for level in COMPRESS_LEVELS:
+        output = io.BytesIO()
+        _, seconds, _ = measure(lambda: write_package(io.BytesIO(), compiled, fragments, level), repeat, False)
+        write_package(output, compiled, fragments, level)
+        stages[f'write_package_level_{level}'] = dict(stage_result(seconds, None, tables, 'tables/s'),
+                                                      output_bytes=len(output.getvalue()))
+
+    # 分表结构：同构表的字段只解析一次，表格片段只生成一次
+    sharded = generate_sharded_dump(SHARDED_TABLES, columns, comment_length, seed)
+    sharded_tables, seconds, peak = measure(lambda: list(parse_sql(sharded)), repeat, memory)
+    stages['parse_sql_sharded'] = stage_result(seconds, peak, SHARDED_TABLES, 'tables/s')
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'sharded.docx')
+        _, seconds, peak = measure(lambda: generate_word_doc_stream(sharded_tables, output_path, **config), repeat,
+                                   memory)
+    stages['generate_word_doc_stream_sharded'] = stage_result(seconds, peak, SHARDED_TABLES, 'tables/s')
+
+    from DocxStream import generate_word_doc_parallel
+    with tempfile.TemporaryDirectory() as directory:
+        output_path = os.path.join(directory, 'parallel.docx')
+        # 子进程中的内存不计入 tracemalloc，只记录耗时
+        _, seconds, _ = measure(lambda: generate_word_doc_parallel(parsed, output_path, **config), repeat, False)
+    stages['generate_word_doc_parallel'] = stage_result(seconds, None, tables, 'tables/s')
+
+    import TextRender
+    for renderer in ('markdown', 'html', 'csv'):
+        generate = getattr(TextRender, f'generate_{renderer}')
+        _, seconds, peak = measure(lambda: generate(parsed, io.StringIO(), **config), repeat, memory)
+        stages[f'generate_{renderer}'] = stage_result(seconds, peak, tables, 'tables/s')
+
+    return {
+        'config': {'tables': tables, 'columns': columns, 'inserts': inserts, 'comment_length': comment_length,
+                   'seed': seed, 'dump_bytes': len(dump.encode('utf-8'))},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'stages': stages,
+    }
+
+
+def compare_results(current, baseline, threshold):
+    """
+    与基线结果比较吞吐量
+    :param current: 本次结果
+    :param baseline: 基线结果
+    :param threshold: 允许的下降比例，如 0.1 表示吞吐量低于基线 90% 时视为退化
+    :return: 退化的阶段列表 [(阶段名, 基线吞吐量, 本次吞吐量)]
+    """
+    regressions = []
+    for name, stage in current['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        if not base or not base.get('throughput') or not stage.get('throughput'):
+            continue
+        if stage['throughput'] < base['throughput'] * (1 - threshold):
+            regressions.append((name, base['throughput'], stage['throughput']))
+    return regressions
+
+
+def main(argv=None):
+    """
+    命令行入口
+    :param argv: 命令行参数，默认取 sys.argv
+    :return: 退出码，吞吐量退化时为 1
+    """
+    parser = argparse.ArgumentParser(description='SQL 解析与 Word 生成的基准测试')
+    parser.add_argument('--tables', type=int, default=100, help='表数量')
+    parser.add_argument('--columns', type=int, default=20, help='每张表的列数')
+    parser.add_argument('--inserts', type=int, default=2, help='每张表后的 INSERT 语句数')
+    parser.add_argument('--comment-length', type=int, default=40, help='注释长度（字符数）')
+    parser.add_argument('--repeat', type=int, default=3, help='计时运行次数，取最短耗时')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子')
+    parser.add_argument('--no-memory', action='store_true', help='不记录内存峰值')
+    parser.add_argument('--output', help='结果 JSON 的输出路径，默认输出到标准输出')
+    parser.add_argument('--compare', metavar='BASELINE', help='与基线结果 JSON 比较')
+    parser.add_argument('--threshold', type=float, default=0.1, help='允许的吞吐量下降比例')
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.tables, args.columns, args.inserts, args.comment_length, args.repeat,
+                           not args.no_memory, args.seed)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline.get('config') != result['config']:
+            print('警告：基线的测试参数与本次不同，比较结果仅供参考', file=sys.stderr)
+        regressions = compare_results(result, baseline, args.threshold)
+        for name, base, current in regressions:
+            print(f'性能退化：{name} 吞吐量 {current} 低于基线 {base}（阈值 {args.threshold:.0%}）', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+import itertools
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+import docx
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.shared import Pt, RGBColor, Emu
+
+from Instrument import hooks, emit, begin_phase, end_phase, timed
+from SqlToWord import (PAGE_WIDTH, PAGE_HEIGHT, TABLE_HEADERS, TABLE_WIDTHS, STYLE_NAMES, table_texts, style_id,
+                       heading_base_style, table_style_xml, zip_compression)
+from WorkerPool import iter_pool
+
+# python-docx 自带的空白文档模板，除 document.xml 外的部件原样复制
+TEMPLATE_PATH = os.path.join(os.path.dirname(docx.__file__), 'templates', 'default.docx')
+DOCUMENT_PART = 'word/document.xml'
+STYLES_PART = 'word/styles.xml'
+
+# 并行渲染时每批的表数
+RENDER_BATCH_SIZE = 64
+
+# 按字段列表复用的表格 XML 数量上限，超出时先进先出
+BODY_CACHE_SIZE = 256
+
+# 工作进程中编译后的样式和编号信息，进程启动时设置一次
+render_state = {}
+
+# XML 1.0 不允许出现的控制字符
+invalid_xml_chars = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def twips(length):
+    """将长度（EMU）转换为缇（1/20 磅）"""
+    return int(Emu(length).twips)
+
+
+def resolve_style(style_info, default_info):
+    """
+    合并样式信息与默认样式信息，未配置的项取默认样式
+    :param style_info: 样式信息
+    :param default_info: 默认样式信息
+    :return: 完整的样式信息
+    """
+    keys = ('align', 'line_spacing', 'space_before', 'space_after', 'font', 'size', 'color', 'font-CN',
+            'first_line_indent')
+    return {key: style_info.get(key, default_info[key]) for key in keys}
+
+
+def paragraph_properties(style):
+    """
+    生成段落属性 w:pPr
+    :param style: resolve_style 合并后的样式信息
+    :return: w:pPr 字符串
+    """
+    line_spacing = style['line_spacing']
+    if isinstance(line_spacing, Pt):
+        # 固定值行间距
+        spacing = f'w:lineRule="exact" w:line="{twips(line_spacing)}"'
+    else:
+        # 倍数行间距
+        spacing = f'w:lineRule="auto" w:line="{int(round(line_spacing * 240))}"'
+
+    indent = int(round(style['size'] * style['first_line_indent'] * 20))
+    align = WD_ALIGN_PARAGRAPH.to_xml(style['align'])
+    return (f'<w:pPr>'
+            f'<w:spacing w:before="{twips(style["space_before"])}" w:after="{twips(style["space_after"])}" {spacing}/>'
+            f'<w:ind w:firstLine="{indent}"/><w:jc w:val="{align}"/></w:pPr>')
+
+
+def run_properties(style):
+    """
+    生成文本属性 w:rPr
+    :param style: resolve_style 合并后的样式信息
+    :return: w:rPr 字符串
+    """
+    font = escape(style['font'], {'"': '&quot;'})
+    font_cn = escape(style['font-CN'], {'"': '&quot;'})
+    return (f'<w:rPr><w:rFonts w:ascii="{font}" w:hAnsi="{font}" w:eastAsia="{font_cn}"/>'
+            f'<w:color w:val="{RGBColor(*style["color"])}"/>'
+            f'<w:sz w:val="{int(round(style["size"] * 2))}"/></w:rPr>')
+
+
+def paragraph_style_xml(name, style, base_name=None):
+    """
+    生成命名段落样式 w:style，与 add_named_styles 写入 styles.xml 的内容一致
+    :param name: 样式名称
+    :param style: resolve_style 合并后的样式信息
+    :param base_name: 所基于的样式名称
+    :return: w:style 字符串
+    """
+    based_on = f'<w:basedOn w:val="{style_id(base_name)}"/>' if base_name else ''
+    return (f'<w:style w:type="paragraph" w:customStyle="1" w:styleId="{style_id(name)}">'
+            f'<w:name w:val="{name}"/>{based_on}<w:qFormat/>'
+            f'{paragraph_properties(style)}{run_properties(style)}</w:style>')
+
+
+def text_xml(text):
+    """生成文本 w:t，换行和制表符转换为 w:br 和 w:tab"""
+    text = invalid_xml_chars.sub('', text)
+    parts = []
+    for index, line in enumerate(re.split(r'\r\n|\n|\r', text)):
+        if index:
+            parts.append('<w:br/>')
+        for tab_index, segment in enumerate(line.split('\t')):
+            if tab_index:
+                parts.append('<w:tab/>')
+            if segment:
+                preserve = ' xml:space="preserve"' if segment != segment.strip() else ''
+                parts.append(f'<w:t{preserve}>{escape(segment)}</w:t>')
+    return ''.join(parts)
+
+
+def paragraph_xml(text, ppr, rpr=''):
+    """生成单个段落 w:p，rpr 为空时文字直接使用段落样式"""
+    return f'<w:p>{ppr}<w:r>{rpr}{text_xml(text)}</w:r></w:p>'
+
+
+def compile_styles(default_style, head_style, content_style, title_style, table_style):
+    """
+    将样式配置编译为命名样式定义，并预先生成段落引用样式所需的 w:pPr、表头的 w:rPr 及表格开头
+    :return: 编译后的样式信息
+    """
+    grid = ''.join(f'<w:gridCol w:w="{twips(width)}"/>' for width in TABLE_WIDTHS)
+    compiled = {
+        'table_ppr': f'<w:pPr><w:pStyle w:val="{style_id(STYLE_NAMES["table"])}"/></w:pPr>',
+        'header_rpr': f'<w:rPr><w:rStyle w:val="{style_id(STYLE_NAMES["header"])}"/></w:rPr>',
+        'widths': [twips(width) for width in TABLE_WIDTHS],
+        'tbl_start': f'<w:tbl><w:tblPr><w:tblStyle w:val="{style_id(STYLE_NAMES["tbl"])}"/>'
+                     f'<w:tblW w:type="auto" w:w="0"/><w:tblLayout w:type="fixed"/>'
+                     f'<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" '
+                     f'w:noVBand="1" w:val="04A0"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>',
+    }
+
+    # 命名样式定义
+    definitions = []
+    for key, style_config in (('head', head_style), ('content', content_style), ('title', title_style),
+                              ('table', table_style)):
+        base_name = heading_base_style(head_style['style']['level']) if key == 'head' else None
+        info = resolve_style(style_config.get('style', {}), default_style)
+        definitions.append(paragraph_style_xml(STYLE_NAMES[key], info, base_name))
+        if key != 'table':
+            compiled[key] = style_config['add']
+            compiled[f'{key}_ppr'] = f'<w:pPr><w:pStyle w:val="{style_id(STYLE_NAMES[key])}"/></w:pPr>'
+    definitions.append(f'<w:style w:type="character" w:customStyle="1" w:styleId="{style_id(STYLE_NAMES["header"])}">'
+                       f'<w:name w:val="{STYLE_NAMES["header"]}"/><w:rPr><w:b/></w:rPr></w:style>')
+    definitions.append(table_style_xml(table_style))
+    compiled['styles'] = ''.join(definitions)
+    return compiled
+
+
+def row_xml(compiled, values, rpr=''):
+    """生成表格的一行 w:tr，单元格宽度取自列宽并垂直居中"""
+    cells = ''.join(
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{width}"/><w:vAlign w:val="center"/></w:tcPr>'
+        f'{paragraph_xml(value, compiled["table_ppr"], rpr)}</w:tc>'
+        for width, value in zip(compiled['widths'], values)
+    )
+    return f'<w:tr>{cells}</w:tr>'
+
+
+def table_body_xml(fields, compiled):
+    """
+    生成表格（表头和各字段行），边框由表格样式定义
+    :param fields: 字段列表
+    :param compiled: compile_styles 编译后的样式信息
+    :return: w:tbl 片段字符串
+    """
+    parts = [compiled['tbl_start'], row_xml(compiled, TABLE_HEADERS, compiled['header_rpr'])]
+    for field in fields:
+        values = (field['name'], field['type'], field['nullable'], field['comment'])
+        parts.append(row_xml(compiled, values))
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def shared_body_xml(fields, compiled, bodies):
+    """
+    生成表格片段，同构表共享同一字段列表（见 SqlToWord.parse_shape）时复用已生成的片段
+    :param fields: 字段列表
+    :param compiled: compile_styles 编译后的样式信息
+    :param bodies: {id(字段列表): (字段列表, 片段)} 缓存字典，同时持有字段列表以免 id 被复用
+    :return: w:tbl 片段字符串
+    """
+    cached = bodies.get(id(fields))
+    if cached is not None and cached[0] is fields:
+        return cached[1]
+    body = table_body_xml(fields, compiled)
+    if len(bodies) >= BODY_CACHE_SIZE:
+        del bodies[next(iter(bodies))]
+    bodies[id(fields)] = (fields, body)
+    return body
+
+
+def render_table_xml(table_data, index, compiled, basic_num, numbers=None, bodies=None):
+    """
+    生成单张表的 WordprocessingML 片段（标题、内容段落、表格标题、表格）
+    :param table_data: 表结构信息
+    :param index: 表序号（从 0 开始）
+    :param compiled: compile_styles 编译后的样式信息
+    :param basic_num: 基本编号信息
+    :param numbers: 可选的 (标题编号, 表格编号)，默认由 index 计算
+    :param bodies: 可选的表格片段缓存字典，见 shared_body_xml
+    :return: XML 片段字符串
+    """
+    texts = table_texts(table_data, index, basic_num, numbers)
+    parts = []
+
+    # 标题、内容、表格标题
+    for key in ('head', 'content', 'title'):
+        if compiled[key]:
+            text = texts['heading' if key == 'head' else key]
+            parts.append(paragraph_xml(text, compiled[f'{key}_ppr']))
+
+    if bodies is None:
+        parts.append(table_body_xml(table_data['fields'], compiled))
+    else:
+        parts.append(shared_body_xml(table_data['fields'], compiled, bodies))
+
+    # 表格间是否空行
+    if basic_num['blank']:
+        parts.append('<w:p/>')
+    return ''.join(parts)
+
+
+def document_frame():
+    """
+    读取模板 document.xml，返回正文之前的开头部分和包含节属性的结尾部分
+    :return: (开头, 结尾)
+    """
+    with zipfile.ZipFile(TEMPLATE_PATH) as template:
+        xml = template.read(DOCUMENT_PART).decode('utf-8')
+    body_start = xml.index('<w:body>') + len('<w:body>')
+    sect_start = xml.rindex('<w:sectPr')
+    tail = re.sub(r'>\s+<', '><', xml[sect_start:].rstrip())
+    # 设置纸张大小
+    tail = re.sub(r'<w:pgSz\b[^>]*/>', f'<w:pgSz w:w="{twips(PAGE_WIDTH)}" w:h="{twips(PAGE_HEIGHT)}"/>', tail)
+    return xml[:body_start], tail
+
+
+def write_package(output_path, compiled, fragments, compresslevel=None):
+    """
+    将各表的 XML 片段依次写入 document.xml 并生成 docx 压缩包
+    :param output_path: 输出文档的路径或可写的二进制文件对象（不需要可定位，不会被关闭）
+    :param compiled: compile_styles 编译后的样式信息
+    :param fragments: 各表 XML 片段（字符串或 UTF-8 编码的字节串）的迭代器
+    :param compresslevel: 压缩级别，见 zip_compression
+    """
+    head, tail = document_frame()
+    compression, level = zip_compression(compresslevel)
+
+    with zipfile.ZipFile(TEMPLATE_PATH) as template, \
+            zipfile.ZipFile(output_path, 'w', compression=compression, compresslevel=level) as package:
+        # 复制模板中的其他部件，styles.xml 中追加命名样式
+        for item in template.infolist():
+            if item.filename == DOCUMENT_PART:
+                continue
+            data = template.read(item.filename)
+            if item.filename == STYLES_PART:
+                data = data.decode('utf-8').replace('</w:styles>', compiled['styles'] + '</w:styles>').encode('utf-8')
+            package.writestr(item, data, compress_type=compression, compresslevel=level)
+
+        # 逐表写入 document.xml
+        with package.open(DOCUMENT_PART, 'w', force_zip64=True) as document:
+            document.write(head.encode('utf-8'))
+            for fragment in fragments:
+                document.write(fragment if isinstance(fragment, bytes) else fragment.encode('utf-8'))
+            document.write(tail.encode('utf-8'))
+
+
+def generate_word_doc_stream(tables, output_path, default_style, head_style, content_style, title_style,
+                             table_style, basic_num, compresslevel=None):
+    """
+    根据表结构信息流式生成 docx 文档
+    逐表生成 XML 片段并直接写入压缩包，不构建 python-docx 对象树，内存占用与表数量无关
+    :param tables: 包含表结构信息的列表或迭代器
+    :param output_path: 输出文档的路径或可写的二进制文件对象
+    :param default_style: 默认样式信息
+    :param head_style: 标题样式信息
+    :param content_style: 内容样式信息
+    :param title_style: 表格标题样式信息
+    :param table_style: 表格样式信息
+    :param basic_num: 基本编号信息
+    :param compresslevel: 压缩级别，见 zip_compression
+    """
+    compiled = compile_styles(default_style, head_style, content_style, title_style, table_style)
+    render = render_table_xml_instrumented if hooks else render_table_xml
+    bodies = {}
+    timed('write', write_package, output_path, compiled,
+          (render(table_data, index, compiled, basic_num, bodies=bodies) for index, table_data in enumerate(tables)),
+          compresslevel)
+
+
+def render_table_xml_instrumented(table_data, index, compiled, basic_num, bodies=None):
+    """生成单张表的 XML 片段，并向钩子发送渲染耗时和单元格计数"""
+    start = begin_phase()
+    fragment = render_table_xml(table_data, index, compiled, basic_num, bodies=bodies)
+    seconds = end_phase('render', start)
+    emit('table', name=table_data['table_name'], phase='render', seconds=seconds)
+    emit('count', name='cells', value=(len(table_data['fields']) + 1) * len(TABLE_HEADERS))
+    return fragment
+
+
+def init_render_worker(compiled, basic_num):
+    """渲染工作进程初始化，保存编译后的样式和编号信息"""
+    render_state['compiled'] = compiled
+    render_state['basic_num'] = basic_num
+
+
+def render_batch(start, tables):
+    """
+    在工作进程中渲染一批表
+    :param start: 第一张表的序号
+    :param tables: 表结构信息列表
+    :return: 各表 XML 片段按顺序拼接后的 UTF-8 字节串（主进程直接写入，传回时也无需再编解码）
+    """
+    compiled = render_state['compiled']
+    basic_num = render_state['basic_num']
+    bodies = {}
+    return ''.join(render_table_xml(table_data, index, compiled, basic_num, bodies=bodies)
+                   for index, table_data in enumerate(tables, start)).encode('utf-8')
+
+
+def iter_parallel_fragments(tables, compiled, basic_num, workers):
+    """
+    使用进程池分批渲染 XML 片段，同时在途的批次数有上限，按提交顺序产出结果
+    :param tables: 表结构信息迭代器
+    :param compiled: compile_styles 编译后的样式信息
+    :param basic_num: 基本编号信息
+    :param workers: 进程数
+    :return: 各批 XML 片段生成器
+    """
+    def jobs():
+        start = 0
+        for batch in iter(lambda: list(itertools.islice(tables, RENDER_BATCH_SIZE)), []):
+            yield start, batch
+            start += len(batch)
+
+    return iter_pool(render_batch, jobs(), workers, init_render_worker, (compiled, basic_num))
+
+
+def generate_word_doc_parallel(tables, output_path, default_style, head_style, content_style, title_style,
+                               table_style, basic_num, workers=None, compresslevel=None):
+    """
+    根据表结构信息生成单个 docx 文档：工作进程分批渲染 XML 片段，主进程按顺序写入 document.xml，
+    内容与 generate_word_doc_stream 完全相同
+    :param tables: 包含表结构信息的列表或迭代器
+    :param output_path: 输出文档的路径或可写的二进制文件对象
+    :param workers: 渲染进程数，默认为 CPU 数，1 表示在当前进程中依次渲染
+    其余参数同 generate_word_doc_stream
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        generate_word_doc_stream(tables, output_path, default_style, head_style, content_style, title_style,
+                                 table_style, basic_num, compresslevel)
+        return
+
+    compiled = compile_styles(default_style, head_style, content_style, title_style, table_style)
+    timed('write', write_package, output_path, compiled,
+          iter_parallel_fragments(iter(tables), compiled, basic_num, workers), compresslevel)
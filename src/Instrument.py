@@ -0,0 +1,127 @@
+import heapq
+import time
+import types
+
+# 已注册的钩子，每个钩子以 hook(event, data) 形式调用
+# 事件：'phase' {'name', 'seconds' 不含子阶段的耗时, 'total' 含子阶段的耗时}
+#       'count' {'name', 'value'}
+#       'table' {'name', 'phase', 'seconds'}
+# 未注册钩子时各处埋点只做一次列表真值判断
+hooks = []
+
+# 进行中的阶段，每项为该阶段内子阶段的累计耗时
+phase_stack = []
+
+
+def add_hook(hook):
+    """注册钩子"""
+    hooks.append(hook)
+
+
+def remove_hook(hook):
+    """注销钩子"""
+    hooks.remove(hook)
+
+
+def emit(event, **data):
+    """向所有钩子发送事件"""
+    for hook in hooks:
+        hook(event, data)
+
+
+def begin_phase():
+    """
+    开始一个阶段
+    :return: 开始时间，传给 end_phase
+    """
+    phase_stack.append(0.0)
+    return time.perf_counter()
+
+
+def end_phase(name, start):
+    """
+    结束一个阶段并发送 'phase' 事件，嵌套阶段的耗时从外层阶段中扣除
+    :param name: 阶段名称
+    :param start: begin_phase 返回的开始时间
+    :return: 含子阶段的耗时
+    """
+    total = time.perf_counter() - start
+    children = phase_stack.pop()
+    if phase_stack:
+        phase_stack[-1] += total
+    emit('phase', name=name, seconds=total - children, total=total)
+    return total
+
+
+def timed(name, func, *args):
+    """调用函数，注册了钩子时记录为一个阶段"""
+    if not hooks:
+        return func(*args)
+    start = begin_phase()
+    try:
+        return func(*args)
+    finally:
+        end_phase(name, start)
+
+
+def timed_iter(name, iterator):
+    """包装迭代器，每次取值的耗时记录为一个阶段"""
+    iterator = iter(iterator)
+    while True:
+        start = begin_phase()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            end_phase(name, start)
+        yield item
+
+
+def timed_reader(reader, name='read'):
+    """包装文本读取对象，每次 read 的耗时记录为一个阶段"""
+    return types.SimpleNamespace(read=lambda size=-1: timed(name, reader.read, size))
+
+
+def new_report():
+    """
+    创建空的统计结果
+    :return: {'phases': {阶段: {'seconds', 'calls'}}, 'counters': {计数项: 值}, 'tables': {表名: 耗时}}
+    """
+    return {'phases': {}, 'counters': {}, 'tables': {}}
+
+
+def report_hook(report):
+    """
+    生成把事件累计到统计结果中的钩子
+    :param report: new_report 创建的统计结果
+    :return: 钩子函数
+    """
+
+    def hook(event, data):
+        if event == 'phase':
+            phase = report['phases'].setdefault(data['name'], {'seconds': 0.0, 'calls': 0})
+            phase['seconds'] += data['seconds']
+            phase['calls'] += 1
+        elif event == 'count':
+            report['counters'][data['name']] = report['counters'].get(data['name'], 0) + data['value']
+        elif event == 'table':
+            report['tables'][data['name']] = report['tables'].get(data['name'], 0.0) + data['seconds']
+
+    return hook
+
+
+def summarize(report, slowest=10):
+    """
+    整理统计结果，用于输出 JSON 报告
+    :param report: 统计结果
+    :param slowest: 列出的最慢表数量
+    :return: 报告内容
+    """
+    phases = sorted(report['phases'].items(), key=lambda item: item[1]['seconds'], reverse=True)
+    tables = heapq.nlargest(slowest, report['tables'].items(), key=lambda item: item[1])
+    return {
+        'phases': {name: {'seconds': round(phase['seconds'], 6), 'calls': phase['calls']} for name, phase in phases},
+        'counters': report['counters'],
+        'slowest_tables': [{'name': name, 'seconds': round(seconds, 6)} for name, seconds in tables],
+    }
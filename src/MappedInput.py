@@ -0,0 +1,362 @@
+import importlib
+import io
+import mmap
+import re
+
+from Instrument import hooks, emit
+from SqlToWord import iter_create_statements
+
+# 语句之间的空白和注释（不含 /*! 可执行注释，其内容按代码处理）
+statement_gap = re.compile(rb'(?:\s++|#[^\n]*+|--(?=[ \t\r\n]|$)[^\n]*+|/\*(?!!)(?:[^*]++|\*(?!/))*+(?:\*/)?)*+')
+# CREATE TABLE 语句开头，可能位于可执行注释中
+create_table_head = re.compile(rb'(?:/\*!\d*+\s*+)?CREATE\s++(?:TEMPORARY\s++)?TABLE\s', re.IGNORECASE)
+# 建表语句关键字（去除开头可执行注释后位于 CREATE 处）
+create_table_keyword = re.compile(rb'CREATE\s++(?:TEMPORARY\s++)?TABLE\s', re.IGNORECASE)
+# 代码中可以整段跳过的内容：普通字节和完整的字符串/引号标识符（占有量词避免回溯）
+code_run = re.compile(rb"""(?:[^;'"`#/\-]++|'(?:[^'\\]++|\\.)*+'|"(?:[^"\\]++|\\.)*+"|`[^`]*+`"""
+                      rb"""|-(?=[^-])|/(?=[^*]))*+""", re.DOTALL)
+
+# 单引号字符串外的代码（各字符串以 \0 代替）：双引号字符串、反引号标识符和注释必须完整出现在两个单引号字符串之间
+outside_code = re.compile(rb"""(?:[^"`#/\-]++|"(?:[^"\\\0]++|\\[^\0])*+"|`[^`\0]*+`|--[ \t\r][^\n\0]*+\n|--\n"""
+                          rb"""|\#[^\n\0]*+\n|/\*!|/\*(?:[^*\0]++|\*(?!/))*+\*/|-(?!-[ \t\r\n])|/(?!\*))*+""")
+# 不含单引号和换行的反引号标识符，去除后不影响单引号的奇偶性
+plain_identifier = re.compile(rb"`[^`'\n]*+`")
+# 代码中会改变引号状态判断的内容
+CODE_SPECIALS = (b'"', b'`', b'#', b'--', b'/*')
+
+# 数据语句每次校验的字节数（在分号换行处切分），校验失败时只有这一段逐条扫描
+DATA_BLOCK_SIZE = 4 << 20
+# 连续校验失败时逐条扫描的范围逐次加倍，最多为该数量的段（内容不适合整段校验时少做无用的校验）
+MAX_SLOW_BLOCKS = 16
+# 查找建表语句时每次转为小写的字节数：从小块开始逐次加倍，建表语句密集时不必整块转换
+SEARCH_BLOCK_MIN = 4 << 10
+SEARCH_BLOCK_SIZE = 4 << 20
+# 字符串外的特殊内容少于该密度（每多少字节一处）时逐处判断，否则整段拆分校验
+SPECIAL_SPACING = 4096
+# 特殊内容较多且语句平均长于该字节数时，整段拆分校验不如逐条扫描快
+STATEMENT_SPACING = 4096
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+# 压缩文件的文件头及对应的标准库模块（gzip / bzip2 / xz），按文件头识别，不依赖扩展名
+COMPRESSION_MAGIC = ((b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'lzma'))
+WHITESPACE = b' \t\r\n'
+
+
+def statement_end(data, pos):
+    """
+    从语句中的位置开始查找结束语句的分号，跳过字符串、引号标识符和注释
+    :param data: SQL 文件内容（bytes 或 mmap）
+    :param pos: 开始查找的位置（位于代码中）
+    :return: 分号之后的位置，没有分号时为内容长度
+    """
+    size = len(data)
+    while True:
+        pos = code_run.match(data, pos).end()
+        if pos >= size:
+            return size
+        char = data[pos:pos + 3]
+        if char[:1] == b';':
+            return pos + 1
+        if char[:1] == b'#' or (char[:2] == b'--' and (len(char) == 2 or char[2:] in WHITESPACE)):
+            # 行注释
+            pos = data.find(b'\n', pos)
+            if pos == -1:
+                return size
+        elif char[:3] == b'/*!':
+            # 可执行注释，内容按代码处理（结束符 */ 作为普通字符跳过）
+            pos += 3
+        elif char[:2] == b'/*':
+            pos = data.find(b'*/', pos + 2)
+            if pos == -1:
+                return size
+            pos += 2
+        elif char[:1] in (b"'", b'"', b'`'):
+            # 未结束的字符串
+            return size
+        else:
+            # 不构成注释的 -- 或末尾的 - /
+            pos += 1
+
+
+def find_create_table(data, pos):
+    """
+    查找下一处可能的建表语句：分块转为小写后按字节查找 create，再确认关键字完整
+    （不区分大小写的正则查找逐字节尝试匹配，比转小写后查找慢数倍）
+    :return: CREATE 的位置（可能位于字符串或注释中），没有时为内容长度
+    """
+    size = len(data)
+    block_size = SEARCH_BLOCK_MIN
+    while pos < size:
+        end = min(pos + block_size, size)
+        block_size = min(block_size * 2, SEARCH_BLOCK_SIZE)
+        # 多取一小段，跨块的关键字也能找到
+        block = data[pos:end + 16].lower()
+        index = block.find(b'create')
+        while index != -1 and pos + index < end:
+            if create_table_keyword.match(data, pos + index):
+                return pos + index
+            index = block.find(b'create', index + 1)
+        pos = end
+    return size
+
+
+def special_positions(block, specials, escaped, limit):
+    """
+    代码中特殊内容（引号标识符、双引号字符串、注释）可能的起始位置，按位置排序
+    :param specials: 段中出现的特殊内容
+    :param escaped: 段中是否有反斜杠转义（已去除 \\\\），有时跳过转义的双引号
+    :param limit: 位置数上限
+    :return: 位置列表，超过上限时为 None
+    """
+    positions = []
+    for special in specials:
+        index = block.find(special)
+        while index != -1:
+            if not (escaped and special == b'"' and block[index - 1:index] == b'\\'):
+                if len(positions) >= limit:
+                    return None
+                positions.append(index)
+            index = block.find(special, index + 1)
+    positions.sort()
+    return positions
+
+
+def skip_special(block, index):
+    """
+    跳过代码中的一处特殊内容
+    :return: 特殊内容之后的位置，其中含有单引号（单引号不开始字符串，奇偶性不再可靠）时为 None
+    """
+    char = block[index:index + 2]
+    if char[:1] == b'`':
+        end = block.find(b'`', index + 1)
+    elif char[:1] == b'"':
+        end = block.find(b'"', index + 1)
+        if b'\\' in block[index:end]:
+            return None
+    elif char == b'/*':
+        if block[index + 2:index + 3] == b'!':
+            return index + 3
+        end = block.find(b'*/', index + 2)
+        end = end + 1 if end != -1 else -1
+    elif char == b'--' and block[index + 2:index + 3] not in (b' ', b'\t', b'\r', b'\n'):
+        return index + 1
+    else:
+        end = block.find(b'\n', index)
+    if end == -1 or block.find(b"'", index, end) != -1:
+        return None
+    return end + 1
+
+
+def count_quotes(block, start, end, escaped):
+    """统计一段中未转义的单引号个数"""
+    quotes = block.count(b"'", start, end)
+    if escaped:
+        quotes -= block.count(b"\\'", start, end)
+    return quotes
+
+
+def quote_state(block, in_string):
+    """
+    判断一段数据语句末尾是否位于单引号字符串内
+    成对的反斜杠先去除，转义的引号不计数（MySQL 中反斜杠只在字符串内有意义），'' 转义不改变单引号个数的奇偶性；
+    没有双引号、反引号和注释时只需统计单引号个数；这些内容较少时逐处判断是否在字符串外，
+    较多时按单引号拆分后校验字符串外的部分（语句较长时逐条扫描更快，不作判断）
+    :param block: 一段语句内容
+    :param in_string: 开头是否位于单引号字符串内
+    :return: 末尾是否位于单引号字符串内，无法判断时为 None
+    """
+    if b'\\\\' in block:
+        block = block.replace(b'\\\\', b'')
+    escaped = b'\\' in block
+    specials = [special for special in CODE_SPECIALS if special in block]
+    if escaped and b'"' in specials and block.count(b'"') == block.count(b'\\"'):
+        # mysqldump 字符串中的双引号都以反斜杠转义
+        specials.remove(b'"')
+    if not specials:
+        return in_string != (count_quotes(block, 0, len(block), escaped) % 2 == 1)
+
+    positions = special_positions(block, specials, escaped, len(block) // SPECIAL_SPACING)
+    if positions is not None:
+        # 特殊内容较少：按到该处为止的单引号个数判断是否在字符串外，逐处跳过
+        start = 0
+        for index in positions:
+            if index < start:
+                continue  # 位于已跳过的特殊内容中
+            if count_quotes(block, start, index, escaped) % 2:
+                in_string = not in_string
+            start = index
+            if not in_string:
+                start = skip_special(block, index)
+                if start is None:
+                    return None
+        return in_string != (count_quotes(block, start, len(block), escaped) % 2 == 1)
+
+    if block.count(b';\n') < len(block) // STATEMENT_SPACING:
+        return None
+
+    # 特殊内容较多：去除转义的引号和不含单引号的反引号标识符，按单引号拆分后校验字符串外的部分
+    if escaped:
+        block = block.replace(b"\\'", b'').replace(b'\\"', b'')
+    if b'`' in block:
+        block = plain_identifier.sub(b'', block)
+    if b'\0' in block:
+        return None
+    pieces = block.split(b"'")
+    if not outside_code.fullmatch(b'\0'.join(pieces[1 if in_string else 0::2])):
+        return None
+    return in_string != (len(pieces) % 2 == 0)
+
+
+def skip_data_statements(data, pos, limit):
+    """
+    整段跳过 limit 之前的数据语句（INSERT / LOCK / SET 等），不逐条查找语句边界
+    以 DATA_BLOCK_SIZE 为单位复制和校验，查找、计数、拆分都是整段的 C 实现操作
+    :param data: SQL 文件内容（bytes 或 mmap）
+    :param pos: 语句开头
+    :param limit: 下一处可能的建表语句位置
+    :return: (已确认结束的最后一条语句的分号之后的位置或 None, 无法判断的一段的结束位置)
+    """
+    last = data.rfind(b';', pos, limit)
+    if last == -1:
+        return None, pos
+    stop = last + 1
+    in_string = False
+    verified = None
+    start = pos
+    while start < stop:
+        end = data.find(b';\n', start + DATA_BLOCK_SIZE, stop)
+        end = stop if end == -1 else end + 2
+        block = data[start:end]
+        in_string = quote_state(block, in_string)
+        if in_string is None:
+            return verified, end
+        # 段末分号位于字符串外，且不在本行的行注释中时，才确认语句在此结束
+        if not in_string:
+            tail = block[block.rfind(b'\n', 0, len(block) - 1) + 1:]
+            if b'#' not in tail and b'--' not in tail:
+                verified = end
+        start = end
+    return verified, stop
+
+
+def decode_statement(data, start, end):
+    """建表语句解码为文本，换行符与文本模式读取一致"""
+    text = data[start:end].decode('utf-8')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def detect_compression(sql_path):
+    """
+    根据文件头判断 SQL 文件的压缩格式
+    :param sql_path: SQL 文件的路径
+    :return: 解压模块名 'gzip' / 'bz2' / 'lzma'，未压缩时为 None
+    """
+    with open(sql_path, 'rb') as f:
+        head = f.read(6)
+    for magic, module in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return module
+    return None
+
+
+def open_sql_file(sql_path):
+    """
+    以文本方式打开 SQL 文件，压缩文件边读边解压，不写临时文件
+    编码和换行的处理与内存映射方式相同（去除 UTF-8 BOM，换行统一为 \n）
+    :param sql_path: SQL 文件的路径
+    :return: 文本读取对象
+    """
+    compression = detect_compression(sql_path)
+    if compression is None:
+        return open(sql_path, 'r', encoding='utf-8-sig')
+    # 解压模块只在遇到压缩文件时导入
+    return importlib.import_module(compression).open(sql_path, 'rt', encoding='utf-8-sig')
+
+
+def iter_compressed_statements(sql_path):
+    """
+    流式解压 SQL 文件并逐条产出 CREATE TABLE 语句，内存占用与未压缩时的文本方式读取相同
+    注册了钩子时发送解压后的字节数 bytes_decompressed
+    :param sql_path: 压缩的 SQL 文件路径
+    :return: CREATE TABLE 语句生成器
+    """
+    with open_sql_file(sql_path) as f:
+        yield from iter_create_statements(f)
+        if hooks:
+            # 解压读取对象的位置为解压后的偏移
+            emit('count', name='bytes_decompressed', value=f.buffer.tell())
+
+
+def map_file(sql_path):
+    """
+    以只读方式映射整个文件
+    :param sql_path: 文件路径
+    :return: mmap 对象，空文件（无法映射）返回 None
+    """
+    with open(sql_path, 'rb') as f:
+        try:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+
+
+def iter_create_ranges(data):
+    """
+    在 SQL 文件内容的字节上查找 CREATE TABLE 语句，其间的 INSERT 等数据语句整段校验后跳过、不解码
+    :param data: SQL 文件内容（bytes 或 mmap）
+    :return: (开始位置, 结束位置) 生成器，范围内为一条建表语句（含结尾的分号）
+    """
+    size = len(data)
+    pos = 3 if data[:3] == UTF8_BOM else 0
+    next_create = -1  # 下一处可能的建表语句位置
+    slow_until = 0  # 整段校验失败的范围，其中的语句逐条扫描
+    slow_blocks = 0  # 连续校验失败后额外逐条扫描的段数
+    while pos < size:
+        pos = statement_gap.match(data, pos).end()
+        if pos >= size:
+            break
+        if create_table_head.match(data, pos):
+            end = statement_end(data, pos)
+            yield pos, end
+            pos = end
+            continue
+
+        if next_create < pos:
+            next_create = find_create_table(data, pos)
+        end = None
+        if pos >= slow_until:
+            end, slow_until = skip_data_statements(data, pos, next_create)
+            if slow_until > (end or pos):
+                slow_until += slow_blocks * DATA_BLOCK_SIZE
+                slow_blocks = min(slow_blocks * 2 or 1, MAX_SLOW_BLOCKS)
+            else:
+                slow_blocks = 0
+        pos = end or statement_end(data, pos)
+
+
+def iter_range_statements(data, start, end):
+    """解码一个建表语句范围，经 iter_create_statements 去除注释后产出语句，结果与文本方式读取相同"""
+    return iter_create_statements(io.StringIO(decode_statement(data, start, end)))
+
+
+def iter_mapped_statements(sql_path):
+    """
+    以内存映射方式读取 SQL 文件，逐条产出 CREATE TABLE 语句
+    直接在字节上查找建表语句（见 iter_create_ranges），只有建表语句的字节范围解码为文本，不复制整个文件；
+    gzip / bz2 / xz 压缩的文件无法映射，改为流式解压后按文本切分
+    :param sql_path: SQL 文件的路径
+    :return: CREATE TABLE 语句生成器
+    """
+    if detect_compression(sql_path):
+        yield from iter_compressed_statements(sql_path)
+        return
+
+    data = map_file(sql_path)
+    if data is None:
+        return
+    with data:
+        for start, end in iter_create_ranges(data):
+            yield from iter_range_statements(data, start, end)
@@ -0,0 +1,205 @@
+import functools
+import hashlib
+import os
+import re
+
+from DocxStream import compile_styles, render_table_xml, write_package
+from Instrument import hooks, emit, timed
+from SqlToWord import parse_create_table, parse_create_table_instrumented, table_numbers
+
+# 缓存格式版本，渲染逻辑变化时递增使旧缓存失效
+CACHE_VERSION = 2
+
+# 默认缓存目录及容量上限
+CACHE_DIR = '.sql2doc_cache'
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+# 写入缓存片段时使用的临时文件后缀
+TEMP_SUFFIX = '.tmp'
+
+# 编号信息中只影响编号、在组装时替换的项
+NUMBERING_KEYS = ('chapter_num', 'start_table_num', 'table_offset', 'table_positions')
+
+# 缓存片段中代替章节标题编号和表格编号的占位字符（Unicode 私用区），组装时替换为实际编号
+HEADING_MARK = '\ue000'
+TABLE_MARK = '\ue001'
+
+# 语句中的字符串及引号标识符，其中的空白保持原样
+statement_quoted = re.compile(r"""('(?:[^'\\]++|\\.)*+'|"(?:[^"\\]++|\\.)*+"|`[^`]*+`)""")
+statement_space = re.compile(r'\s+')
+
+
+def normalize_statement(statement):
+    """规范化 CREATE TABLE 语句，忽略引号外的空白差异"""
+    # split 的结果中偶数位置为引号外的部分，奇数位置为引号内容
+    parts = statement_quoted.split(statement)
+    parts[::2] = [statement_space.sub(' ', part) for part in parts[::2]]
+    return ''.join(parts).strip()
+
+
+def style_fingerprint(default_style, head_style, content_style, title_style, table_style, basic_num):
+    """
+    生成样式配置的指纹，配置变化时所有缓存片段失效
+    章节编号、起始表格编号及表的位置在组装时替换，不参与指纹
+    :return: 指纹字符串
+    """
+
+    def describe(value):
+        # 记录取值类型，区分 Pt 固定行距与倍数行距等
+        if isinstance(value, dict):
+            return '{' + ','.join(f'{key!r}:{describe(item)}' for key, item in value.items()) + '}'
+        return f'{type(value).__name__}:{value!r}'
+
+    numbering = {key: value for key, value in basic_num.items() if key not in NUMBERING_KEYS}
+    configs = (default_style, head_style, content_style, title_style, table_style, numbering)
+    text = f'{CACHE_VERSION}|' + '|'.join(describe(config) for config in configs)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def cache_key(statement, fingerprint):
+    """缓存键：规范化语句与样式指纹的哈希"""
+    return hashlib.sha256(f'{fingerprint}\n{normalize_statement(statement)}'.encode('utf-8')).hexdigest()
+
+
+def cache_path(cache_dir, key):
+    """缓存片段的文件路径，按键的前两位分目录存放"""
+    return os.path.join(cache_dir, key[:2], f'{key}.xml')
+
+
+def load_fragment(cache_dir, key):
+    """
+    读取缓存片段，命中时更新访问时间供淘汰使用
+    :return: XML 片段，未命中返回 None
+    """
+    path = cache_path(cache_dir, key)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            fragment = f.read()
+    except FileNotFoundError:
+        return None
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        # 读取后被并发运行淘汰，内容已读到，不影响本次使用
+        pass
+    return fragment
+
+
+def store_fragment(cache_dir, key, fragment):
+    """
+    写入缓存片段（先写临时文件再替换，避免并发运行读到不完整内容）
+    :return: 写入的字节数
+    """
+    path = cache_path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = f'{path}.{os.getpid()}{TEMP_SUFFIX}'
+    data = fragment.encode('utf-8')
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, path)
+    return len(data)
+
+
+def evict(cache_dir, max_bytes=CACHE_MAX_BYTES):
+    """
+    缓存总大小超过上限时，按最近使用时间从旧到新删除片段
+    其他运行正在写入的临时文件不计入也不删除；并发运行替换或删除的文件直接跳过
+    :param cache_dir: 缓存目录
+    :param max_bytes: 缓存容量上限（字节）
+    :return: 删除的片段数
+    """
+    entries = []
+    total = 0
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if name.endswith(TEMP_SUFFIX):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        total -= size
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        removed += 1
+    return removed
+
+
+def iter_cached_fragments(statements, compiled, basic_num, key_of, load, store, stats):
+    """
+    按顺序产出各表的 XML 片段，未变化的表直接使用缓存，只解析和渲染新增或修改的表
+    :param statements: CREATE TABLE 语句迭代器
+    :param compiled: compile_styles 编译后的样式信息
+    :param basic_num: 基本编号信息
+    :param key_of: 由语句计算缓存键的函数
+    :param load: 按缓存键读取片段的函数，未命中返回 None
+    :param store: 按缓存键保存片段的函数
+    :param stats: 命中统计 {'hits': 命中数, 'misses': 未命中数}
+    :return: 已替换编号的 XML 片段生成器
+    """
+    parse = parse_create_table_instrumented if hooks else parse_create_table
+    index = 0
+    for statement in statements:
+        key = key_of(statement)
+        fragment = load(key)
+        if fragment is None:
+            table = parse(statement)
+            if table is None:
+                continue
+            stats['misses'] += 1
+            if HEADING_MARK in statement or TABLE_MARK in statement:
+                # 内容本身含有占位字符，直接按实际编号渲染且不缓存
+                yield render_table_xml(table, index, compiled, basic_num)
+                index += 1
+                continue
+            fragment = render_table_xml(table, index, compiled, basic_num, (HEADING_MARK, TABLE_MARK))
+            store(key, fragment)
+        else:
+            stats['hits'] += 1
+
+        # 组装时按当前位置重新编号
+        heading_num, table_num = table_numbers(index, basic_num)
+        yield fragment.replace(HEADING_MARK, heading_num).replace(TABLE_MARK, table_num)
+        index += 1
+
+
+def generate_word_doc_cached(statements, output_path, default_style, head_style, content_style, title_style,
+                             table_style, basic_num, cache_dir=CACHE_DIR, max_bytes=None, compresslevel=None):
+    """
+    由 CREATE TABLE 语句生成 docx 文档，按语句内容和样式配置缓存每张表渲染后的 XML 片段
+    :param statements: CREATE TABLE 语句迭代器（如 iter_sql_file_statements 的结果）
+    :param output_path: 输出文档的路径或可写的二进制文件对象
+    :param cache_dir: 缓存目录
+    :param max_bytes: 缓存容量上限（字节），默认 CACHE_MAX_BYTES
+    :param compresslevel: 压缩级别，见 zip_compression
+    :return: 命中统计 {'hits': 命中数, 'misses': 未命中数, 'evicted': 淘汰数}
+    """
+    compiled = compile_styles(default_style, head_style, content_style, title_style, table_style)
+    fingerprint = style_fingerprint(default_style, head_style, content_style, title_style, table_style, basic_num)
+    stats = {'hits': 0, 'misses': 0}
+    written = 0
+
+    def store(key, fragment):
+        nonlocal written
+        written += store_fragment(cache_dir, key, fragment)
+
+    fragments = iter_cached_fragments(statements, compiled, basic_num,
+                                      functools.partial(cache_key, fingerprint=fingerprint),
+                                      functools.partial(load_fragment, cache_dir), store, stats)
+    timed('write', write_package, output_path, compiled, fragments, compresslevel)
+    # 只有本次写入了新片段时缓存才可能超出上限，全部命中时不扫描缓存目录
+    stats['evicted'] = timed('evict', evict, cache_dir, max_bytes or CACHE_MAX_BYTES) if written else 0
+    if hooks:
+        for name in ('hits', 'misses', 'evicted'):
+            emit('count', name=f'cache_{name}', value=stats[name])
+    return stats
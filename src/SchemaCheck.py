@@ -0,0 +1,53 @@
+import json
+import os
+
+from SqlToWord import iter_sql_file_tables
+
+
+def schema_stats(tables):
+    """
+    统计表结构信息，找出缺少注释的表和字段
+    （缺少表注释时文档标题只有“表”字，缺少字段注释时说明列为空）
+    :param tables: 表结构信息（列表或迭代器）
+    :return: {'tables': 表数量, 'columns': 字段总数, 'columns_per_table': {表名: 字段数},
+              'tables_missing_comment': [表名], 'columns_missing_comment': {表名: [字段名]}}
+    """
+    report = {'tables': 0, 'columns': 0, 'columns_per_table': {}, 'tables_missing_comment': [],
+              'columns_missing_comment': {}}
+    for table in tables:
+        name = table['table_name']
+        fields = table['fields']
+        report['tables'] += 1
+        report['columns'] += len(fields)
+        # 同名表出现多次时以最后一次为准（与依次执行建表语句的结果一致）
+        report['columns_per_table'][name] = len(fields)
+        if not table['table_comment']:
+            report['tables_missing_comment'].append(name)
+        missing = [field['name'] for field in fields if not field['comment']]
+        if missing:
+            report['columns_missing_comment'][name] = missing
+    return report
+
+
+def has_missing_comments(report):
+    """统计结果中是否有缺少注释的表或字段"""
+    return bool(report['tables_missing_comment'] or report['columns_missing_comment'])
+
+
+def check_schema(sql_path, output_path=None, workers=None):
+    """
+    只解析 SQL 文件（不加载 python-docx），输出表结构统计 JSON
+    :param sql_path: SQL 文件的路径
+    :param output_path: JSON 输出路径，None 表示返回文本由调用方输出
+    :param workers: 并行解析的进程数
+    :return: (统计结果, JSON 文本)
+    """
+    if not os.path.exists(sql_path):
+        raise FileNotFoundError(f"SQL文件不存在：{sql_path}")
+
+    report = schema_stats(iter_sql_file_tables(sql_path, workers))
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    return report, text
@@ -0,0 +1,154 @@
+import logging
+import os
+
+from SchemaModel import Table, Column
+from SqlToWord import iter_sql_file_tables, select_renderer
+
+logger = logging.getLogger(__name__)
+
+# 新增、删除字段在字段名单元格前的标记
+ADDED_MARK = '【新增】'
+DROPPED_MARK = '【删除】'
+# 修改过的单元格写为“原值 → 新值”
+CHANGE_ARROW = ' → '
+
+# 比较的字段属性（单元格顺序与表格一致）
+COMPARED_KEYS = ('type', 'nullable', 'comment')
+
+
+def table_key(name):
+    """表名规范化：MySQL 在大小写不敏感的系统上表名不区分大小写"""
+    return name.lower()
+
+
+def column_key(name):
+    """字段名规范化：MySQL 字段名不区分大小写"""
+    return name.lower()
+
+
+def type_key(data_type):
+    """类型规范化：不同导出工具的大小写和空白不同，如 VARCHAR(64) 与 varchar(64)"""
+    return ' '.join(data_type.lower().split())
+
+
+def changed_value(old, new):
+    """修改过的单元格文字"""
+    return f'{old}{CHANGE_ARROW}{new}'
+
+
+def diff_column(old, new):
+    """
+    比较同名字段，生成标记了修改单元格的字段
+    :return: 有修改时为字段信息，否则为 None
+    """
+    values = {}
+    changed = False
+    for key in COMPARED_KEYS:
+        old_value, new_value = old[key], new[key]
+        same = type_key(old_value) == type_key(new_value) if key == 'type' else old_value == new_value
+        values[key] = new_value if same else changed_value(old_value, new_value)
+        changed = changed or not same
+    if not changed:
+        return None
+    return Column(new['name'], values['type'], values['nullable'], values['comment'])
+
+
+def marked_column(field, mark):
+    """在字段名前加上新增或删除标记"""
+    return Column(mark + field['name'], field['type'], field['nullable'], field['comment'])
+
+
+def diff_fields(old_fields, new_fields):
+    """
+    按字段名比较两个字段列表，每个字段只查找一次字典
+    :return: 有变化的字段列表：按新表顺序的新增和修改字段，其后为按原表顺序的删除字段
+    """
+    old_index = {column_key(field['name']): field for field in old_fields}
+    seen = set()
+    fields = []
+    for field in new_fields:
+        key = column_key(field['name'])
+        seen.add(key)
+        old = old_index.get(key)
+        if old is None:
+            fields.append(marked_column(field, ADDED_MARK))
+            continue
+        changed = diff_column(old, field)
+        if changed is not None:
+            fields.append(changed)
+    fields.extend(marked_column(field, DROPPED_MARK) for key, field in old_index.items() if key not in seen)
+    return fields
+
+
+def iter_schema_diff(old_tables, new_tables, stats=None):
+    """
+    比较两份表结构，只产出新增、删除和修改过的表
+    旧表结构按规范化表名建立索引，新表结构流式比较，耗时与表和字段总数成正比
+    :param old_tables: 旧的表结构信息（列表或迭代器）
+    :param new_tables: 新的表结构信息（列表或迭代器）
+    :param stats: 可选字典，用于接收 added / dropped / modified / unchanged 表数量
+    :return: 表结构信息生成器，字段为有变化的字段（已加标记）；新增和修改的表按新顺序，删除的表在最后
+    """
+    counts = {'added': 0, 'dropped': 0, 'modified': 0, 'unchanged': 0} if stats is None else stats
+    for key in ('added', 'dropped', 'modified', 'unchanged'):
+        counts.setdefault(key, 0)
+
+    # 同名表出现多次时以最后一次为准（与依次执行建表语句的结果一致）
+    old_index = {table_key(table['table_name']): table for table in old_tables}
+    seen = set()
+    for table in new_tables:
+        key = table_key(table['table_name'])
+        seen.add(key)
+        old = old_index.get(key)
+        if old is None:
+            counts['added'] += 1
+            yield Table(table['table_name'], table['table_comment'],
+                        [marked_column(field, ADDED_MARK) for field in table['fields']])
+            continue
+
+        fields = diff_fields(old['fields'], table['fields'])
+        comment = table['table_comment']
+        if old['table_comment'] != comment:
+            comment = changed_value(old['table_comment'], comment)
+        elif not fields:
+            counts['unchanged'] += 1
+            continue
+        counts['modified'] += 1
+        yield Table(table['table_name'], comment, fields)
+
+    for key, table in old_index.items():
+        if key not in seen:
+            counts['dropped'] += 1
+            yield Table(table['table_name'], table['table_comment'],
+                        [marked_column(field, DROPPED_MARK) for field in table['fields']])
+
+
+def diff_to_word(old_sql_path, new_sql_path, output_path, default_style, head_style, content_style, title_style,
+                 table_style, basic_num, renderer='docx', compresslevel=None):
+    """
+    比较两个 SQL 文件，只为新增、删除和修改过的表生成文档，表格布局与完整文档相同
+    :param old_sql_path: 旧 SQL 文件的路径
+    :param new_sql_path: 新 SQL 文件的路径
+    :param output_path: 输出文档的路径或已打开的文件对象
+    :param default_style: 默认样式信息
+    :param head_style: 标题样式信息
+    :param content_style: 内容样式信息
+    :param title_style: 表格标题样式信息
+    :param table_style: 表格样式信息
+    :param basic_num: 基本编号信息
+    :param renderer: 文档生成方式，见 select_renderer
+    :param compresslevel: Word 文档的压缩级别，见 zip_compression
+    :return: 各类表的数量
+    """
+    for path in (old_sql_path, new_sql_path):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"SQL文件不存在：{path}")
+
+    stats = {}
+    generate = select_renderer(renderer, compresslevel)
+    # 旧文件需要完整建立索引，新文件边读边比较
+    generate(iter_schema_diff(iter_sql_file_tables(old_sql_path), iter_sql_file_tables(new_sql_path), stats),
+             output_path, default_style, head_style, content_style, title_style, table_style, basic_num)
+    logger.info("新增 %d 张表，删除 %d 张表，修改 %d 张表，未变化 %d 张表", stats['added'], stats['dropped'],
+                stats['modified'], stats['unchanged'])
+    return stats
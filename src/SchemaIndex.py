@@ -0,0 +1,177 @@
+import hashlib
+import itertools
+import json
+import logging
+import os
+import pathlib
+import sqlite3
+import time
+
+from MappedInput import detect_compression, map_file, iter_create_ranges, iter_range_statements
+from SqlToWord import split_create_table
+
+logger = logging.getLogger(__name__)
+
+# 索引格式版本，切分或解析规则变化时递增使旧索引失效
+INDEX_VERSION = 1
+
+# 索引文件：SQL 文件旁的 SQLite 数据库
+INDEX_SUFFIX = '.index.sqlite'
+
+INDEX_SCHEMA = '''
+CREATE TABLE meta (key TEXT PRIMARY KEY, value);
+-- position 为表在完整文档中的序号（从 0 开始），part 为同一字节范围内的第几条语句，hash 为语句的 SHA-256，读取时核对
+CREATE TABLE statements (position INTEGER PRIMARY KEY, offset INTEGER NOT NULL, length INTEGER NOT NULL,
+                         part INTEGER NOT NULL, name TEXT NOT NULL, hash BLOB NOT NULL);
+CREATE INDEX statements_name ON statements (name);
+'''
+
+
+def index_path(sql_path):
+    """SQL 文件的索引文件路径，如 dump.sql 的索引为 dump.sql.index.sqlite"""
+    return sql_path + INDEX_SUFFIX
+
+
+def connect(path, mode):
+    """以 ro / rw 方式打开已存在的索引文件（不存在时不创建）"""
+    return sqlite3.connect(f'{pathlib.Path(path).resolve().as_uri()}?mode={mode}', uri=True)
+
+
+def file_digest(sql_path):
+    """SQL 文件内容的 SHA-256"""
+    with open(sql_path, 'rb') as f:
+        return hashlib.file_digest(f, 'sha256').hexdigest()
+
+
+def build_index(sql_path, path=None):
+    """
+    扫描 SQL 文件，记录每条 CREATE TABLE 语句的字节位置、表名和内容哈希
+    先写入临时文件再替换，中断时不会留下不完整的索引
+    :param sql_path: 未压缩的 SQL 文件路径
+    :param path: 索引文件路径，默认见 index_path
+    :return: 索引中的表数
+    """
+    path = path or index_path(sql_path)
+    start = time.perf_counter()
+    stat = os.stat(sql_path)
+    rows = []
+    data = map_file(sql_path)
+    if data is not None:
+        with data:
+            for offset, end in iter_create_ranges(data):
+                for part, statement in enumerate(iter_range_statements(data, offset, end)):
+                    # 与 parse_create_table 一致：无法解析的语句不是表，不占序号
+                    parts = split_create_table(statement)
+                    if parts is not None:
+                        rows.append((len(rows), offset, end - offset, part, parts['table_name'],
+                                     hashlib.sha256(statement.encode('utf-8')).digest()))
+
+    meta = {'version': INDEX_VERSION, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'sha256': file_digest(sql_path)}
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        connection = sqlite3.connect(temp_path)
+        try:
+            connection.executescript(INDEX_SCHEMA)
+            connection.executemany('INSERT INTO meta VALUES (?, ?)', meta.items())
+            connection.executemany('INSERT INTO statements VALUES (?, ?, ?, ?, ?, ?)', rows)
+            connection.commit()
+        finally:
+            connection.close()
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    logger.info("已建立索引 %s：%d 张表，耗时 %.3f 秒", path, len(rows), time.perf_counter() - start)
+    return len(rows)
+
+
+def index_is_current(sql_path, path):
+    """
+    检查索引是否与 SQL 文件一致：大小或版本不同时失效；修改时间不同时比较内容哈希，内容未变时更新记录的修改时间
+    :return: 是否可以使用
+    """
+    stat = os.stat(sql_path)
+    try:
+        connection = connect(path, 'rw')
+    except sqlite3.OperationalError:
+        return False
+    try:
+        meta = dict(connection.execute('SELECT key, value FROM meta'))
+        if meta.get('version') != INDEX_VERSION or meta.get('size') != stat.st_size:
+            return False
+        if meta.get('mtime_ns') == stat.st_mtime_ns:
+            return True
+        if meta.get('sha256') != file_digest(sql_path):
+            return False
+        connection.execute("UPDATE meta SET value = ? WHERE key = 'mtime_ns'", (stat.st_mtime_ns,))
+        connection.commit()
+        return True
+    except sqlite3.DatabaseError:
+        # 损坏或不是索引的文件
+        return False
+    finally:
+        connection.close()
+
+
+def open_index(sql_path, path=None):
+    """
+    打开 SQL 文件的索引，不存在或已失效时重新建立
+    :param sql_path: 未压缩的 SQL 文件路径
+    :param path: 索引文件路径，默认见 index_path
+    :return: 只读的数据库连接
+    """
+    if not os.path.exists(sql_path):
+        raise FileNotFoundError(f"SQL文件不存在：{sql_path}")
+    if detect_compression(sql_path):
+        raise ValueError('按表名选择需要未压缩的 SQL 文件（压缩文件不能按位置读取）')
+    path = path or index_path(sql_path)
+    if not index_is_current(sql_path, path):
+        build_index(sql_path, path)
+    return connect(path, 'ro')
+
+
+def select_statements(sql_path, names=None, patterns=None, path=None):
+    """
+    通过索引只读取选中的表的 CREATE TABLE 语句，不扫描和解析其余内容
+    :param sql_path: 未压缩的 SQL 文件路径
+    :param names: 表名列表（完全匹配）
+    :param patterns: SQL LIKE 模式列表，如 'order\\_%'（ASCII 字母不区分大小写）
+    :param path: 索引文件路径，默认见 index_path
+    :return: (各表在完整文档中的序号列表, CREATE TABLE 语句生成器)，按在文件中的顺序排列
+    :raises ValueError: names 中有索引里没有的表名
+    """
+    names = list(names or [])
+    patterns = list(patterns or [])
+    conditions = ['name IN (SELECT value FROM json_each(?))'] if names else []
+    conditions += ["name LIKE ? ESCAPE '\\'"] * len(patterns)
+    params = ([json.dumps(names)] if names else []) + patterns
+
+    connection = open_index(sql_path, path)
+    try:
+        rows = connection.execute(
+            f"SELECT position, offset, length, part, name, hash FROM statements "
+            f"WHERE {' OR '.join(conditions) or '0'} ORDER BY position", params).fetchall()
+        total = connection.execute('SELECT COUNT(*) FROM statements').fetchone()[0]
+    finally:
+        connection.close()
+
+    # 表名写错时不生成缺表的文档
+    missing = set(names) - {row[4] for row in rows}
+    if missing:
+        raise ValueError(f"没有找到以下表：{'、'.join(sorted(missing))}")
+    logger.info("按索引选中 %d 张表（共 %d 张）", len(rows), total)
+    return [row[0] for row in rows], iter_selected_statements(sql_path, rows)
+
+
+def iter_selected_statements(sql_path, rows):
+    """按索引记录的字节范围读取语句，并与记录的内容哈希核对（读取前文件又被修改时抛出 ValueError）"""
+    if not rows:
+        return
+    data = map_file(sql_path)
+    with data:
+        for _, offset, length, part, name, digest in rows:
+            statement = next(itertools.islice(iter_range_statements(data, offset, offset + length), part, None), None)
+            if statement is None or hashlib.sha256(statement.encode('utf-8')).digest() != digest:
+                raise ValueError(f"SQL文件在建立索引后发生了变化，表 {name} 的语句与索引不一致，请重新运行")
+            yield statement
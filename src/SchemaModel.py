@@ -0,0 +1,107 @@
+import sys
+
+# 表结构中只在原始语句里保存的部分，保留原始语句时按需重新提取
+RAW_KEYS = ('create_definition', 'table_options', 'partition_options', 'as_clause')
+
+
+class Record:
+    """
+    使用 __slots__ 的轻量记录，支持 record['key'] / get / keys，兼容原有的字典用法
+    """
+    __slots__ = ()
+    # 各层 __slots__ 合并后的键，子类定义时自动追加
+    record_keys = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.record_keys = cls.record_keys + cls.__dict__.get('__slots__', ())
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def keys(self):
+        return self.record_keys
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return NotImplemented
+        return all(getattr(self, key) == getattr(other, key) for key in self.record_keys)
+
+    def __repr__(self):
+        values = ', '.join(f'{key}={getattr(self, key)!r}' for key in self.record_keys)
+        return f'{type(self).__name__}({values})'
+
+
+class Column(Record):
+    """字段信息：字段名、类型、是否允许为空（'YES' / 'NO'）、说明"""
+    __slots__ = ('name', 'type', 'nullable', 'comment')
+
+    def __init__(self, name, data_type, nullable, comment):
+        self.name = name
+        # 类型和是否为空的取值种类很少，驻留后各字段共享同一字符串
+        self.type = sys.intern(data_type)
+        self.nullable = sys.intern(nullable)
+        self.comment = comment
+
+    def as_dict(self):
+        """转换为字典"""
+        return {key: getattr(self, key) for key in self.record_keys}
+
+
+class Table(Record):
+    """
+    表结构信息：表名、表备注、字段列表及建表语句中的标识
+    默认不保留建表语句原文；保留时 create_definition 等原始片段在访问时从原文重新提取
+    """
+    __slots__ = ('table_name', 'table_comment', 'fields', 'temporary', 'if_not_exists', 'ignore_replace', 'source')
+
+    def __init__(self, table_name, table_comment, fields, temporary='', if_not_exists='', ignore_replace='',
+                 source=None):
+        self.table_name = table_name
+        self.table_comment = table_comment
+        self.fields = fields
+        self.temporary = sys.intern(temporary)
+        self.if_not_exists = sys.intern(if_not_exists)
+        self.ignore_replace = sys.intern(ignore_replace)
+        self.source = source
+
+    def __getitem__(self, key):
+        if key in RAW_KEYS:
+            if self.source is None:
+                raise KeyError(f"{key}（未保留建表语句原文，解析时需指定 keep_source=True）")
+            from SqlToWord import split_create_table
+            return split_create_table(self.source)[key]
+        return super().__getitem__(key)
+
+    def keys(self):
+        return self.record_keys + RAW_KEYS if self.source is not None else self.record_keys
+
+    def as_dict(self):
+        """转换为字典，字段列表转换为字典列表"""
+        data = {key: self[key] for key in self.keys() if key != 'source'}
+        data['fields'] = [field.as_dict() for field in self.fields]
+        return data
+
+
+class SharedTable(Table):
+    """
+    结构相同的一组表，只生成一次：以第一张表的表名、备注和字段为代表，members 为全部成员表名
+    """
+    __slots__ = ('members',)
+
+    def __init__(self, table, members):
+        super().__init__(table['table_name'], table['table_comment'], table['fields'], table['temporary'],
+                         table['if_not_exists'], table['ignore_replace'], table['source'])
+        self.members = members
@@ -0,0 +1,80 @@
+import itertools
+
+from SchemaModel import Table, Column
+from SqlToWord import normalize_type
+
+# SQLite：一次查询取出所有表的列信息（pragma_table_info 表值函数，SQLite 3.16+）
+SQLITE_COLUMNS_QUERY = (
+    "SELECT m.name, p.name, p.type, p.\"notnull\", p.pk "
+    "FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+    "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite\\_%' ESCAPE '\\' "
+    "ORDER BY m.rowid, p.cid"
+)
+
+# MySQL：表备注和列信息各一次批量查询，与表数量无关
+MYSQL_TABLES_QUERY = (
+    "SELECT TABLE_NAME, TABLE_COMMENT FROM information_schema.TABLES "
+    "WHERE TABLE_SCHEMA = {schema} AND TABLE_TYPE = 'BASE TABLE'"
+)
+MYSQL_COLUMNS_QUERY = (
+    "SELECT TABLE_NAME, COLUMN_NAME, COLUMN_TYPE, IS_NULLABLE, COLUMN_COMMENT FROM information_schema.COLUMNS "
+    "WHERE TABLE_SCHEMA = {schema} ORDER BY TABLE_NAME, ORDINAL_POSITION"
+)
+
+
+def iter_sqlite_tables(connection):
+    """
+    从 SQLite 数据库读取表结构信息（SQLite 不支持备注，表备注和字段说明为空）
+    :param connection: sqlite3 连接
+    :return: 表结构信息生成器，按建表顺序
+    """
+    cursor = connection.cursor()
+    cursor.execute(SQLITE_COLUMNS_QUERY)
+    for table_name, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+        # INTEGER PRIMARY KEY 是 rowid 的别名，不会为空
+        fields = [Column(name, normalize_type(data_type),
+                         'NO' if not_null or (primary_key and data_type.upper() == 'INTEGER') else 'YES', '')
+                  for _, name, data_type, not_null, primary_key in rows]
+        yield Table(table_name, '', fields)
+
+
+def iter_mysql_tables(connection, schema=None, placeholder='%s'):
+    """
+    从 MySQL 的 information_schema 读取表结构信息
+    :param connection: DB-API 连接
+    :param schema: 数据库名，默认为连接的当前数据库
+    :param placeholder: 驱动的参数占位符，如 pymysql 为 '%s'，sqlite3 为 '?'
+    :return: 表结构信息生成器，按表名排序
+    """
+    schema_sql, params = ('DATABASE()', ()) if schema is None else (placeholder, (schema,))
+    cursor = connection.cursor()
+
+    # 表备注，同时用于排除视图
+    cursor.execute(MYSQL_TABLES_QUERY.format(schema=schema_sql), params)
+    comments = dict(cursor.fetchall())
+
+    # 列信息按表名分组，逐表产出
+    cursor.execute(MYSQL_COLUMNS_QUERY.format(schema=schema_sql), params)
+    for table_name, rows in itertools.groupby(cursor, key=lambda row: row[0]):
+        fields = [Column(name, normalize_type(data_type), nullable, comment or '')
+                  for _, name, data_type, nullable, comment in rows]
+        if table_name in comments:
+            yield Table(table_name, comments[table_name] or '', fields)
+
+
+def iter_schema_tables(connection, dialect=None, schema=None, placeholder='%s'):
+    """
+    通过 DB-API 连接读取数据库的表结构信息，可替代 SQL 文件作为 generate_word_doc 的输入
+    :param connection: DB-API 连接
+    :param dialect: 'sqlite' 或 'mysql'，默认根据连接类型判断
+    :param schema: 数据库名（仅 MySQL）
+    :param placeholder: 驱动的参数占位符（仅 MySQL）
+    :return: 表结构信息生成器
+    """
+    if dialect is None:
+        dialect = 'sqlite' if type(connection).__module__.startswith('sqlite3') else 'mysql'
+    if dialect == 'sqlite':
+        return iter_sqlite_tables(connection)
+    if dialect == 'mysql':
+        return iter_mysql_tables(connection, schema, placeholder)
+    raise ValueError(f"不支持的数据库类型：{dialect}")
@@ -0,0 +1,450 @@
+import argparse
+import collections
+import hashlib
+import importlib
+import io
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, CancelledError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from SqlToWord import iter_tables, iter_sql_file_tables, select_renderer, merge_config
+
+logger = logging.getLogger(__name__)
+
+# 服务支持的文档生成方式（parallel 会在工作进程中再启动进程池，不支持）及响应类型
+CONTENT_TYPES = {
+    'docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'stream': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    'markdown': 'text/markdown; charset=utf-8',
+    'html': 'text/html; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# 配置有误时合并或生成文档抛出的异常，返回 400
+CONFIG_ERRORS = (ValueError, KeyError, TypeError, AttributeError)
+
+# 默认的请求体上限、文档缓存容量和请求超时
+MAX_BODY_BYTES = 64 * 1024 * 1024
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+REQUEST_TIMEOUT = 60
+
+# 计算延迟分位数时保留的最近请求数
+LATENCY_WINDOW = 1024
+
+# 工作进程启动时预先导入的渲染模块
+WARM_MODULES = ('DocxStream', 'TextRender')
+
+# 工作进程中按配置 JSON 缓存的合并结果，按最近使用排序，最多保留 WORKER_CONFIG_SLOTS 份
+worker_configs = collections.OrderedDict()
+WORKER_CONFIG_SLOTS = 32
+
+
+class RequestError(Exception):
+    """请求无法处理，status 为 HTTP 状态码"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def init_worker():
+    """工作进程初始化：预先导入 python-docx 和各渲染模块，请求不再承担导入开销"""
+    for module in WARM_MODULES:
+        importlib.import_module(module)
+    merge_config()
+
+
+def warm_up():
+    """预热任务，确保工作进程已启动并完成初始化"""
+    return os.getpid()
+
+
+def render_document(source, overrides, renderer, compresslevel=None):
+    """
+    在工作进程中生成文档
+    :param source: {'sql': SQL 文本} 或 {'path': SQL 文件路径}
+    :param overrides: 配置项字典列表，依次与默认配置合并，见 merge_config
+    :param renderer: 文档生成方式
+    :param compresslevel: Word 文档的压缩级别，见 zip_compression
+    :return: (文档字节串, 表数, 生成秒数)
+    """
+    start = time.perf_counter()
+    key = json.dumps(overrides, sort_keys=True, ensure_ascii=False)
+    config = worker_configs.get(key)
+    if config is None:
+        config = worker_configs[key] = merge_config(*overrides)
+        if len(worker_configs) > WORKER_CONFIG_SLOTS:
+            worker_configs.popitem(last=False)
+    else:
+        worker_configs.move_to_end(key)
+
+    tables = iter_tables(source['sql']) if 'sql' in source else iter_sql_file_tables(source['path'])
+    count = 0
+
+    def counted():
+        nonlocal count
+        for table in tables:
+            count += 1
+            yield table
+
+    # 直接写入内存，不经过临时文件
+    output = io.BytesIO()
+    select_renderer(renderer, compresslevel)(counted(), output, **config)
+    return output.getvalue(), count, time.perf_counter() - start
+
+
+def create_service(workers=None, queue_size=None, cache_size=CACHE_MAX_BYTES, timeout=REQUEST_TIMEOUT,
+                   overrides=None, root='.', compresslevel=None):
+    """
+    创建文档服务：启动并预热工作进程池
+    :param workers: 工作进程数，默认为 CPU 数
+    :param queue_size: 工作进程都忙时最多排队的请求数，超出时拒绝（503），默认与进程数相同
+    :param cache_size: 文档缓存容量上限（字节），0 表示不缓存
+    :param timeout: 请求等待结果的秒数上限，超时返回 504（已开始的生成继续完成并写入缓存）
+    :param overrides: 服务级的配置项字典（配置文件内容），请求中的配置在此基础上覆盖
+    :param root: 请求按路径读取 SQL 文件时允许的目录
+    :param compresslevel: Word 文档的压缩级别，见 zip_compression
+    :return: 服务状态字典
+    """
+    workers = workers or os.cpu_count() or 1
+    service = {
+        'workers': workers,
+        'capacity': workers + (workers if queue_size is None else queue_size),
+        'timeout': timeout,
+        'overrides': [overrides] if overrides else [],
+        'root': os.path.realpath(root),
+        'compresslevel': compresslevel,
+        'executor': ProcessPoolExecutor(max_workers=workers, initializer=init_worker),
+        # 可重入：在锁内取消任务时，完成回调在同一线程中立即执行并再次加锁
+        'lock': threading.RLock(),
+        # 文档缓存 {键: (文档字节串, 表数)}，按最近使用排序
+        'cache': collections.OrderedDict(),
+        'cache_bytes': 0,
+        'cache_max_bytes': cache_size,
+        # 生成中的任务 {键: Future}，相同内容的并发请求共用一个任务
+        'pending': {},
+        # 各任务正在等待结果的请求数
+        'waiters': collections.Counter(),
+        'in_flight': 0,
+        'started': time.time(),
+        'latencies': collections.deque(maxlen=LATENCY_WINDOW),
+        'counters': collections.Counter(),
+    }
+    # 服务级配置在启动时校验
+    merge_config(*service['overrides'])
+    start = time.perf_counter()
+    for future in [service['executor'].submit(warm_up) for _ in range(workers)]:
+        future.result()
+    logger.info("已启动 %d 个工作进程，预热耗时 %.3f 秒", workers, time.perf_counter() - start)
+    return service
+
+
+def close_service(service):
+    """关闭工作进程池，放弃排队中的任务"""
+    service['executor'].shutdown(wait=True, cancel_futures=True)
+
+
+def request_source(service, payload):
+    """
+    校验请求中的 SQL 来源并计算内容哈希
+    :return: (来源, 内容哈希)
+    """
+    if 'sql' in payload:
+        sql = payload['sql']
+        if not isinstance(sql, str):
+            raise RequestError(400, 'sql 应为字符串')
+        return {'sql': sql}, hashlib.sha256(sql.encode('utf-8')).hexdigest()
+    if 'path' not in payload:
+        raise RequestError(400, '需要提供 sql 或 path')
+
+    path = os.path.realpath(os.path.join(service['root'], str(payload['path'])))
+    if os.path.commonpath([path, service['root']]) != service['root']:
+        raise RequestError(403, f"只能读取 {service['root']} 下的文件")
+    try:
+        with open(path, 'rb') as f:
+            digest = hashlib.file_digest(f, 'sha256').hexdigest()
+    except (FileNotFoundError, IsADirectoryError):
+        raise RequestError(404, f"SQL文件不存在：{payload['path']}") from None
+    return {'path': path}, digest
+
+
+def cache_get(service, key):
+    """读取缓存的文档并标记为最近使用，未命中时返回 None"""
+    with service['lock']:
+        entry = service['cache'].get(key)
+        if entry is not None:
+            service['cache'].move_to_end(key)
+        return entry
+
+
+def cache_put(service, key, entry):
+    """写入缓存，超出容量时淘汰最久未使用的文档"""
+    size = len(entry[0])
+    with service['lock']:
+        if size > service['cache_max_bytes'] or key in service['cache']:
+            return
+        service['cache'][key] = entry
+        service['cache_bytes'] += size
+        while service['cache_bytes'] > service['cache_max_bytes']:
+            _, (data, _) = service['cache'].popitem(last=False)
+            service['cache_bytes'] -= len(data)
+            service['counters']['cache_evictions'] += 1
+
+
+def submit(service, key, source, overrides, renderer):
+    """
+    提交生成任务，相同内容的任务已在生成中时直接共用
+    :return: (Future, 是否共用已有任务)
+    """
+    with service['lock']:
+        future = service['pending'].get(key)
+        if future is not None:
+            service['waiters'][key] += 1
+            return future, True
+        if service['in_flight'] >= service['capacity']:
+            raise RequestError(503, '服务繁忙，请稍后重试')
+        try:
+            future = service['executor'].submit(render_document, source, overrides, renderer,
+                                                 service['compresslevel'])
+        except BrokenProcessPool:
+            # 工作进程异常退出后进程池不能再提交任务，重新创建
+            logger.error("工作进程异常退出，重新创建进程池")
+            service['executor'] = ProcessPoolExecutor(max_workers=service['workers'], initializer=init_worker)
+            future = service['executor'].submit(render_document, source, overrides, renderer,
+                                                 service['compresslevel'])
+        service['pending'][key] = future
+        service['waiters'][key] += 1
+        service['in_flight'] += 1
+
+    def finished(done):
+        # 任务结束（包括请求已超时的任务）时写入缓存并释放名额，先写缓存，相同内容的新请求不会重复生成
+        if not done.cancelled() and done.exception() is None:
+            data, tables, seconds = done.result()
+            cache_put(service, key, (data, tables))
+            with service['lock']:
+                service['counters']['render_seconds'] += seconds
+        with service['lock']:
+            service['pending'].pop(key, None)
+            service['in_flight'] -= 1
+
+    future.add_done_callback(finished)
+    return future, False
+
+
+def convert(service, payload):
+    """
+    处理一次文档生成请求
+    :param payload: {'sql' 或 'path', 'config': 可选的配置项字典, 'renderer': 可选，默认 stream}
+    :return: (文档字节串, 表数, 缓存状态 'hit' / 'miss' / 'shared'，文档生成方式)
+    """
+    if not isinstance(payload, dict):
+        raise RequestError(400, '请求体应为 JSON 对象')
+    renderer = payload.get('renderer', 'stream')
+    if renderer not in CONTENT_TYPES:
+        raise RequestError(400, f"不支持的文档生成方式：{renderer}")
+    config = payload.get('config') or {}
+    if not isinstance(config, dict) or not all(isinstance(items, dict) for items in config.values()):
+        raise RequestError(400, 'config 应为 JSON 对象，格式同配置文件')
+    overrides = service['overrides'] + ([config] if config else [])
+    source, digest = request_source(service, payload)
+
+    options = json.dumps([renderer, overrides], sort_keys=True, ensure_ascii=False)
+    key = hashlib.sha256(f'{options}\n{digest}'.encode('utf-8')).hexdigest()
+    entry = cache_get(service, key)
+    if entry is not None:
+        return entry[0], entry[1], 'hit', renderer
+
+    # 在主进程中校验配置，有误的配置不占用工作进程
+    try:
+        merge_config(*overrides)
+    except CONFIG_ERRORS as e:
+        raise RequestError(400, f'配置有误：{type(e).__name__}: {e}') from None
+
+    future, shared = submit(service, key, source, overrides, renderer)
+    try:
+        data, tables, _ = future.result(timeout=service['timeout'])
+    except TimeoutError:
+        with service['lock']:
+            # 还在排队且没有其他请求在等待的任务直接取消
+            if service['waiters'][key] == 1:
+                future.cancel()
+        raise RequestError(504, f"生成超时（{service['timeout']} 秒）") from None
+    except CancelledError:
+        raise RequestError(504, '生成超时') from None
+    except FileNotFoundError as e:
+        raise RequestError(404, str(e)) from None
+    except CONFIG_ERRORS as e:
+        # 配置取值在生成时才能发现的错误，如字号不是数字
+        raise RequestError(400, f'{type(e).__name__}: {e}') from None
+    finally:
+        with service['lock']:
+            service['waiters'][key] -= 1
+            if not service['waiters'][key]:
+                del service['waiters'][key]
+    return data, tables, 'shared' if shared else 'miss', renderer
+
+
+def percentile(values, fraction):
+    """已排序列表的分位数（最近秩）"""
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else None
+
+
+def metrics(service):
+    """
+    服务运行指标：请求数、各状态码次数、缓存命中、在途与排队的任务数以及最近请求的延迟分位数（毫秒）
+    :return: 指标字典
+    """
+    with service['lock']:
+        latencies = sorted(service['latencies'])
+        counters = dict(service['counters'])
+        counters['render_seconds'] = round(counters.get('render_seconds', 0), 3)
+        in_flight = service['in_flight']
+        cache_entries = len(service['cache'])
+        cache_bytes = service['cache_bytes']
+    return {
+        'uptime_seconds': round(time.time() - service['started'], 3),
+        'workers': service['workers'],
+        'in_flight': in_flight,
+        'queue_depth': max(0, in_flight - service['workers']),
+        'capacity': service['capacity'],
+        'cache': {'entries': cache_entries, 'bytes': cache_bytes, 'max_bytes': service['cache_max_bytes']},
+        'counters': counters,
+        'latency_ms': {
+            'window': len(latencies),
+            'p50': percentile(latencies, 0.5),
+            'p95': percentile(latencies, 0.95),
+            'p99': percentile(latencies, 0.99),
+            'max': latencies[-1] if latencies else None,
+        },
+    }
+
+
+def make_handler(service, max_body=MAX_BODY_BYTES):
+    """
+    生成绑定到服务的请求处理类
+    POST /convert 生成文档，GET /metrics 返回运行指标，GET /health 返回健康状态
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                self.send_json(200, metrics(service))
+            elif self.path == '/health':
+                self.send_json(200, {'status': 'ok'})
+            else:
+                self.send_json(404, {'error': f'未知的路径：{self.path}'})
+
+        def do_POST(self):
+            if self.path != '/convert':
+                self.send_json(404, {'error': f'未知的路径：{self.path}'})
+                return
+            start = time.perf_counter()
+            cache_state = None
+            try:
+                length = int(self.headers.get('Content-Length') or 0)
+                if length > max_body:
+                    raise RequestError(413, f'请求体超过上限 {max_body} 字节')
+                try:
+                    payload = json.loads(self.rfile.read(length))
+                except (UnicodeDecodeError, json.JSONDecodeError) as e:
+                    raise RequestError(400, f'请求体不是有效的 JSON：{e}') from None
+                data, tables, cache_state, renderer = convert(service, payload)
+            except RequestError as e:
+                status = e.status
+                self.send_json(status, {'error': str(e)})
+            except Exception as e:
+                status = 500
+                logger.exception("生成文档失败")
+                self.send_json(status, {'error': f'{type(e).__name__}: {e}'})
+            else:
+                status = 200
+                self.send_response(status)
+                self.send_header('Content-Type', CONTENT_TYPES[renderer])
+                self.send_header('Content-Length', str(len(data)))
+                self.send_header('X-Cache', cache_state)
+                self.send_header('X-Tables', str(tables))
+                self.end_headers()
+                self.wfile.write(data)
+
+            with service['lock']:
+                service['latencies'].append(round((time.perf_counter() - start) * 1000, 3))
+                service['counters']['requests'] += 1
+                service['counters'][f'status_{status}'] += 1
+                if cache_state:
+                    service['counters'][f'cache_{cache_state}'] += 1
+
+        def send_json(self, status, body):
+            data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            if status == 503:
+                self.send_header('Retry-After', '1')
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            logger.info("%s %s", self.address_string(), format % args)
+
+    return Handler
+
+
+def create_server(service, host='127.0.0.1', port=8765, max_body=MAX_BODY_BYTES):
+    """
+    创建 HTTP 服务器（未开始处理请求），port 为 0 时自动选择端口，实际地址见 server.server_address
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(service, max_body))
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    """
+    文档服务命令行入口
+    :param argv: 命令行参数，默认取 sys.argv
+    :return: 退出码
+    """
+    parser = argparse.ArgumentParser(description='本地 HTTP 服务：根据 SQL 文本或文件生成数据库设计文档')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口，0 表示自动选择')
+    parser.add_argument('--config', help='JSON 样式配置文件，请求中的 config 在此基础上覆盖')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数，默认为 CPU 数')
+    parser.add_argument('--queue', type=int, default=None, help='工作进程都忙时最多排队的请求数，默认与进程数相同')
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT, help='请求等待结果的秒数上限')
+    parser.add_argument('--cache-size', type=int, default=CACHE_MAX_BYTES // (1024 * 1024),
+                        help='文档缓存容量上限（MB），0 表示不缓存')
+    parser.add_argument('--max-body', type=int, default=MAX_BODY_BYTES // (1024 * 1024), help='请求体上限（MB）')
+    parser.add_argument('--root', default='.', help='请求按路径读取 SQL 文件时允许的目录')
+    parser.add_argument('--compress-level', type=int, choices=range(10), metavar='0-9',
+                        help='Word 文档的压缩级别：0 不压缩（最快、文件最大），1-9 为 deflate 级别（1 最快，9 文件最小），默认 6；'
+                             'docx 方式只改变文件大小，不减少保存耗时')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    overrides = None
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            overrides = json.load(f)
+    service = create_service(args.workers, args.queue, args.cache_size * 1024 * 1024, args.timeout, overrides,
+                             args.root, args.compress_level)
+    server = create_server(service, args.host, args.port, args.max_body * 1024 * 1024)
+    host, port = server.server_address[:2]
+    logger.info("文档服务已启动：http://%s:%d（POST /convert，GET /metrics）", host, port)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        close_service(service)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import logging
+
+from SchemaModel import SharedTable
+
+logger = logging.getLogger(__name__)
+
+
+def shape_key(table):
+    """
+    表结构指纹：表备注和各字段的名称、类型、是否为空、说明都相同的表在文档中的内容只有表名不同
+    :param table: 表结构信息
+    :return: 可哈希的元组
+    """
+    return table['table_comment'], tuple((field['name'], field['type'], field['nullable'], field['comment'])
+                                         for field in table['fields'])
+
+
+def iter_shared_tables(tables, stats=None):
+    """
+    合并结构相同的表（如分表 order_000…order_255）：每种结构只保留第一张表，位置不变，并记录全部成员表名
+    需要读完所有表后才能产出
+    :param tables: 表结构信息迭代器
+    :param stats: 可选字典，接收 {'tables': 表数, 'shapes': 结构数}
+    :return: 表结构信息生成器，有多个成员的结构为 SharedTable
+    """
+    groups = {}
+    count = 0
+    for table in tables:
+        count += 1
+        groups.setdefault(shape_key(table), []).append(table)
+
+    if stats is not None:
+        stats.update(tables=count, shapes=len(groups))
+    logger.info("结构去重：%d 张表，%d 种结构", count, len(groups))
+
+    for members in groups.values():
+        if len(members) == 1:
+            yield members[0]
+        else:
+            yield SharedTable(members[0], [table['table_name'] for table in members])
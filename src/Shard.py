@@ -0,0 +1,173 @@
+import logging
+import os
+import re
+import time
+
+from DocxStream import compile_styles, paragraph_xml, row_xml, write_package
+from SqlToWord import select_renderer, table_numbers, merge_config
+from WorkerPool import worker_config, init_config_worker, iter_pool
+
+logger = logging.getLogger(__name__)
+
+# 索引文档的标题和表头
+INDEX_TITLE = '表结构索引'
+INDEX_HEADERS = ['表编号', '表名', '说明', '所在文档']
+
+
+def shard_group(table_name, group_by):
+    """
+    表所属的分组
+    :param table_name: 表名
+    :param group_by: 'prefix' 按表名第一个下划线之前的前缀，'schema' 按 db.table 中的库名
+    :return: 分组名，没有前缀或库名时为空字符串
+    """
+    if group_by == 'prefix':
+        return table_name.split('_', 1)[0] if '_' in table_name else ''
+    if group_by == 'schema':
+        return table_name.rsplit('.', 1)[0] if '.' in table_name else ''
+    raise ValueError(f"不支持的分组方式：{group_by}")
+
+
+def split_group(tables, max_tables=None, max_rows=None):
+    """
+    按表数和表格行数上限依次切分，单张表超过行数上限时独占一个分片
+    :return: 表列表生成器
+    """
+    shard = []
+    rows = 0
+    for table in tables:
+        table_rows = len(table['fields']) + 1
+        if shard and ((max_tables and len(shard) >= max_tables) or (max_rows and rows + table_rows > max_rows)):
+            yield shard
+            shard = []
+            rows = 0
+        shard.append(table)
+        rows += table_rows
+    if shard:
+        yield shard
+
+
+def iter_shards(tables, max_tables=None, max_rows=None, group_by=None):
+    """
+    将表划分为分片
+    不分组时边读边切分；分组时读完所有表后按组切分，各组按首次出现的顺序排列，组内保持原顺序
+    :param tables: 表结构信息迭代器
+    :param max_tables: 每个分片的表数上限
+    :param max_rows: 每个分片的表格行数上限（字段数加表头），控制单个文档的大小
+    :param group_by: 分组方式，见 shard_group；None 表示不分组
+    :return: (分组名, 表列表) 生成器
+    """
+    if not group_by:
+        for shard in split_group(tables, max_tables, max_rows):
+            yield '', shard
+        return
+
+    groups = {}
+    for table in tables:
+        groups.setdefault(shard_group(table['table_name'], group_by), []).append(table)
+    for group, group_tables in groups.items():
+        for shard in split_group(group_tables, max_tables, max_rows):
+            yield group, shard
+
+
+def shard_path(output_path, number, group=''):
+    """分片文档路径，如 output.docx 的第 1 个分片为 output-001.docx，分组名附在编号之后"""
+    root, ext = os.path.splitext(output_path)
+    suffix = '-' + re.sub(r'[^\w.-]+', '_', group) if group else ''
+    return f'{root}-{number:03d}{suffix}{ext}'
+
+
+def render_shard(tables, output_path, renderer, offset):
+    """
+    生成并保存一个分片文档，标题和表格编号从之前分片的表数之后继续
+    :param tables: 分片中的表
+    :param output_path: 分片文档路径
+    :param renderer: 文档生成方式
+    :param offset: 之前分片的表数
+    :return: (分片文档路径, 表数, 秒数)
+    """
+    start = time.perf_counter()
+    config = dict(worker_config)
+    config['basic_num'] = dict(config['basic_num'], table_offset=offset)
+    select_renderer(renderer)(tables, output_path, **config)
+    return output_path, len(tables), time.perf_counter() - start
+
+
+def write_index(entries, output_path, default_style, head_style, content_style, title_style, table_style,
+                basic_num):
+    """
+    流式生成索引文档，列出每张表的编号、表名、说明和所在的分片文档
+    :param entries: [(表编号, 表名, 说明, 分片文件名)]
+    :param output_path: 索引文档路径
+    """
+    compiled = compile_styles(default_style, head_style, content_style, title_style, table_style)
+
+    def fragments():
+        yield paragraph_xml(INDEX_TITLE, compiled['head_ppr'])
+        yield compiled['tbl_start']
+        yield row_xml(compiled, INDEX_HEADERS, compiled['header_rpr'])
+        for entry in entries:
+            yield row_xml(compiled, entry)
+        yield '</w:tbl>'
+
+    write_package(output_path, compiled, fragments())
+
+
+def shard_to_word(tables, output_path, overrides=(), max_tables=None, max_rows=None, group_by=None, renderer='stream',
+                  workers=None):
+    """
+    分片生成 Word 文档：各分片在独立的进程中生成和保存，标题和表格编号跨分片连续，
+    output_path 为索引文档，列出每张表所在的分片
+    :param tables: 表结构信息迭代器
+    :param output_path: 索引文档路径，分片文档保存在同一目录，见 shard_path
+    :param overrides: JSON 形式的配置项字典列表，见 load_overrides，各工作进程由此合并样式配置
+    :param max_tables: 每个分片的表数上限
+    :param max_rows: 每个分片的表格行数上限
+    :param group_by: 分组方式，见 shard_group
+    :param renderer: 'docx' 或 'stream'
+    :param workers: 进程数，默认为 CPU 数，1 表示在当前进程中依次生成
+    :return: 分片文档路径列表
+    """
+    if renderer not in ('docx', 'stream'):
+        raise ValueError('分片输出只支持 Word 文档')
+    if not (max_tables or max_rows or group_by):
+        raise ValueError('至少需要指定表数上限、行数上限或分组方式之一')
+
+    config = merge_config(*overrides)
+    basic_num = config['basic_num']
+    workers = workers or os.cpu_count() or 1
+    entries = []
+
+    def iter_jobs():
+        # 在主进程中划分分片并记录索引，编号在提交前确定
+        offset = 0
+        for number, (group, shard) in enumerate(iter_shards(tables, max_tables, max_rows, group_by), 1):
+            path = shard_path(output_path, number, group)
+            name = os.path.basename(path)
+            for index, table in enumerate(shard, offset):
+                entries.append((table_numbers(index, basic_num)[1], table['table_name'], table['table_comment'], name))
+            yield shard, path, offset
+            offset += len(shard)
+
+    start = time.perf_counter()
+    paths = []
+    for path, count, seconds in iter_rendered(iter_jobs(), renderer, overrides, workers):
+        paths.append(path)
+        logger.info("已生成分片 %s：%d 张表，%.3f 秒", path, count, seconds)
+    write_index(entries, output_path, **config)
+    logger.info("已生成索引 %s：%d 个分片，%d 张表，耗时 %.3f 秒", output_path, len(paths), len(entries),
+                time.perf_counter() - start)
+    return paths
+
+
+def iter_rendered(jobs, renderer, overrides, workers):
+    """
+    使用进程池生成分片，同时在途的分片数有上限，按提交顺序产出结果
+    :param jobs: (表列表, 分片文档路径, 之前分片的表数) 迭代器
+    :param renderer: 文档生成方式
+    :param overrides: JSON 形式的配置项字典列表，各工作进程由此合并样式配置
+    :param workers: 进程数，1 表示在当前进程中依次生成
+    :return: render_shard 结果生成器
+    """
+    return iter_pool(render_shard, ((tables, path, renderer, offset) for tables, path, offset in jobs), workers,
+                     init_config_worker, (list(overrides),))
@@ -1,11 +1,20 @@
+import argparse
+import copy
+import functools
+import io
+import itertools
+import json
+import logging
 import os
 import re
+import sys
+import time
 
-from docx import Document
-from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
-from docx.oxml import OxmlElement
-from docx.oxml.ns import qn
-from docx.shared import Pt, RGBColor, Cm
+from SchemaModel import Table, Column
+from Instrument import (hooks, add_hook, remove_hook, emit, begin_phase, end_phase, timed, timed_iter, timed_reader,
+                        new_report, report_hook, summarize)
+
+logger = logging.getLogger(__name__)
 
 
 def clean_quoted_identifier(identifier):
@@ -65,99 +74,220 @@ def extract_table_comment(table_options):
     return ''
 
 
+# 列定义词法单元：空白、字符串、引号标识符、括号、逗号、普通单词（每个字符只被扫描一次）
+definition_token = re.compile(
+    r"""(?P<space>\s+)"""
+    r"""|(?P<string>'(?:[^'\\]|\\.|'')*+'|"(?:[^"\\]|\\.|"")*+")"""  # 字符串（支持转义和双写引号）
+    r"""|(?P<ident>`(?:[^`]|``)*+`)"""  # 反引号标识符
+    r"""|(?P<open>\()|(?P<close>\))|(?P<comma>,)"""
+    r"""|(?P<word>[^\s'"`(),]++)"""
+    r"""|(?P<other>.)""",  # 未闭合的引号等
+    re.DOTALL
+)
+
+# 非字段定义（主键、索引、约束等）的起始关键字
+skip_keywords = {'PRIMARY', 'KEY', 'CONSTRAINT', 'UNIQUE', 'INDEX', 'FOREIGN', 'CHECK', 'FULLTEXT', 'SPATIAL'}
+
+# 字符串中的转义字符
+string_escapes = {'n': '\n', 't': '\t', 'r': '\r'}
+
+
+def unquote_string(text):
+    """去除字符串字面量的引号并处理双写引号和反斜杠转义"""
+    quote_char = text[0]
+    inner = text[1:-1]
+    inner = inner.replace(quote_char * 2, quote_char)
+    if '\\' in inner:
+        inner = re.sub(r'\\(.)', lambda m: string_escapes.get(m.group(1), m.group(1)), inner, flags=re.DOTALL)
+    return inner
+
+
+def split_definitions(create_definition):
+    """
+    单次扫描列定义部分，按顶层逗号切分为各个定义项
+    括号内的内容（长度、ENUM 取值、表达式等）合并为一个 ('paren', 内容) 单元
+    :param create_definition: CREATE TABLE 语句中的列定义部分
+    :return: 定义项列表，每项为 (类型, 文本) 单元列表
+    """
+    items = []
+    tokens = []
+    level = 0
+    paren_start = 0
+
+    for match in definition_token.finditer(create_definition):
+        kind = match.lastgroup
+        if kind == 'open':
+            if level == 0:
+                paren_start = match.end()
+            level += 1
+        elif kind == 'close' and level > 0:
+            level -= 1
+            if level == 0:
+                tokens.append(('paren', create_definition[paren_start:match.start()]))
+        elif level > 0 or kind == 'space':
+            continue
+        elif kind == 'comma':
+            items.append(tokens)
+            tokens = []
+        else:
+            tokens.append((kind, match.group()))
+
+    if level > 0:
+        # 括号未闭合，保留已扫描的内容
+        tokens.append(('paren', create_definition[paren_start:]))
+    items.append(tokens)
+    return items
+
+
+def column_type(tokens, index):
+    """
+    从词法单元中提取字段类型：类型名转为大写，长度/精度（可选）原样附在括号中，其后的 UNSIGNED 等修饰不计入
+    :param tokens: 定义项的词法单元
+    :param index: 类型名所在的位置
+    :return: (字段类型, 类型之后的位置)
+    """
+    data_type = tokens[index][1].upper()
+    index += 1
+    if index < len(tokens) and tokens[index][0] == 'paren':
+        length = tokens[index][1].strip()
+        if length:
+            data_type += f"({length})"
+        index += 1
+    return data_type, index
+
+
+def normalize_type(type_text):
+    """
+    将数据库元数据中的字段类型（如 varchar(255)、int(10) unsigned）转换为与解析 SQL 文件相同的形式
+    :param type_text: 类型原文
+    :return: 字段类型，如 VARCHAR(255)、INT(10)
+    """
+    tokens = split_definitions(type_text)[0]
+    if not tokens or tokens[0][0] != 'word':
+        return type_text.strip().upper()
+    return column_type(tokens, 0)[0]
+
+
+def parse_column(tokens):
+    """
+    从单个定义项的词法单元中提取字段名、类型、长度、是否可为空和注释
+    :param tokens: split_definitions 产出的定义项
+    :return: 字段对象，非字段定义返回 None
+    """
+    if len(tokens) < 2:
+        return None
+
+    kind, text = tokens[0]
+    if kind == 'word' and text.upper() in skip_keywords:
+        return None
+    if kind not in ('word', 'ident', 'string') or tokens[1][0] != 'word':
+        return None
+
+    name = clean_quoted_identifier(text)
+    data_type, index = column_type(tokens, 1)
+
+    nullable = 'YES'  # 默认可为空
+    comment = ''
+    while index < len(tokens):
+        kind, text = tokens[index]
+        index += 1
+        if kind != 'word':
+            continue
+        keyword = text.upper()
+        if keyword == 'NOT' and index < len(tokens) and tokens[index][1].upper() == 'NULL':
+            nullable = 'NO'
+            index += 1
+        elif keyword == 'NULL':
+            nullable = 'YES'
+        elif keyword == 'DEFAULT':
+            index += 1  # 跳过默认值，避免 DEFAULT NULL 被当作可为空标识
+        elif keyword == 'COMMENT' and index < len(tokens) and tokens[index][0] == 'string':
+            comment = unquote_string(tokens[index][1])
+            index += 1
+
+    return Column(name, data_type, nullable, comment)
+
+
 def parse_fields(create_definition):
     """
     从 CREATE TABLE 语句的列定义部分解析字段信息
-    支持无换行符的连续字段定义
+    单次扫描，正确处理括号嵌套、引号和连续字段定义，耗时与定义长度成线性关系
     :param create_definition: CREATE TABLE 语句中的列定义部分
     :return: 字段对象列表
     """
     if not create_definition:
         return []
 
-    # 改进的字段定义正则表达式，处理连续字段定义
-    field_pattern = re.compile(
-        r"`?(?P<name>[^`\s,]+)`?"  # 字段名（可能被反引号包裹）
-        r"\s+"
-        r"(?P<type>\w+)"  # 字段类型
-        r"(?:\s*\(\s*(?P<length>[^)]+)\s*\))?"  # 长度/精度（可选）
-        r"(?:\s+(?P<nullable>NOT\s+NULL|NULL))?"  # 是否可为空（可选）
-        r".*?"  # 其他字段属性
-        r"(?:COMMENT\s+'(?P<comment>(?:''|[^'])*)')?"  # 字段注释（可选）
-        r"(?=,|$)",  # 前瞻断言，确保匹配到下一个字段或结束
-        re.IGNORECASE | re.DOTALL
-    )
-
     fields = []
-    pos = 0
+    for tokens in split_definitions(create_definition):
+        field = parse_column(tokens)
+        if field is not None:
+            fields.append(field)
+    return fields
 
-    # 跳过主键、索引等定义行
-    skip_pattern = re.compile(
-        r"^\s*(PRIMARY\s+KEY|KEY|CONSTRAINT|UNIQUE|INDEX|FOREIGN\s+KEY|CHECK)\b",
-        re.IGNORECASE
-    )
 
-    # 处理连续字段定义
-    while pos < len(create_definition):
-        # 检查是否跳过非字段行
-        if skip_pattern.match(create_definition[pos:]):
-            # 找到下一个逗号或结束位置
-            next_comma = create_definition.find(",", pos)
-            if next_comma == -1:
-                break
-            pos = next_comma + 1
-            continue
-
-        # 尝试匹配字段定义
-        field_match = field_pattern.search(create_definition, pos)
-        if not field_match:
-            # 如果没有匹配，移动到下一个逗号
-            next_comma = create_definition.find(",", pos)
-            if next_comma == -1:
-                break
-            pos = next_comma + 1
-            continue
+# 按列定义缓存的字段列表数量上限，超出时先进先出（分库分表的同构表通常连续出现）
+SHAPE_CACHE_SIZE = 4096
 
-        # 提取字段信息
-        name = field_match.group('name')
-        if name.startswith('`') and name.endswith('`'):
-            name = name[1:-1]
 
-        data_type = field_match.group('type').upper()
+def parse_shape(create_definition, shapes):
+    """
+    解析列定义，列定义相同的表（如分表 order_000…order_255）只解析一次并共享同一字段列表
+    :param create_definition: 去掉换行的列定义部分，本身即作为结构指纹
+    :param shapes: {列定义: 字段列表} 缓存字典，None 表示不缓存
+    :return: 字段对象列表，共享时不应修改
+    """
+    if shapes is None:
+        return parse_fields(create_definition)
+    fields = shapes.get(create_definition)
+    if fields is None:
+        fields = parse_fields(create_definition)
+        if len(shapes) >= SHAPE_CACHE_SIZE:
+            del shapes[next(iter(shapes))]
+        shapes[create_definition] = fields
+    return fields
 
-        if field_match.group('length'):
-            data_type += f"({field_match.group('length').strip()})"
 
-        nullable = 'YES'  # 默认可为空
-        if field_match.group('nullable'):
-            nullable = 'NO' if 'NOT NULL' in field_match.group('nullable').upper() else 'YES'
+def parse_create_table(create_content, keep_source=False, shapes=None):
+    """
+    解析 SQL 内容，提取表结构信息
+    :param create_content: CREATE TABLE 语句的内容
+    :param keep_source: 是否保留语句原文，保留时可通过 table['create_definition'] 等访问原始片段
+    :param shapes: 结构缓存字典，见 parse_shape
+    :return: 包含表结构信息的对象
+    """
+    parts = split_create_table(create_content)
+    if parts is None:
+        return None
+    return Table(parts['table_name'], parts['table_comment'],
+                 timed('parse_fields', parse_shape, parts['create_definition'], shapes),
+                 parts['temporary'], parts['if_not_exists'], parts['ignore_replace'],
+                 create_content if keep_source else None)
 
-        comment = field_match.group('comment') or ''
-        if comment:
-            comment = comment.replace("''", "'")
 
-        fields.append({
-            'name': name,
-            'type': data_type,
-            'nullable': nullable,
-            'comment': comment
-        })
+# 列定义括号匹配时需要处理的内容：字符串（以任一引号开始和结束，反斜杠转义下一个字符）、字符串外的转义和括号
+definition_paren = re.compile(r"""['"](?:[^'"\\]++|\\.)*+['"]?|\\.?|[()]""", re.DOTALL)
 
-        # 移动到匹配结束位置
-        pos = field_match.end()
+# 列定义中的字符串或字符串外的换行
+definition_line_break = re.compile(r"""('(?:[^'\\]|\\.|'')*+'|"(?:[^"\\]|\\.|"")*+")|[\r\n]+""")
 
-        # 跳过逗号（如果有）
-        if pos < len(create_definition) and create_definition[pos] == ',':
-            pos += 1
 
-    return fields
+def join_definition_lines(create_definition):
+    """
+    合并列定义中的多行：字符串外的换行替换为空格（NOT 与 NULL 分在两行时仍是两个单词），
+    字符串（注释、默认值）中的换行删除
+    """
+    if '\n' not in create_definition and '\r' not in create_definition:
+        return create_definition
+    return definition_line_break.sub(
+        lambda match: match.group(1).replace('\n', '').replace('\r', '') if match.group(1) else ' ', create_definition)
 
 
-def parse_create_table(create_content):
+def split_create_table(create_content):
     """
-    解析 SQL 内容，提取表结构信息
+    将 CREATE TABLE 语句拆分为各组成部分（不解析字段）
     :param create_content: CREATE TABLE 语句的内容
-    :return: 包含表结构信息的对象
+    :return: 各组成部分的原文，无法识别时返回 None
     """
 
     # 1. 提取 CREATE [TEMPORARY] TABLE [IF NOT EXISTS]
@@ -188,34 +318,23 @@ def parse_create_table(create_content):
     # 3. 提取列定义 [(create_definition,...)]
     create_definition = ''
     if remaining.startswith('('):
-        # 使用括号匹配处理嵌套结构
+        # 使用括号匹配处理嵌套结构，只逐个处理字符串、转义和括号
         level = 0
-        in_string = False
-        escape_next = False
-        end_index = 0
-
-        for i, char in enumerate(remaining):
-            if escape_next:
-                escape_next = False
-                continue
-
-            if char == '\\':
-                escape_next = True
-            elif char in ('"', "'"):
-                in_string = not in_string
-            elif not in_string:
-                if char == '(':
-                    level += 1
-                elif char == ')':
-                    level -= 1
-                    if level == 0:
-                        end_index = i
-                        break
-
-        if level != 0:
+        end_index = None
+        for match in definition_paren.finditer(remaining):
+            char = match.group()
+            if char == '(':
+                level += 1
+            elif char == ')':
+                level -= 1
+                if level == 0:
+                    end_index = match.start()
+                    break
+
+        if end_index is None:
             return None  # 括号不匹配
 
-        create_definition = remaining[1:end_index].strip().replace('\n', '').replace('\r', '')
+        create_definition = join_definition_lines(remaining[1:end_index].strip())
         remaining = remaining[end_index + 1:].strip()
 
     # 4. 提取表选项 [table_options]
@@ -223,7 +342,8 @@ def parse_create_table(create_content):
     table_options = ''
     if remaining and not re.match(r'(?:PARTITION|IGNORE|REPLACE|AS)\b', remaining, re.IGNORECASE):
         options_match = re.search(
-            r'^(.*?)(?=(?:\s+PARTITION\s+|\s+IGNORE\s+|\s+REPLACE\s+|\s+AS\s+|\s*;|$))',
+            r'^((?:\'(?:[^\'\\]|\\.)*\'|"(?:[^"\\]|\\.)*"|[^\'"])*?)'  # 引号内的分号、关键字不作为结束
+            r'(?=(?:\s+PARTITION\s+|\s+IGNORE\s+|\s+REPLACE\s+|\s+AS\s+|\s*;|$))',
             remaining,
             re.DOTALL | re.IGNORECASE
         )
@@ -267,311 +387,847 @@ def parse_create_table(create_content):
         'table_options': table_options,
         'partition_options': partition_options,
         'ignore_replace': ignore_replace,
-        'as_clause': as_clause,
-        'fields': parse_fields(create_definition)
+        'as_clause': as_clause
     }
 
 
-def parse_sql(sql_content):
+# 流式读取 SQL 文件时每次读取的字符数
+SQL_CHUNK_SIZE = 1 << 20
+
+# 判断语句是否为 CREATE TABLE 所需的最少开头字符数
+STATEMENT_HEAD_SIZE = 64
+
+# CREATE TABLE 语句开头
+create_table_head = re.compile(r'CREATE\s+(?:TEMPORARY\s+)?TABLE\s', re.IGNORECASE)
+
+# 代码中需要关注的字符：分号、引号、注释起始符、可执行注释结束符
+code_special = re.compile(r"[;'\"`#/\-]")
+versioned_special = re.compile(r"[;'\"`#/\-*]")
+# 代码中可以整段跳过的内容：普通字符和完整的字符串/引号标识符（占有量词避免回溯）
+code_run = re.compile(r"""(?:[^;'"`#/\-]++|'(?:[^'\\]++|\\.)*+'|"(?:[^"\\]++|\\.)*+"|`[^`]*+`"""
+                      r"""|-(?=[^-])|/(?=[^*]))*+""", re.DOTALL)
+versioned_run = re.compile(r"""(?:[^;'"`#/\-*]++|'(?:[^'\\]++|\\.)*+'|"(?:[^"\\]++|\\.)*+"|`[^`]*+`"""
+                           r"""|-(?=[^-])|/(?=[^*])|\*(?=[^/]))*+""", re.DOTALL)
+# 字符串及引号标识符中需要关注的字符
+quote_special = {
+    "'": re.compile(r"['\\]"),
+    '"': re.compile(r'["\\]'),
+    '`': re.compile(r'`'),
+}
+
+
+def iter_create_statements(reader, chunk_size=SQL_CHUNK_SIZE):
+    """
+    流式切分 SQL 内容，逐条产出 CREATE TABLE 语句
+    按固定大小分块读取，跟踪字符串、转义和注释，只有代码中的分号才结束语句；
+    非 CREATE TABLE 语句（如 INSERT）只扫描不保留，内存占用取决于最大的建表语句
+    :param reader: 文本读取对象（支持 read(size)）
+    :param chunk_size: 每次读取的字符数
+    :return: CREATE TABLE 语句生成器（已去除注释，以分号结尾）
+    """
+    buf = reader.read(chunk_size)
+    eof = not buf
+    pos = 0
+
+    state = ''  # '' 代码，引号字符表示字符串/标识符内，'--' 行注释，'/*' 块注释
+    versioned = False  # 是否处于 /*!...*/ 可执行注释中（其内容按代码处理）
+    parts = []  # 当前语句已保留的文本片段
+    size = 0  # 当前语句已保留的字符数
+    keep = None  # 当前语句是否保留：None 未确定，True 保留，False 丢弃
+
+    while True:
+        # 查找下一个需要处理的字符
+        if state == '':
+            # 普通字符和完整的字符串整段处理
+            end = (versioned_run if versioned else code_run).match(buf, pos).end()
+            if end > pos:
+                if keep is not False:
+                    parts.append(buf[pos:end])
+                    size += end - pos
+                pos = end
+            match = (versioned_special if versioned else code_special).search(buf, pos)
+        elif state == '--':
+            index = buf.find('\n', pos)
+            match = None if index == -1 else index
+        elif state == '/*':
+            index = buf.find('*/', pos)
+            match = None if index == -1 else index
+        else:
+            match = quote_special[state].search(buf, pos)
+
+        if match is None:
+            # 当前块已处理完，保留文本后读取下一块
+            end = len(buf)
+            if state == '/*' and buf.endswith('*'):
+                end -= 1  # 保留可能被切断的 */
+            if keep is not False and state not in ('--', '/*'):
+                parts.append(buf[pos:end])
+                size += end - pos
+            buf = buf[end:]
+            pos = 0
+            chunk = '' if eof else reader.read(chunk_size)
+            if chunk:
+                buf += chunk
+            else:
+                eof = True
+                break
+        else:
+            index = match if isinstance(match, int) else match.start()
+            # 需要前瞻字符（注释起始符、可执行注释版本号）时，若位于块末尾则先补充读取
+            if index + 9 > len(buf) and not eof:
+                chunk = reader.read(chunk_size)
+                if chunk:
+                    buf = buf[pos:] + chunk
+                    pos = 0
+                    continue
+                eof = True
+
+            char = buf[index]
+            if state in ('--', '/*'):
+                # 注释结束，以空格代替注释内容
+                pos = index + (1 if state == '--' else 2)
+                state = ''
+                if keep is not False:
+                    parts.append(' ')
+                    size += 1
+                continue
+
+            if keep is not False:
+                parts.append(buf[pos:index])
+                size += index - pos
+            pos = index + 1
+
+            if state:
+                # 字符串/引号标识符内
+                if keep is not False:
+                    parts.append(buf[index:index + 2] if char == '\\' else char)
+                    size += 2 if char == '\\' else 1
+                if char == '\\':
+                    pos = index + 2  # 跳过被转义的字符
+                else:
+                    state = ''
+            elif char in ('\'', '"', '`'):
+                state = char
+                if keep is not False:
+                    parts.append(char)
+                    size += 1
+            elif char == '#' or (char == '-' and buf.startswith('--', index)
+                                 and (index + 2 >= len(buf) or buf[index + 2] in ' \t\r\n')):
+                state = '--'
+            elif char == '/' and buf.startswith('/*', index):
+                if buf.startswith('/*!', index):
+                    # 可执行注释：跳过版本号，内容按代码处理
+                    pos = index + 3
+                    while pos < len(buf) and buf[pos].isdigit():
+                        pos += 1
+                    versioned = True
+                else:
+                    state = '/*'
+                    pos = index + 2
+            elif char == '*' and buf.startswith('*/', index):
+                versioned = False
+                pos = index + 2
+            elif char == ';':
+                # 语句结束
+                if keep is not False:
+                    statement = ''.join(parts).strip()
+                    if statement and (keep or create_table_head.match(statement)):
+                        yield statement + ';'
+                parts = []
+                size = 0
+                keep = None
+            else:
+                if keep is not False:
+                    parts.append(char)
+                    size += 1
+
+        # 开头足够长时判断是否为 CREATE TABLE，非建表语句不再保留文本
+        if keep is None and size >= STATEMENT_HEAD_SIZE:
+            head = ''.join(parts).lstrip()
+            parts = [head]
+            size = len(head)
+            if size >= STATEMENT_HEAD_SIZE:
+                keep = bool(create_table_head.match(head))
+                if not keep:
+                    parts = []
+
+    # 处理末尾没有分号的语句
+    if keep is not False:
+        statement = ''.join(parts).strip()
+        if statement and create_table_head.match(statement):
+            yield statement
+
+
+# 并行解析时每批发送给子进程的语句数
+PARSE_BATCH_SIZE = 256
+
+# 语句数少于该值时不启动进程池，直接串行解析
+PARALLEL_MIN_STATEMENTS = 1024
+
+
+def parse_statement_batch(statements):
+    """
+    在子进程中解析一批 CREATE TABLE 语句
+    :param statements: CREATE TABLE 语句列表
+    :return: (进程号, 解析耗时, 表结构信息列表)
+    """
+    start = time.perf_counter()
+    # 批内同构的表共享字段列表，序列化时也只传输一份
+    shapes = {}
+    tables = [parse_create_table(statement, shapes=shapes) for statement in statements]
+    return os.getpid(), time.perf_counter() - start, tables
+
+
+def iter_tables(sql_content, workers=None, stats=None):
+    """
+    逐条解析 SQL 内容中的 CREATE TABLE 语句
+    workers 大于 1 时按批发送到进程池并行解析，结果保持原有顺序；语句较少时自动回退为串行
+    :param sql_content: SQL 文件的内容或文本读取对象
+    :param workers: 并行解析的进程数，None 或 1 表示串行
+    :param stats: 可选字典，用于接收各进程的解析统计 {进程号: {'tables': 表数, 'seconds': 耗时}}
+    :return: 表结构信息生成器
+    """
+    reader = io.StringIO(sql_content) if isinstance(sql_content, str) else sql_content
+    # 注册了钩子时记录读取和切分耗时，否则不做任何包装
+    if hooks:
+        statements = timed_iter('split', iter_create_statements(timed_reader(reader)))
+    else:
+        statements = iter_create_statements(reader)
+    return iter_statement_tables(statements, workers, stats)
+
+
+def iter_sql_file_statements(sql_path):
+    """
+    读取 SQL 文件中的 CREATE TABLE 语句：以内存映射方式在字节上跳过数据语句，只解码建表语句；
+    gzip / bz2 / xz 压缩的文件按文件头识别，流式解压后切分
+    :param sql_path: SQL 文件的路径
+    :return: CREATE TABLE 语句生成器
+    """
+    from MappedInput import iter_mapped_statements
+    statements = iter_mapped_statements(sql_path)
+    return timed_iter('split', statements) if hooks else statements
+
+
+def iter_sql_file_tables(sql_path, workers=None, stats=None):
+    """
+    逐条解析 SQL 文件中的 CREATE TABLE 语句，参数含义同 iter_tables
+    :param sql_path: SQL 文件的路径
+    :return: 表结构信息生成器
+    """
+    return iter_statement_tables(iter_sql_file_statements(sql_path), workers, stats)
+
+
+def iter_statement_tables(statements, workers=None, stats=None):
+    """
+    逐条解析 CREATE TABLE 语句，参数含义同 iter_tables
+    :param statements: CREATE TABLE 语句迭代器
+    :return: 表结构信息生成器
+    """
+    # 注册了钩子时记录解析耗时和计数
+    parse = parse_create_table_instrumented if hooks else parse_create_table
+
+    if workers and workers > 1:
+        # 预读一部分语句，数量不足时回退为串行
+        head = list(itertools.islice(statements, PARALLEL_MIN_STATEMENTS))
+        if len(head) == PARALLEL_MIN_STATEMENTS:
+            yield from iter_tables_parallel(itertools.chain(head, statements), workers, stats)
+            return
+        statements = iter(head)
+
+    shapes = {}
+    for statement in statements:
+        table = parse(statement, shapes=shapes)
+        if table is not None:
+            yield table
+
+
+def parse_create_table_instrumented(statement, shapes=None):
+    """解析 CREATE TABLE 语句，并向钩子发送解析耗时和表、字段计数"""
+    start = begin_phase()
+    table = parse_create_table(statement, shapes=shapes)
+    seconds = end_phase('parse', start)
+    if table is not None:
+        emit('table', name=table['table_name'], phase='parse', seconds=seconds)
+        emit('count', name='tables', value=1)
+        emit('count', name='fields', value=len(table['fields']))
+    return table
+
+
+def iter_tables_parallel(statements, workers, stats=None):
+    """
+    使用进程池并行解析 CREATE TABLE 语句，按提交顺序产出结果
+    同时在途的批次数有上限，内存占用不随语句总数增长
+    :param statements: CREATE TABLE 语句迭代器
+    :param workers: 进程数
+    :param stats: 可选字典，用于接收各进程的解析统计
+    :return: 表结构信息生成器
+    """
+    from WorkerPool import iter_pool
+
+    worker_stats = {} if stats is None else stats
+    batches = iter(lambda: list(itertools.islice(statements, PARSE_BATCH_SIZE)), [])
+    for pid, seconds, tables in iter_pool(parse_statement_batch, ((batch,) for batch in batches), workers):
+        item = worker_stats.setdefault(pid, {'tables': 0, 'seconds': 0.0})
+        item['tables'] += len(tables)
+        item['seconds'] += seconds
+        if hooks:
+            # 子进程中的解析耗时（与主进程并行，不计入主进程阶段）
+            emit('phase', name='parse_workers', seconds=seconds, total=seconds)
+            emit('count', name='tables', value=sum(table is not None for table in tables))
+            emit('count', name='fields', value=sum(len(table['fields']) for table in tables if table))
+        for table in tables:
+            if table is not None:
+                yield table
+
+    for pid, item in worker_stats.items():
+        rate = item['tables'] / item['seconds'] if item['seconds'] else 0
+        logger.info("解析进程 %s：%d 张表，%.3f 秒，%.0f 表/秒", pid, item['tables'], item['seconds'], rate)
+
+
+def parse_sql(sql_content, workers=None, stats=None):
     """
     解析 SQL 内容，提取表列表信息
-    :param sql_content: SQL 文件的内容
+    :param sql_content: SQL 文件的内容或文本读取对象
+    :param workers: 并行解析的进程数，None 或 1 表示串行
+    :param stats: 可选字典，用于接收各进程的解析统计
     :return: 包含表结构信息的列表
     """
+    return list(iter_tables(sql_content, workers, stats))
+
+
+# 由样式配置生成的命名样式：段落样式（标题、内容、表格标题、表格文字）、字符样式（表头加粗）和表格样式（边框）
+STYLE_NAMES = {
+    'head': 'Sql2Doc Heading',
+    'content': 'Sql2Doc Content',
+    'title': 'Sql2Doc Caption',
+    'table': 'Sql2Doc Table Text',
+    'header': 'Sql2Doc Table Header',
+    'tbl': 'Sql2Doc Table',
+}
+
+
+def style_id(name):
+    """命名样式的样式 ID（与 python-docx 生成规则一致，去除空格）"""
+    return name.replace(' ', '')
+
 
-    # 切分 SQL 获得 CREATE TABLE 语句
-    table_pattern = re.compile(
-        r'CREATE\s+(?:TEMPORARY\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?'
-        r'(?:'
-        r'`(?:[^`]|``)+`'  # 匹配反引号表名 (允许内部转义反引号)
-        r"|'(?:[^']|'')+'"  # 匹配单引号表名 (允许内部转义单引号)
-        r'|\w+(?:\.\w+)*'  # 匹配无引号表名 (允许 db.table 格式)
-        r')'
-        r'\s*.*?;',  # 匹配表定义直到分号结束
-        re.DOTALL | re.IGNORECASE
+def heading_base_style(level):
+    """标题样式所基于的内置样式名称"""
+    return 'Title' if level == 0 else f'Heading {level}'
+
+
+def table_borders(table_style):
+    """
+    表格样式的边框定义：三线表只保留上下外框线和表头下框线，全线表分别设置外框线和内部线
+    :param table_style: 表格样式信息
+    :return: (表格边框, 表头行边框)，表头行无需单独设置时为 None
+    """
+    style = table_style.get('style', {})
+    border_color = style.get('border_color', (0, 0, 0))
+    hex_border_color = "{:02X}{:02X}{:02X}".format(border_color[0], border_color[1], border_color[2])
+    outer = {'val': 'single', 'sz': style['outer_border'], 'color': hex_border_color}
+    inner = {'val': 'single', 'sz': style['inner_border'], 'color': hex_border_color}
+    none = {'val': 'none', 'sz': 0, 'color': hex_border_color}
+
+    if style['table_type'] == 1:  # 三线表
+        return {'top': outer, 'left': none, 'bottom': outer, 'right': none, 'insideH': none, 'insideV': none}, \
+            {'bottom': inner}
+    # 全线表
+    return {'top': outer, 'left': outer, 'bottom': outer, 'right': outer, 'insideH': inner, 'insideV': inner}, None
+
+
+def borders_xml(tag, borders):
+    """生成边框元素（w:tblBorders / w:tcBorders）"""
+    edges = ''.join(
+        '<w:{}{}/>'.format(edge, ''.join(f' w:{key}="{value}"' for key, value in edge_data.items()))
+        for edge, edge_data in borders.items()
     )
+    return f'<w:{tag}>{edges}</w:{tag}>'
+
 
-    tables = []
-    # 获取全部 CREATE TABLE 语句 - 存储为 list
-    for table in table_pattern.findall(sql_content):
-        tables.append(parse_create_table(table))
-    return tables
+def table_style_xml(table_style):
+    """
+    生成命名表格样式 w:style，表格边框和表头下框线（firstRow 条件格式）只定义一次
+    :param table_style: 表格样式信息
+    :return: w:style 字符串
+    """
+    name = STYLE_NAMES['tbl']
+    borders, header_borders = table_borders(table_style)
+    first_row = ''
+    if header_borders:
+        first_row = (f'<w:tblStylePr w:type="firstRow"><w:tcPr>{borders_xml("tcBorders", header_borders)}'
+                     f'</w:tcPr></w:tblStylePr>')
+    return (f'<w:style w:type="table" w:customStyle="1" w:styleId="{style_id(name)}"><w:name w:val="{name}"/>'
+            f'<w:tblPr>{borders_xml("tblBorders", borders)}</w:tblPr>{first_row}</w:style>')
 
 
-def set_paragraph_style(paragraph, style_info, default_info):
+def set_named_style(style, style_info, default_info):
     """
-    设置段落样式，支持样式部分不同或为空
-    :param paragraph: 段落对象
+    将样式信息写入命名段落样式，未配置的项取默认样式
+    :param style: 段落样式对象
     :param style_info: 样式信息
     :param default_info: 默认样式信息
     """
-    # 获取对齐方式，若样式信息中没有则使用默认值
-    align = style_info.get('align', default_info['align'])
-    # 获取行间距，若样式信息中没有则使用默认值
-    line_spacing = style_info.get('line_spacing', default_info['line_spacing'])
-    # 获取段前间距，若样式信息中没有则使用默认值
-    space_before = style_info.get('space_before', default_info['space_before'])
-    # 获取段后间距，若样式信息中没有则使用默认值
-    space_after = style_info.get('space_after', default_info['space_after'])
-    # 获取字体，若样式信息中没有则使用默认值
-    font = style_info.get('font', default_info['font'])
-    # 获取字号，若样式信息中没有则使用默认值
+    from docx.enum.text import WD_LINE_SPACING
+    from docx.oxml.ns import qn
+    from docx.shared import Pt
+
     size = style_info.get('size', default_info['size'])
-    # 获取字体颜色，若样式信息中没有则使用默认值
-    color = style_info.get('color', default_info['color'])
-    # 获取中文字体，若样式信息中没有则使用默认值
-    font_cn = style_info.get('font-CN', default_info['font-CN'])
-    # 获取首行缩进，若样式信息中没有则使用默认值
-    first_line_indent = style_info.get('first_line_indent', default_info['first_line_indent'])
-
-    # 设置段落对齐方式
-    paragraph.alignment = align
-    # 设置段前间距
-    paragraph.paragraph_format.space_before = space_before
-    # 设置段后间距
-    paragraph.paragraph_format.space_after = space_after
-    # 设置首行缩进
-    paragraph.paragraph_format.first_line_indent = Pt(size * first_line_indent)
-
-    # 遍历段落中的每个运行对象，设置字体、字号、颜色和中文字体
-    for run in paragraph.runs:
-        run.font.name = font
-        run.font.size = Pt(size)
-        run.font.color.rgb = color
-        run.element.rPr.rFonts.set(qn('w:eastAsia'), font_cn)
+    line_spacing = style_info.get('line_spacing', default_info['line_spacing'])
 
+    paragraph_format = style.paragraph_format
+    paragraph_format.alignment = style_info.get('align', default_info['align'])
+    paragraph_format.space_before = style_info.get('space_before', default_info['space_before'])
+    paragraph_format.space_after = style_info.get('space_after', default_info['space_after'])
+    paragraph_format.first_line_indent = Pt(size * style_info.get('first_line_indent',
+                                                                  default_info['first_line_indent']))
     # 判断行间距是固定值还是倍数
     if isinstance(line_spacing, Pt):
-        # 固定值行间距
-        paragraph.paragraph_format.line_spacing_rule = WD_LINE_SPACING.EXACTLY
-        paragraph.paragraph_format.line_spacing = line_spacing
+        paragraph_format.line_spacing_rule = WD_LINE_SPACING.EXACTLY
     else:
-        # 倍数行间距
-        paragraph.paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
-        paragraph.paragraph_format.line_spacing = line_spacing
-
-
-def set_cell_border(cell, **kwargs):
-    """
-    设置单元格边框
-    :param cell: 单元格对象
-    :param kwargs: 边框设置参数
-    """
-    # 从单元格对象中获取底层的 XML 元素
-    tc = cell._tc
-    # 获取单元格的属性元素，如果不存在则创建一个新的
-    tcPr = tc.get_or_add_tcPr()
-    # 获取单元格的边框元素，如果不存在则创建一个新的
-    tcBorders = tcPr.first_child_found_in("w:tcBorders") or OxmlElement('w:tcBorders')
-    tcPr.append(tcBorders)
-
-    # 定义需要设置边框的四个方向
-    for edge, edge_data in kwargs.items():
-        if edge in ('start', 'end', 'top', 'bottom'):
-            # 构建当前边框方向的 XML 标签名
-            tag = qn(f'w:{edge}')
-            # 在 tcBorders 中查找当前边框元素，如果不存在则创建一个新的
-            element = tcBorders.find(tag) or OxmlElement(f'w:{edge}')
-            # 遍历当前边框方向的设置参数，将其应用到边框元素上
-            for key, value in edge_data.items():
-                element.set(qn(f'w:{key}'), str(value))
-            # 如果当前边框元素不在 tcBorders 中，则将其添加进去
-            if element not in tcBorders:
-                tcBorders.append(element)
+        paragraph_format.line_spacing_rule = WD_LINE_SPACING.MULTIPLE
+    paragraph_format.line_spacing = line_spacing
+
+    style.font.name = style_info.get('font', default_info['font'])
+    style.font.size = Pt(size)
+    style.font.color.rgb = style_info.get('color', default_info['color'])
+    style.element.rPr.rFonts.set(qn('w:eastAsia'), style_info.get('font-CN', default_info['font-CN']))
+
+
+def add_named_styles(doc, default_style, head_style, content_style, title_style, table_style):
+    """
+    将样式配置编译为文档中的命名样式，段落和单元格只引用样式 ID
+    :param doc: 文档对象
+    :return: {样式键: 样式对象}
+    """
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    styles = {}
+    for key, style_config in (('head', head_style), ('content', content_style), ('title', title_style),
+                              ('table', table_style)):
+        style = doc.styles.add_style(STYLE_NAMES[key], WD_STYLE_TYPE.PARAGRAPH)
+        if key == 'head':
+            style.base_style = doc.styles[heading_base_style(head_style['style']['level'])]
+        style.quick_style = True
+        set_named_style(style, style_config.get('style', {}), default_style)
+        styles[key] = style
+
+    # 表头加粗使用字符样式
+    styles['header'] = doc.styles.add_style(STYLE_NAMES['header'], WD_STYLE_TYPE.CHARACTER)
+    styles['header'].font.bold = True
+
+    # 表格边框使用表格样式
+    doc.styles.element.append(parse_xml(f'<w:styles {nsdecls("w")}>{table_style_xml(table_style)}</w:styles>')[0])
+    styles['tbl'] = doc.styles[STYLE_NAMES['tbl']]
+    return styles
+
+
+# 长度单位 EMU（与 docx.shared.Cm 一致，此处不导入 python-docx）
+EMU_PER_CM = 360000
+
+# 纸张大小（A4）
+PAGE_WIDTH = 21 * EMU_PER_CM
+PAGE_HEIGHT = round(29.7 * EMU_PER_CM)
+
+# 表格表头及列宽
+TABLE_HEADERS = ['字段名', '类型', '允许空', '说明']
+TABLE_WIDTHS = [round(cm * EMU_PER_CM) for cm in (4, 3.2, 2.4, 5)]
+
+
+def table_numbers(index, basic_num):
+    """
+    生成单张表的章节标题编号和表格编号
+    :param index: 表序号（从 0 开始）
+    :param basic_num: 基本编号信息，可选的 table_offset 为之前已编号的表数（分片输出时编号跨文档连续），
+                      可选的 table_positions 为各表在完整文档中的序号（只生成选中的表时保持原有编号）
+    :return: (标题编号, 表格编号)，如 ('1', '1-1')
+    """
+    positions = basic_num.get('table_positions')
+    if positions is not None:
+        index = positions[index]
+    index += basic_num.get('table_offset', 0)
+    return f"{index + 1}", f"{basic_num['chapter_num']}-{index + basic_num['start_table_num']}"
+
+
+def table_texts(table_data, index, basic_num, numbers=None):
+    """
+    生成单张表的标题、内容段落和表格标题文本
+    :param table_data: 表结构信息
+    :param index: 表序号（从 0 开始）
+    :param basic_num: 基本编号信息
+    :param numbers: 可选的 (标题编号, 表格编号)，默认由 index 计算
+    :return: {'heading': 标题, 'content': 内容段落, 'title': 表格标题}；
+             结构去重合并的表（见 ShapeDedup）在表格标题中注明表数，在内容段落末尾列出全部成员表名
+    """
+    name = table_data['table_name']
+    members = table_data.get('members')
+    comment = table_data['table_comment'] if table_data['table_comment'] else ''
+    fields = table_data['fields']
+    attribute_num = basic_num['attribute_num']
+
+    comment_content = ""
+    if comment:
+        comment_content = "、".join(field['comment'] for field in fields[:attribute_num])
+        if attribute_num < len(fields):
+            comment_content += "等"
+        comment_content += f"共{len(fields)}个属性"
+
+    heading_num, table_num = numbers or table_numbers(index, basic_num)
+    content = f"{comment}表用于存储{comment}信息，包含{comment_content}。{comment}表如表{table_num}所示。"
+    if members:
+        content += f"结构相同的表共{len(members)}张：{'、'.join(members)}。"
+        name = f"{name}等{len(members)}张表"
+    return {
+        'heading': f"{heading_num} {comment}表",
+        'content': content,
+        'title': f"表{table_num} {comment}表({name})",
+    }
+
+
+# 单元格文字 w:t 的标签
+TEXT_TAG = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t'
+# 可以直接写入行原型 w:t 的文字：非空、首尾无空白且不含制表符和换行（其余按 python-docx 的规则写入）
+plain_cell_text = re.compile(r'\S(?:[^\t\n\r]*\S)?')
+
+
+def table_prototypes(doc, table_style, table_style_id, header_style_id):
+    """
+    用 python-docx 构建一次带表头的表格和一行数据行，之后每张表、每个字段复制原型，不再逐个单元格设置
+    :param doc: 文档对象
+    :param table_style: 表格样式对象
+    :param table_style_id: 表格文字段落样式 ID
+    :param header_style_id: 表头字符样式 ID
+    :return: (表格原型 w:tbl, 数据行原型 w:tr)，均不在文档中
+    """
+    from docx.enum.table import WD_CELL_VERTICAL_ALIGNMENT
+
+    table = doc.add_table(rows=1, cols=len(TABLE_HEADERS))
+    # 自动调整列宽
+    table.autofit = False
+    table.style = table_style
+
+    # 设置列宽（新增行的单元格宽度取自列宽）
+    for i, width in enumerate(TABLE_WIDTHS):
+        table.columns[i].width = width
+
+    # 设置表头
+    for i, cell in enumerate(table.rows[0].cells):
+        cell.text = TABLE_HEADERS[i]
+        cell.width = TABLE_WIDTHS[i]
+        cell.vertical_alignment = WD_CELL_VERTICAL_ALIGNMENT.CENTER
+        cell.paragraphs[0]._p.style = table_style_id
+
+        for run in cell.paragraphs[0].runs:
+            run._r.style = header_style_id  # 加粗
+
+    # 数据行：文字、样式和垂直居中，文字在复制后替换
+    for cell in table.add_row().cells:
+        cell.text = TABLE_HEADERS[0]
+        cell.vertical_alignment = WD_CELL_VERTICAL_ALIGNMENT.CENTER
+        cell.paragraphs[0]._p.style = table_style_id
+
+    tbl = table._tbl
+    tbl.getparent().remove(tbl)
+    row = tbl.tr_lst[-1]
+    tbl.remove(row)
+    return tbl, row
+
+
+def set_cell_text(text_element, value):
+    """
+    写入行原型中单元格的文字
+    :param text_element: 原型中的 w:t 元素
+    :param value: 文字，含换行、制表符或首尾空白时由 w:r 按 python-docx 的规则重建内容
+    """
+    if plain_cell_text.fullmatch(value):
+        text_element.text = value
+    else:
+        text_element.getparent().text = value
+
+
+def zip_compression(compresslevel):
+    """
+    docx 压缩包的压缩方式
+    :param compresslevel: 0 不压缩（stored，最快、文件最大），1-9 为 deflate 级别（1 最快，9 最小），
+                          None 使用 zlib 默认级别（6）
+    :return: (zipfile 压缩方式, 压缩级别)
+    """
+    import zipfile
+    if compresslevel is None:
+        return zipfile.ZIP_DEFLATED, None
+    if not 0 <= compresslevel <= 9:
+        raise ValueError(f"压缩级别应为 0-9：{compresslevel}")
+    if compresslevel == 0:
+        return zipfile.ZIP_STORED, None
+    return zipfile.ZIP_DEFLATED, compresslevel
+
+
+def save_document(doc, output, compresslevel=None):
+    """
+    保存 python-docx 文档
+    doc.save 固定使用默认压缩级别，指定其他级别时先保存到内存，再按该级别重新写入各部件，
+    因此只改变文件大小，不减少保存耗时（需要更快的保存时使用 stream 方式）
+    :param doc: 文档对象
+    :param output: 输出文档的路径或可写的二进制文件对象（BytesIO、标准输出、套接字等，不需要可定位，不会被关闭）
+    :param compresslevel: 压缩级别，见 zip_compression
+    """
+    if compresslevel is None:
+        doc.save(output)
+        return
+    import zipfile
+
+    compression, level = zip_compression(compresslevel)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    with zipfile.ZipFile(buffer) as saved, \
+            zipfile.ZipFile(output, 'w', compression=compression, compresslevel=level) as package:
+        for item in saved.infolist():
+            package.writestr(item, saved.read(item), compress_type=compression, compresslevel=level)
 
 
 def generate_word_doc(tables, output_path, default_style, head_style, content_style, title_style, table_style,
-                      basic_num):
+                      basic_num, compresslevel=None):
     """
     根据表结构信息生成 docx 文档
     :param tables: 包含表结构信息的列表
-    :param output_path: 输出文档的路径
+    :param output_path: 输出文档的路径或可写的二进制文件对象
+    :param default_style: 默认样式信息
+    :param head_style: 标题样式信息
+    :param content_style: 内容样式信息
+    :param title_style: 表格标题样式信息
+    :param table_style: 表格样式信息
+    :param basic_num: 基本编号信息
+    :param compresslevel: 压缩级别，见 zip_compression
+    """
+    doc = build_word_doc(tables, default_style, head_style, content_style, title_style, table_style, basic_num)
+    # 保存文档
+    timed('save', save_document, doc, output_path, compresslevel)
+
+
+def build_word_doc(tables, default_style, head_style, content_style, title_style, table_style, basic_num):
+    """
+    根据表结构信息构建 python-docx 文档对象（不保存）
+    :param tables: 包含表结构信息的列表
     :param default_style: 默认样式信息
     :param head_style: 标题样式信息
     :param content_style: 内容样式信息
     :param title_style: 表格标题样式信息
     :param table_style: 表格样式信息
     :param basic_num: 基本编号信息
+    :return: 文档对象
     """
+    from docx import Document
+
     # 创建文档对象
     doc = Document()
 
     # 设置纸张大小
     section = doc.sections[0]
-    section.page_width = Cm(21)
-    section.page_height = Cm(29.7)
+    section.page_width = PAGE_WIDTH
+    section.page_height = PAGE_HEIGHT
+
+    # 样式配置只编译一次为命名样式
+    styles = timed('styles', add_named_styles, doc, default_style, head_style, content_style, title_style,
+                   table_style)
+    # 段落和单元格直接写入样式 ID，避免每次按样式对象在样式表中查找
+    paragraph_style_ids = {key: styles[key].style_id for key in ('head', 'content', 'title')}
+    table_style_id = styles['table'].style_id
+    header_style_id = styles['header'].style_id
+    prototypes = None
+    # 同构表共享字段列表（见 parse_shape）时直接复制已填充的表格，{id(字段列表): (字段列表, 表格)}
+    filled = {}
 
     # 遍历表结构信息
     for index, table_data in enumerate(tables):
-
-        length = len(table_data)
-
-        name = table_data['table_name']
-
-        comment = table_data['table_comment'] if table_data['table_comment'] else ''
-        attribute_num = basic_num['attribute_num']
-        comment_content = ""
-        if table_data['table_comment']:
-            text = ""
-            if attribute_num < length:
-                text = "等"
-            for row_idx, field in enumerate(table_data['fields'][:attribute_num]):
-                comment_content += field['comment']
-                if row_idx != attribute_num - 1:
-                    comment_content += "、"
-            comment_content += text + f"共{length}个属性"
-
-        chapter_num = basic_num['chapter_num']
-        start_table_num = basic_num['start_table_num']
+        if hooks:
+            start = begin_phase()
+        texts = table_texts(table_data, index, basic_num)
 
         # 添加标题
         if head_style['add']:
-            heading = doc.add_heading(f"{index + 1} {comment}表", head_style['style']['level'])
-            set_paragraph_style(heading, head_style.get('style', {}), default_style)
+            doc.add_paragraph(texts['heading'])._p.style = paragraph_style_ids['head']
 
         # 添加内容
         if content_style['add']:
-            content = doc.add_paragraph(
-                f"{comment}表用于存储{comment}信息，包含{comment_content}。{comment}表如表{chapter_num}-{index + start_table_num}所示。")
-            set_paragraph_style(content, content_style.get('style', {}), default_style)
+            doc.add_paragraph(texts['content'])._p.style = paragraph_style_ids['content']
 
         # 添加表格标题
         if title_style['add']:
-            title = doc.add_paragraph(f"表{chapter_num}-{index + start_table_num} {comment}表({name})")
-            set_paragraph_style(title, title_style.get('style', {}), default_style)
-
-        # 添加表格
-        table = doc.add_table(rows=1, cols=4)
-        # 自动调整列宽
-        table.autofit = False
-
-        table_type = table_style['style']['table_type']
-        border_color = table_style.get('style', {}).get('border_color', RGBColor(0, 0, 0))
-        hex_border_color = "{:02X}{:02X}{:02X}".format(border_color[0], border_color[1], border_color[2])
-        outer_border = table_style['style']['outer_border']
-        inner_border = table_style['style']['inner_border']
-
-        # 获取表格第一行的单元格
-        hdr_cells = table.rows[0].cells
-        # 定义表头
-        headers = ['字段名', '类型', '允许空', '说明']
-
-        # 设置表头
-        for i, header in enumerate(headers):
-            hdr_cells[i].text = header
-            set_paragraph_style(hdr_cells[i].paragraphs[0], table_style.get('style', {}), default_style)
-
-            for run in hdr_cells[i].paragraphs[0].runs:
-                run.bold = True  # 加粗
-
-            # 设置表头边框
-            if table_type == 1:  # 三线表
-                borders = {
-                    'top': {'val': 'single', 'sz': outer_border, 'color': hex_border_color},
-                    'bottom': {'val': 'single', 'sz': inner_border, 'color': hex_border_color},
-                }
-            else:  # 全线表
-                borders = {
-                    'top': {'val': 'single', 'sz': outer_border, 'color': hex_border_color},
-                    'bottom': {'val': 'single', 'sz': inner_border, 'color': hex_border_color},
-                    'start': {'val': 'single', 'sz': outer_border if i == 0 else inner_border,
-                              'color': hex_border_color},
-                    'end': {'val': 'single', 'sz': outer_border if i == 3 else inner_border, 'color': hex_border_color}
-                }
-            set_cell_border(hdr_cells[i], **borders)
-
-        # 填充数据
-        for row_idx, field in enumerate(table_data['fields']):
-            # 添加表格
-            row = table.add_row().cells
-            # 填充字段名
-            row[0].text = field['name']
-            # 填充字段类型
-            row[1].text = field['type']
-            # 填充字段是否允许为空
-            row[2].text = field['nullable']
-            # 填充字段注释
-            row[3].text = field['comment']
-
-            # 设置单元格样式
-            for cell in row:
-                # 设置单元格段落的对齐方式
-                set_paragraph_style(cell.paragraphs[0], table_style.get('style', {}), default_style)
-
-                # 设置单元格边框
-                if table_type == 1:  # 三线表
-                    if row_idx + 1 == len(table_data['fields']):
-                        borders = {
-                            'bottom': {'val': 'single', 'sz': outer_border, 'color': hex_border_color},
-                        }
-                    else:
-                        borders = {
-                            'top': {'val': 'none', 'sz': 0, 'color': hex_border_color},
-                            'bottom': {'val': 'none', 'sz': 0, 'color': hex_border_color},
-                            'start': {'val': 'none', 'sz': 0, 'color': hex_border_color},
-                            'end': {'val': 'none', 'sz': 0, 'color': hex_border_color}
-                        }
-                else:  # 全线表
-                    borders = {
-                        'top': {'val': 'single', 'sz': inner_border, 'color': hex_border_color},
-                        'bottom': {'val': 'single',
-                                   'sz': outer_border if row_idx + 1 == len(table_data['fields']) else inner_border,
-                                   'color': hex_border_color},
-                        'start': {'val': 'single', 'sz': outer_border if cell == row[0] else inner_border,
-                                  'color': hex_border_color},
-                        'end': {'val': 'single', 'sz': outer_border if cell == row[-1] else inner_border,
-                                'color': hex_border_color}
-                    }
-                set_cell_border(cell, **borders)
-
-        # 设置列宽
-        widths = [Cm(4), Cm(3.2), Cm(2.4), Cm(5)]
-        for i in range(len(widths)):
-            table.columns[i].width = widths[i]
-            # 为整列设置垂直居中（确保所有单元格都居中）
-            for cell in table.columns[i].cells:
-                tc = cell._tc
-                tcPr = tc.get_or_add_tcPr()
-                vAlign = OxmlElement('w:vAlign')
-                vAlign.set(qn('w:val'), "center")  # 垂直居中
-                tcPr.append(vAlign)
+            doc.add_paragraph(texts['title'])._p.style = paragraph_style_ids['title']
+
+        fields = table_data['fields']
+        cached = filled.get(id(fields))
+        if cached is not None and cached[0] is fields:
+            doc.element.body._insert_tbl(copy.deepcopy(cached[1]))
+        else:
+            # 添加表格：复制带表头的表格原型，边框由表格样式统一定义
+            if prototypes is None:
+                prototypes = table_prototypes(doc, styles['tbl'], table_style_id, header_style_id)
+            table_prototype, row_prototype = prototypes
+            table = copy.deepcopy(table_prototype)
+            doc.element.body._insert_tbl(table)
+
+            # 填充数据：复制已设置样式、宽度和垂直居中的行原型，只替换文字
+            for field in fields:
+                row = copy.deepcopy(row_prototype)
+                for text_element, value in zip(row.iter(TEXT_TAG), (field['name'], field['type'], field['nullable'],
+                                                                    field['comment'])):
+                    set_cell_text(text_element, value)
+                table.append(row)
+            filled[id(fields)] = (fields, table)
 
         # 表格间是否空行
         if basic_num['blank']:
             doc.add_paragraph()
 
-    # 保存文档
-    doc.save(output_path)
+        if hooks:
+            seconds = end_phase('render', start)
+            emit('table', name=table_data['table_name'], phase='render', seconds=seconds)
+            emit('count', name='cells', value=(len(table_data['fields']) + 1) * len(TABLE_HEADERS))
 
+    return doc
 
-def sql_to_word(sql_path, output_path, default_style, head_style, content_style, title_style, table_style, basic_num):
+
+def sql_to_word(sql_path, output_path, default_style, head_style, content_style, title_style, table_style, basic_num,
+                workers=None, renderer='docx', cache_dir=None, cache_size=None, dedup='reuse', select=None,
+                compresslevel=None):
     """
     读取 SQL 文件信息，生成 Word 文档
     :param sql_path: SQL 文件的路径
-    :param output_path: 输出 Word 文档的路径
+    :param output_path: 输出 Word 文档的路径，或可写的二进制文件对象（BytesIO、标准输出、套接字等，文本格式也可为文本文件对象）
     :param default_style: 默认样式信息
     :param head_style: 标题样式信息
     :param content_style: 内容样式信息
     :param title_style: 表格标题样式信息
     :param table_style: 表格样式信息
     :param basic_num: 基本编号信息
+    :param workers: 并行解析的进程数，None 或 1 表示串行；renderer 为 'parallel' 时同时为渲染进程数（None 为 CPU 数）
+    :param renderer: 文档生成方式，见 select_renderer
+    :param cache_dir: 渲染缓存目录，renderer 为 'stream' 时复用未变化表的 XML 片段（此时忽略 workers），
+                      其他生成方式不使用缓存
+    :param cache_size: 渲染缓存容量上限（字节），None 使用默认值
+    :param dedup: 结构相同的表的处理方式，'reuse' 每张表照常输出并复用已生成的表格，
+                  'shared' 只输出一次并列出全部成员表名（此时不使用渲染缓存），见 ShapeDedup
+    :param select: 只生成选中的表 {'names': 表名列表, 'patterns': LIKE 模式列表, 'path': 索引文件路径}，
+                   通过 SQL 文件旁的索引直接读取对应语句，编号与完整文档相同，见 SchemaIndex
+    :param compresslevel: Word 文档的压缩级别，见 zip_compression，文本格式忽略
     """
     # 检查 SQL 文件是否存在
     if not os.path.exists(sql_path):
         raise FileNotFoundError(f"SQL文件不存在：{sql_path}")
-    # 读取 SQL 文件内容
-    with open(sql_path, 'r', encoding='utf-8') as f:
-        sql_content = f.read()
-    # 生成 Word 文档
-    generate_word_doc(parse_sql(sql_content), output_path, default_style, head_style, content_style, title_style,
-                      table_style, basic_num)
 
+    timed('sql_to_word', convert_sql_file, sql_path, output_path, default_style, head_style, content_style,
+          title_style, table_style, basic_num, workers, renderer, cache_dir, cache_size, dedup, select, compresslevel)
+    if hooks:
+        emit('count', name='bytes_read', value=os.path.getsize(sql_path))
+        if not hasattr(output_path, 'write'):
+            emit('count', name='bytes_written', value=os.path.getsize(output_path))
+
+
+def convert_sql_file(sql_path, output_path, default_style, head_style, content_style, title_style, table_style,
+                     basic_num, workers, renderer, cache_dir, cache_size, dedup, select, compresslevel=None):
+    """sql_to_word 的实际转换过程，参数含义同 sql_to_word"""
+    if select:
+        # 按索引只读取选中的语句，编号按各表在完整文档中的位置（结构去重合并后按合并结果依次编号）
+        from SchemaIndex import select_statements
+        positions, statements = select_statements(sql_path, **select)
+        if dedup != 'shared':
+            basic_num = dict(basic_num, table_positions=positions)
+    else:
+        statements = iter_sql_file_statements(sql_path)
+
+    # 缓存的是 stream 方式的 XML 片段，其他生成方式（包括 python-docx）照常生成
+    if cache_dir and renderer == 'stream' and dedup != 'shared':
+        from RenderCache import generate_word_doc_cached
+        stats = generate_word_doc_cached(statements, output_path, default_style, head_style,
+                                         content_style, title_style, table_style, basic_num, cache_dir, cache_size,
+                                         compresslevel)
+        logger.info("渲染缓存：命中 %d 张表，重新渲染 %d 张表，淘汰 %d 个片段",
+                    stats['hits'], stats['misses'], stats['evicted'])
+        return
+
+    generate = select_renderer(renderer, compresslevel)
+    if renderer == 'parallel':
+        # 渲染进程数与解析进程数相同，未指定时为 CPU 数
+        generate = functools.partial(generate, workers=workers)
+    # 内存映射读取 SQL 文件，只解码建表语句，边解析边生成文档
+    tables = iter_statement_tables(statements, workers)
+    if dedup == 'shared':
+        from ShapeDedup import iter_shared_tables
+        tables = iter_shared_tables(tables)
+    generate(tables, output_path, default_style, head_style, content_style, title_style, table_style, basic_num)
+
+
+# 文档生成方式及对应的输出文件扩展名
+RENDERER_EXTENSIONS = {'docx': '.docx', 'stream': '.docx', 'parallel': '.docx', 'markdown': '.md', 'html': '.html',
+                       'csv': '.csv'}
+# 生成 Word 文档（docx 压缩包）的方式
+WORD_RENDERERS = ('docx', 'stream', 'parallel')
+# 命令行中表示标准输出的输出路径
+STDOUT_PATH = '-'
+# 按输出文件扩展名推断文本格式
+EXTENSION_RENDERERS = {'.md': 'markdown', '.markdown': 'markdown', '.html': 'html', '.htm': 'html', '.csv': 'csv'}
+
+
+def select_renderer(renderer, compresslevel=None):
+    """
+    根据文档生成方式选择生成函数
+    :param renderer: 'docx' 使用 python-docx，'stream' 流式写入 document.xml，
+                     'parallel' 多进程渲染后按顺序写入 document.xml（与 stream 结果相同），
+                     'markdown' / 'html' / 'csv' 逐表写入文本文件
+    :param compresslevel: Word 文档的压缩级别，见 zip_compression，文本格式忽略
+    :return: 与 generate_word_doc 参数一致的生成函数
+    """
+    if compresslevel is not None and renderer in WORD_RENDERERS:
+        return functools.partial(select_renderer(renderer), compresslevel=compresslevel)
+    if renderer == 'stream':
+        from DocxStream import generate_word_doc_stream
+        return generate_word_doc_stream
+    if renderer == 'parallel':
+        from DocxStream import generate_word_doc_parallel
+        return generate_word_doc_parallel
+    if renderer in ('markdown', 'html', 'csv'):
+        import TextRender
+        return getattr(TextRender, f'generate_{renderer}')
+    if renderer == 'docx':
+        return generate_word_doc
+    raise ValueError(f"不支持的文档生成方式：{renderer}")
+
+
+def renderer_for_path(output_path, default='stream'):
+    """根据输出文件扩展名选择文档生成方式，.md / .html / .csv 为文本格式，其他为 Word 文档"""
+    return EXTENSION_RENDERERS.get(os.path.splitext(output_path)[1].lower(), default)
+
+
+def schema_to_word(connection, output_path, default_style, head_style, content_style, title_style, table_style,
+                   basic_num, renderer='docx', dialect=None, schema=None, compresslevel=None):
+    """
+    通过数据库连接直接读取表结构信息，生成 Word 文档
+    :param connection: DB-API 连接（sqlite3 或 MySQL 驱动）
+    :param output_path: 输出 Word 文档的路径或已打开的文件对象
+    :param renderer: 文档生成方式，见 select_renderer
+    :param dialect: 'sqlite' 或 'mysql'，默认根据连接类型判断
+    :param schema: 数据库名（仅 MySQL），默认为连接的当前数据库
+    :param compresslevel: Word 文档的压缩级别，见 zip_compression
+    """
+    from SchemaSource import iter_schema_tables
+    generate = select_renderer(renderer, compresslevel)
+    generate(iter_schema_tables(connection, dialect, schema), output_path, default_style, head_style, content_style,
+             title_style, table_style, basic_num)
 
-if __name__ == "__main__":
-    sql_to_word(
-        sql_path='input.sql',
-        output_path='output.docx',
-        default_style={
+
+def default_config():
+    """
+    默认的样式与编号配置
+    :return: sql_to_word 的样式与编号参数
+    """
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor
+
+    return {
+        'default_style': {
             'font': 'Times New Roman',
             'font-CN': '宋体',
             'size': 12,  # 小四
@@ -582,7 +1238,7 @@ if __name__ == "__main__":
             'space_after': 0,
             'first_line_indent': 0,
         },
-        head_style={
+        'head_style': {
             'add': True,
             'style': {
                 'level': 1,
@@ -591,13 +1247,13 @@ if __name__ == "__main__":
                 'line_spacing': 1.5,  # 1.5倍行距
             }
         },
-        content_style={
+        'content_style': {
             'add': True,
             'style': {
                 'first_line_indent': 2,  # 首行缩进2字符
             }
         },
-        title_style={
+        'title_style': {
             'add': True,
             'style': {
                 'font-CN': '黑体',
@@ -605,7 +1261,7 @@ if __name__ == "__main__":
                 'align': WD_ALIGN_PARAGRAPH.CENTER,  # 居中对齐
             }
         },
-        table_style={
+        'table_style': {
             'add': True,
             'style': {
                 'size': 10.5,
@@ -617,10 +1273,260 @@ if __name__ == "__main__":
                 'table_type': 1,  # 1-三线表 2-全线表
             }
         },
-        basic_num={
+        'basic_num': {
             'blank': False,  # 是否空行
             'chapter_num': 1,  # 章节编号
             'start_table_num': 1,  # 表格开始标号
             'attribute_num': 3  # 文本属性数量
-        }
-    )
+        },
+    }
+
+
+# 配置文件中需要转换类型的样式项
+COLOR_KEYS = ('color', 'border_color')
+LENGTH_KEYS = ('line_spacing', 'space_before', 'space_after')
+
+
+def style_value(key, value):
+    """
+    将配置文件（JSON）中的样式取值转换为样式信息使用的类型
+    颜色为 "RRGGBB" 或 [R, G, B]；对齐方式为 WD_ALIGN_PARAGRAPH 的成员名，如 "CENTER"；
+    长度可写作 "22pt" / "0.5cm"，行间距为数字时表示倍数
+    """
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.shared import Pt, RGBColor, Cm
+
+    if key in COLOR_KEYS:
+        return RGBColor.from_string(value) if isinstance(value, str) else RGBColor(*value)
+    if key == 'align' and isinstance(value, str):
+        return WD_ALIGN_PARAGRAPH[value.upper()]
+    if key in LENGTH_KEYS and isinstance(value, str):
+        number, unit = re.fullmatch(r'\s*([\d.]+)\s*(pt|cm)\s*', value, re.IGNORECASE).groups()
+        return Pt(float(number)) if unit.lower() == 'pt' else Cm(float(number))
+    return value
+
+
+def load_config(config_path=None):
+    """
+    读取配置文件并与默认配置合并，配置文件中只需写出与默认值不同的项
+    :param config_path: JSON 配置文件路径，键为 default_style / head_style / content_style / title_style /
+                        table_style / basic_num，None 表示使用默认配置
+    :return: sql_to_word 的样式与编号参数
+    """
+    return merge_config(*load_overrides(config_path))
+
+
+def load_overrides(config_path=None):
+    """
+    读取配置文件中的配置项，不与默认配置合并（可序列化，用于传给工作进程）
+    :param config_path: JSON 配置文件路径，None 表示使用默认配置
+    :return: merge_config 的配置项字典列表
+    """
+    if config_path is None:
+        return []
+    with open(config_path, 'r', encoding='utf-8') as f:
+        return [json.load(f)]
+
+
+def merge_config(*overrides):
+    """
+    将 JSON 形式的配置项依次与默认配置合并，格式同配置文件
+    :param overrides: 配置项字典，后面的覆盖前面的
+    :return: sql_to_word 的样式与编号参数
+    """
+    config = default_config()
+    for items_by_name in overrides:
+        unknown = set(items_by_name) - set(config)
+        if unknown:
+            raise ValueError(f"配置文件中有未知的配置项：{'、'.join(sorted(unknown))}")
+
+        for name, items in items_by_name.items():
+            for key, value in items.items():
+                if key == 'style':
+                    config[name]['style'].update({k: style_value(k, v) for k, v in value.items()})
+                else:
+                    config[name][key] = style_value(key, value)
+    return config
+
+
+def main(argv=None):
+    """
+    命令行入口
+    :param argv: 命令行参数，默认取 sys.argv
+    :return: 退出码，--validate 发现缺少注释时为 1
+    """
+    parser = argparse.ArgumentParser(description='根据 SQL 建表语句生成数据库设计 Word 文档')
+    parser.add_argument('sql_path', nargs='?', help='SQL 文件的路径，默认 input.sql；可为 gzip / bz2 / xz 压缩文件（如 .sql.gz）')
+    parser.add_argument('output_path', nargs='?',
+                        help='输出文档的路径，默认 output.docx；扩展名为 .md / .html / .csv 时输出对应的文本格式；'
+                             '- 表示写入标准输出（文本格式需指定 --renderer）')
+    parser.add_argument('--config', help='JSON 样式配置文件，只需写出与默认值不同的项')
+    parser.add_argument('--renderer', choices=tuple(RENDERER_EXTENSIONS),
+                        help='文档生成方式，默认按输出文件扩展名选择，Word 文档使用 stream')
+    parser.add_argument('--compress-level', type=int, choices=range(10), metavar='0-9',
+                        help='Word 文档的压缩级别：0 不压缩（最快、文件最大），1-9 为 deflate 级别（1 最快，9 文件最小），默认 6；'
+                             'docx 方式只改变文件大小，不减少保存耗时')
+    parser.add_argument('--workers', type=int, default=None, help='并行解析的进程数（分片输出时为并行生成分片的进程数）')
+    parser.add_argument('--cache-dir', default='.sql2doc_cache', help='渲染缓存目录（只用于 stream 方式）')
+    parser.add_argument('--cache-size', type=int, default=None, help='渲染缓存容量上限（MB）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用渲染缓存')
+    parser.add_argument('--sqlite', metavar='DB_PATH', help='从 SQLite 数据库读取表结构，代替 SQL 文件')
+    parser.add_argument('--watch', action='store_true', help='常驻运行，SQL 文件变化时重新生成文档')
+    parser.add_argument('--diff-from', metavar='OLD_SQL', help='与旧 SQL 文件比较，只为新增、删除和修改过的表生成文档')
+    parser.add_argument('--shard-tables', type=int, metavar='N', help='分片输出：每个文档最多 N 张表')
+    parser.add_argument('--shard-rows', type=int, metavar='N', help='分片输出：每个文档的表格最多 N 行（字段数加表头）')
+    parser.add_argument('--shard-by', choices=('prefix', 'schema'),
+                        help='分片输出：按表名前缀（第一个下划线之前）或库名（db.table）分组，可与数量上限同时使用')
+    parser.add_argument('--dedup', choices=('reuse', 'shared'), default='reuse',
+                        help='结构相同的表（如分表）：reuse 每张表照常输出并复用已生成的表格，shared 只输出一次并列出全部成员表名')
+    parser.add_argument('--tables', action='append', metavar='NAMES',
+                        help='只生成指定的表（逗号分隔，可多次指定），通过 SQL 文件旁的索引直接读取，编号与完整文档相同')
+    parser.add_argument('--tables-like', action='append', metavar='PATTERN',
+                        help="只生成表名匹配 SQL LIKE 模式的表（如 'order\\_%%'，可多次指定），可与 --tables 同时使用")
+    parser.add_argument('--index', metavar='INDEX_PATH', help='表索引文件路径，默认为 SQL 文件路径加 .index.sqlite')
+    check = parser.add_mutually_exclusive_group()
+    check.add_argument('--stats', action='store_true',
+                       help='只解析 SQL 文件，输出表数量、各表字段数和缺少注释的表与字段（JSON，输出路径默认为标准输出）')
+    check.add_argument('--validate', action='store_true', help='同 --stats，有缺少注释的表或字段时退出码为 1')
+    parser.add_argument('--profile', metavar='REPORT', help='输出各阶段耗时、计数和最慢表的 JSON 报告')
+    parser.add_argument('--slowest', type=int, default=10, help='报告中列出的最慢表数量')
+    parser.add_argument('--cprofile', metavar='STATS', help='输出 cProfile 统计文件（可用 pstats 查看）')
+    args = parser.parse_args(argv)
+    # 从数据库读取时唯一的位置参数为输出路径
+    if args.sqlite and args.output_path:
+        parser.error('使用 --sqlite 时只需指定输出路径')
+    if args.sqlite and args.watch:
+        parser.error('--watch 只能监视 SQL 文件')
+    if args.diff_from and (args.sqlite or args.watch):
+        parser.error('--diff-from 只能比较两个 SQL 文件，不能与 --sqlite 或 --watch 同时使用')
+    if (args.stats or args.validate) and (args.sqlite or args.watch or args.diff_from):
+        parser.error('--stats / --validate 只检查单个 SQL 文件')
+    output_path = (args.sql_path if args.sqlite else args.output_path) or 'output.docx'
+    args.renderer = args.renderer or renderer_for_path(output_path)
+    args.shard = bool(args.shard_tables or args.shard_rows or args.shard_by)
+    if args.shard and (args.sqlite or args.watch or args.diff_from or args.stats or args.validate):
+        parser.error('分片输出只能用于单个 SQL 文件的完整文档')
+    if args.shard and args.renderer not in ('docx', 'stream'):
+        parser.error('分片输出只支持 Word 文档')
+    if args.dedup == 'shared' and (args.sqlite or args.watch or args.diff_from):
+        parser.error('--dedup shared 只能用于单个 SQL 文件')
+    if (args.tables or args.tables_like) and (args.sqlite or args.watch or args.diff_from or args.shard or args.stats
+                                              or args.validate):
+        parser.error('--tables / --tables-like 只能用于单个 SQL 文件的文档生成')
+    if args.watch and args.renderer != 'stream':
+        parser.error('--watch 只支持 stream 方式生成 Word 文档')
+    if output_path == STDOUT_PATH and (args.watch or args.shard):
+        parser.error('--watch 和分片输出需要输出到文件')
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    report = new_report()
+    hook = report_hook(report)
+    if args.profile:
+        add_hook(hook)
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if profiler:
+        profiler.enable()
+    try:
+        code = run_command(args)
+        # 输出到标准输出时在此刷新，读取端提前关闭的错误在下面处理
+        sys.stdout.flush()
+        return code
+    except BrokenPipeError:
+        # 标准输出的读取端已关闭（如 --stats | head）：不再输出，重定向到 devnull，避免退出时刷新缓冲区再次报错
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+        if args.profile:
+            remove_hook(hook)
+            with open(args.profile, 'w', encoding='utf-8') as f:
+                json.dump(summarize(report, args.slowest), f, ensure_ascii=False, indent=2)
+
+
+def table_selection(args):
+    """
+    命令行中的表选择条件
+    :return: select_statements 的参数，没有指定 --tables / --tables-like 时为 None
+    """
+    if not (args.tables or args.tables_like):
+        return None
+    names = [name.strip() for value in args.tables or [] for name in value.split(',') if name.strip()]
+    return {'names': names, 'patterns': args.tables_like or [], 'path': args.index}
+
+
+def output_target(output_path):
+    """命令行中的输出目标：STDOUT_PATH 为标准输出的二进制缓冲区（文本格式按 UTF-8 写入），其他为文件路径"""
+    return sys.stdout.buffer if output_path == STDOUT_PATH else output_path
+
+
+def run_command(args):
+    """
+    按命令行参数执行转换
+    :param args: 解析后的命令行参数
+    :return: 退出码
+    """
+    if args.stats or args.validate:
+        # 只解析不生成文档，不读取样式配置，也不加载 python-docx
+        from SchemaCheck import check_schema, has_missing_comments
+        report, text = check_schema(args.sql_path or 'input.sql', args.output_path, args.workers)
+        if not args.output_path:
+            print(text)
+        return 1 if args.validate and has_missing_comments(report) else 0
+
+    overrides = load_overrides(args.config)
+    config = merge_config(*overrides)
+    if args.sqlite:
+        import sqlite3
+        if not os.path.exists(args.sqlite):
+            raise FileNotFoundError(f"数据库文件不存在：{args.sqlite}")
+        connection = sqlite3.connect(args.sqlite)
+        try:
+            schema_to_word(connection, output_target(args.sql_path or 'output.docx'),
+                           renderer=args.renderer, compresslevel=args.compress_level, **config)
+        finally:
+            connection.close()
+        return 0
+
+    if args.diff_from:
+        from SchemaDiff import diff_to_word
+        diff_to_word(args.diff_from, args.sql_path or 'input.sql',
+                     output_target(args.output_path or 'output.docx'), renderer=args.renderer,
+                     compresslevel=args.compress_level, **config)
+        return 0
+
+    if args.watch:
+        # 监视模式在内存中保留各语句的渲染结果，不使用磁盘缓存
+        from Watch import watch
+        watch([args.sql_path or 'input.sql'], args.output_path or 'output.docx', **config)
+        return 0
+
+    if args.shard:
+        # 输出路径为索引文档，各分片在独立进程中生成，不使用渲染缓存
+        from Shard import shard_to_word
+        sql_path = args.sql_path or 'input.sql'
+        if not os.path.exists(sql_path):
+            raise FileNotFoundError(f"SQL文件不存在：{sql_path}")
+        tables = iter_sql_file_tables(sql_path)
+        if args.dedup == 'shared':
+            from ShapeDedup import iter_shared_tables
+            tables = iter_shared_tables(tables)
+        shard_to_word(tables, args.output_path or 'output.docx', max_tables=args.shard_tables,
+                      max_rows=args.shard_rows, group_by=args.shard_by, renderer=args.renderer, workers=args.workers,
+                      overrides=overrides)
+        return 0
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    cache_size = args.cache_size * 1024 * 1024 if args.cache_size else None
+    sql_to_word(args.sql_path or 'input.sql', output_target(args.output_path or 'output.docx'),
+                workers=args.workers, renderer=args.renderer, cache_dir=cache_dir, cache_size=cache_size,
+                dedup=args.dedup, select=table_selection(args), compresslevel=args.compress_level, **config)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
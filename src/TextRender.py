@@ -0,0 +1,122 @@
+import contextlib
+import csv
+import html
+import io
+
+from SqlToWord import TABLE_HEADERS, table_texts
+
+# HTML 表格线样式：1-三线表 2-全线表
+HTML_TABLE_CSS = {
+    1: 'table{border-collapse:collapse;border-top:1.5pt solid;border-bottom:1.5pt solid}'
+       'thead th{border-bottom:0.75pt solid}',
+    2: 'table{border-collapse:collapse;border:1.5pt solid}th,td{border:0.75pt solid}',
+}
+
+
+@contextlib.contextmanager
+def open_output(output, encoding='utf-8', newline=None):
+    """
+    打开输出目标，已打开的文件对象直接使用且不关闭
+    :param output: 输出文件路径、可写的文本文件对象，或二进制文件对象（BytesIO、标准输出缓冲区等，按文件相同的编码写入）
+    """
+    if isinstance(output, (io.RawIOBase, io.BufferedIOBase)):
+        f = io.TextIOWrapper(output, encoding=encoding, newline=newline)
+        try:
+            yield f
+        finally:
+            # 解除包装，不关闭原对象
+            f.flush()
+            f.detach()
+    elif hasattr(output, 'write'):
+        yield output
+    else:
+        with open(output, 'w', encoding=encoding, newline=newline) as f:
+            yield f
+
+
+def field_values(field):
+    """表格一行的四列取值"""
+    return field['name'], field['type'], field['nullable'], field['comment']
+
+
+def markdown_cell(text):
+    """转义 Markdown 表格单元格中的竖线和换行"""
+    return text.replace('\\', '\\\\').replace('|', '\\|').replace('\r\n', '<br>').replace('\n', '<br>')
+
+
+def generate_markdown(tables, output, default_style, head_style, content_style, title_style, table_style,
+                      basic_num):
+    """
+    根据表结构信息逐表生成 Markdown 文档，标题、说明、表格标题与 Word 文档一致
+    :param tables: 包含表结构信息的列表或迭代器
+    :param output: 输出文件路径或可写的文本文件对象
+    其余参数同 generate_word_doc（只使用其中的添加开关和标题级别）
+    """
+    heading_mark = '#' * max(head_style['style']['level'], 1)
+    with open_output(output) as f:
+        for index, table_data in enumerate(tables):
+            texts = table_texts(table_data, index, basic_num)
+            if head_style['add']:
+                f.write(f"{heading_mark} {texts['heading']}\n\n")
+            if content_style['add']:
+                f.write(f"{texts['content']}\n\n")
+            if title_style['add']:
+                f.write(f"**{texts['title']}**\n\n")
+
+            f.write('| ' + ' | '.join(TABLE_HEADERS) + ' |\n')
+            f.write('|' + '---|' * len(TABLE_HEADERS) + '\n')
+            for field in table_data['fields']:
+                f.write('| ' + ' | '.join(markdown_cell(value) for value in field_values(field)) + ' |\n')
+            f.write('\n')
+            if basic_num['blank']:
+                f.write('<br>\n\n')
+
+
+def generate_html(tables, output, default_style, head_style, content_style, title_style, table_style, basic_num):
+    """
+    根据表结构信息逐表生成 HTML 文档，标题、说明、表格标题与 Word 文档一致
+    :param tables: 包含表结构信息的列表或迭代器
+    :param output: 输出文件路径或可写的文本文件对象
+    其余参数同 generate_word_doc（只使用其中的添加开关、标题级别和表格类型）
+    """
+    level = min(max(head_style['style']['level'], 1), 6)
+    table_css = HTML_TABLE_CSS.get(table_style['style']['table_type'], HTML_TABLE_CSS[1])
+    header = ''.join(f'<th>{html.escape(text)}</th>' for text in TABLE_HEADERS)
+    with open_output(output) as f:
+        f.write('<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="utf-8">\n'
+                f'<style>{table_css}th,td{{padding:2pt 6pt}}.caption{{text-align:center;font-weight:bold}}</style>\n'
+                '</head>\n<body>\n')
+        for index, table_data in enumerate(tables):
+            texts = table_texts(table_data, index, basic_num)
+            if head_style['add']:
+                f.write(f"<h{level}>{html.escape(texts['heading'])}</h{level}>\n")
+            if content_style['add']:
+                f.write(f"<p>{html.escape(texts['content'])}</p>\n")
+            if title_style['add']:
+                f.write(f"<p class=\"caption\">{html.escape(texts['title'])}</p>\n")
+
+            f.write(f'<table>\n<thead><tr>{header}</tr></thead>\n<tbody>\n')
+            for field in table_data['fields']:
+                cells = ''.join(f'<td>{html.escape(value)}</td>' for value in field_values(field))
+                f.write(f'<tr>{cells}</tr>\n')
+            f.write('</tbody>\n</table>\n')
+            if basic_num['blank']:
+                f.write('<p></p>\n')
+        f.write('</body>\n</html>\n')
+
+
+def generate_csv(tables, output, default_style, head_style, content_style, title_style, table_style, basic_num):
+    """
+    根据表结构信息生成 CSV，每个字段一行，带有章节标题和表格标题便于对照 Word 文档
+    :param tables: 包含表结构信息的列表或迭代器
+    :param output: 输出文件路径或可写的文本文件对象（需以 newline='' 打开）
+    其余参数同 generate_word_doc（只使用其中的编号信息）
+    """
+    # 写入文件时带 BOM，Excel 打开中文不乱码
+    with open_output(output, encoding='utf-8-sig', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['标题', '表格标题', '表名'] + TABLE_HEADERS)
+        for index, table_data in enumerate(tables):
+            texts = table_texts(table_data, index, basic_num)
+            prefix = [texts['heading'], texts['title'], table_data['table_name']]
+            writer.writerows(prefix + list(field_values(field)) for field in table_data['fields'])
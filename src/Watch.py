@@ -0,0 +1,136 @@
+import logging
+import os
+import time
+
+from DocxStream import compile_styles, write_package
+from MappedInput import open_sql_file
+from RenderCache import iter_cached_fragments
+from SqlToWord import iter_create_statements
+
+logger = logging.getLogger(__name__)
+
+# 轮询文件修改时间的间隔（秒）
+POLL_INTERVAL = 0.5
+# 文件停止变化多久后才重新生成（秒），避免编辑器分多次写入时重复生成
+DEBOUNCE_SECONDS = 0.3
+# 监视模式优先生成速度，使用最低压缩级别（文件约大 25%，压缩耗时约为默认级别的 1/3）
+WATCH_COMPRESS_LEVEL = 1
+
+
+def file_signature(sql_paths):
+    """
+    获取文件的修改时间和大小，用于判断是否发生变化
+    :param sql_paths: SQL 文件路径列表
+    :return: 各文件的 (修改时间, 大小)，文件不存在时为 None
+    """
+    signature = []
+    for path in sql_paths:
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def iter_file_statements(sql_paths):
+    """按顺序读取多个 SQL 文件中的 CREATE TABLE 语句"""
+    for path in sql_paths:
+        with open_sql_file(path) as f:
+            yield from iter_create_statements(f)
+
+
+def replace_atomically(output_path, write):
+    """
+    先写入同目录下的临时文件再替换目标文件，打开中的文档不会读到写了一半的内容
+    :param output_path: 输出文档的路径
+    :param write: 以临时文件路径为参数的写入函数
+    """
+    directory, name = os.path.split(os.path.abspath(output_path))
+    temp_path = os.path.join(directory, f'.{name}.{os.getpid()}.tmp')
+    try:
+        write(temp_path)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def build(sql_paths, output_path, compiled, basic_num, fragments):
+    """
+    生成一次文档，只解析和渲染内容变化的语句
+    进程内样式配置不变，直接以语句原文作为键，省去规范化和哈希
+    :param fragments: 上次生成时各语句的 XML 片段 {语句: 片段}
+    :return: (本次的片段字典, 命中统计)
+    """
+    current = {}
+    stats = {'hits': 0, 'misses': 0}
+
+    def load(key):
+        fragment = fragments.get(key)
+        if fragment is not None:
+            current[key] = fragment
+        return fragment
+
+    table_fragments = iter_cached_fragments(iter_file_statements(sql_paths), compiled, basic_num, str, load,
+                                            current.__setitem__, stats)
+    replace_atomically(output_path,
+                       lambda temp_path: write_package(temp_path, compiled, table_fragments, WATCH_COMPRESS_LEVEL))
+    # 只保留本次用到的片段，已删除或修改前的语句不再占用内存
+    return current, stats
+
+
+def watch(sql_paths, output_path, default_style, head_style, content_style, title_style, table_style, basic_num,
+          interval=POLL_INTERVAL, debounce=DEBOUNCE_SECONDS, max_builds=None):
+    """
+    常驻进程，SQL 文件变化时重新生成 Word 文档
+    样式只编译一次，各语句的 XML 片段保存在内存中，每次只解析和渲染变化的语句
+    :param sql_paths: SQL 文件路径列表，按顺序合并为一个文档
+    :param output_path: 输出 Word 文档的路径
+    :param default_style: 默认样式信息
+    :param head_style: 标题样式信息
+    :param content_style: 内容样式信息
+    :param title_style: 表格标题样式信息
+    :param table_style: 表格样式信息
+    :param basic_num: 基本编号信息
+    :param interval: 轮询间隔（秒）
+    :param debounce: 文件停止变化多久后才重新生成（秒）
+    :param max_builds: 生成次数达到该值后返回，None 表示一直运行
+    """
+    compiled = compile_styles(default_style, head_style, content_style, title_style, table_style)
+    fragments = {}
+    built_signature = None
+    builds = 0
+
+    logger.info("监视 %s，按 Ctrl+C 退出", '、'.join(sql_paths))
+    try:
+        while max_builds is None or builds < max_builds:
+            signature = file_signature(sql_paths)
+            if signature == built_signature or None in signature:
+                time.sleep(interval)
+                continue
+
+            # 等待文件停止变化
+            time.sleep(debounce)
+            if file_signature(sql_paths) != signature:
+                continue
+
+            start = time.perf_counter()
+            try:
+                fragments, stats = build(sql_paths, output_path, compiled, basic_num, fragments)
+            except (OSError, UnicodeDecodeError) as e:
+                # 文件被占用或正在写入，等待下一次变化后重试
+                logger.warning("生成失败：%s", e)
+                built_signature = signature
+                continue
+            except Exception:
+                # 编辑到一半的文件（如写了一半的压缩文件）或生成出错都不退出，等待下一次变化后重试
+                logger.exception("生成失败")
+                built_signature = signature
+                continue
+            built_signature = signature
+            builds += 1
+            logger.info("已生成 %s：%d 张表，重新解析 %d 张，耗时 %.3f 秒", output_path,
+                        stats['hits'] + stats['misses'], stats['misses'], time.perf_counter() - start)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,73 @@
+import collections
+import itertools
+from concurrent.futures import ProcessPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+from SqlToWord import merge_config
+
+# 工作进程中的样式配置，进程启动时合并一次
+worker_config = {}
+
+
+def init_config_worker(overrides):
+    """
+    工作进程初始化，由 JSON 形式的配置项合并出样式配置
+    只传递配置项：合并后的样式中有 RGBColor 等不能序列化的对象，以 spawn 方式启动进程（Windows、macOS）时无法传递
+    :param overrides: 配置项字典列表，见 merge_config
+    """
+    worker_config.clear()
+    worker_config.update(merge_config(*overrides))
+
+
+def iter_pool(func, jobs, workers, initializer=None, initargs=(), on_error=None):
+    """
+    使用进程池执行任务，同时在途的任务数有上限（进程数的 2 倍），内存占用不随任务总数增长，按提交顺序产出结果
+    :param func: 任务函数，以 func(*job) 调用
+    :param jobs: 任务参数元组的迭代器
+    :param workers: 进程数，1 表示在当前进程中依次执行
+    :param initializer: 工作进程初始化函数，参数需可序列化
+    :param initargs: 初始化函数的参数
+    :param on_error: 任务失败（包括工作进程异常退出、进程池不可用）时以 on_error(job, 异常) 的返回值作为结果，
+                     None 表示抛出异常
+    :return: 任务结果生成器
+    """
+    jobs = iter(jobs)
+    if workers <= 1:
+        if initializer:
+            initializer(*initargs)
+        for job in jobs:
+            try:
+                result = func(*job)
+            except Exception as e:
+                if on_error is None:
+                    raise
+                result = on_error(job, e)
+            yield result
+        return
+
+    pending = collections.deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as executor:
+
+        def submit(job):
+            try:
+                future = executor.submit(func, *job)
+            except BrokenProcessPool as e:
+                # 进程池已不可用，之后的任务同样失败，按顺序交给 on_error
+                future = Future()
+                future.set_exception(e)
+            pending.append((job, future))
+
+        for job in itertools.islice(jobs, workers * 2):
+            submit(job)
+        while pending:
+            job, future = pending.popleft()
+            try:
+                result = future.result()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                result = on_error(job, e)
+            # 取出一个结果后补充提交下一个任务
+            for job in itertools.islice(jobs, 1):
+                submit(job)
+            yield result
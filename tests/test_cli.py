@@ -0,0 +1,20 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+def test_stats_to_closed_pipe_exits_quietly(tmp_path):
+    sql_path = tmp_path / 'schema.sql'
+    # 输出远大于管道缓冲区
+    sql_path.write_text(''.join(f'CREATE TABLE `t{i}` (`a` int, `b` int);\n' for i in range(20000)), encoding='utf-8')
+    process = subprocess.Popen([sys.executable, os.path.join(SRC, 'SqlToWord.py'), str(sql_path), '--stats'],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # 如 --stats | head -c 1：读到开头后关闭读取端
+    assert process.stdout.read(1) == b'{'
+    process.stdout.close()
+    stderr = process.stderr.read()
+    process.wait(30)
+    assert b'Traceback' not in stderr
+    assert process.returncode == 1
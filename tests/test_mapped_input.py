@@ -0,0 +1,78 @@
+import importlib
+import random
+
+import pytest
+
+import MappedInput
+from Benchmark import generate_dump
+from MappedInput import detect_compression, iter_mapped_statements, open_sql_file
+from SqlToWord import iter_create_statements
+
+# 随机拼接的片段：数据语句中的分号、引号、转义和注释起止符，以及穿插其间的建表语句
+PIECES = [
+    "CREATE TABLE `t{n}` (`id` int NOT NULL COMMENT 'a;b', `v` varchar(8) DEFAULT 'it''s') COMMENT='表{n}';\n",
+    "CREATE TABLE t{n} (\r\n  id int -- line; comment\r\n) COMMENT \"dq;\";\n",
+    "/*!40101 CREATE TABLE `v{n}` (`id` int) */;\n",
+    "INSERT INTO `t` VALUES (1,'x;y'),(2,'\\';'),(3,\"--;\"),(4,'/* ;'),(5,'#;');\n",
+    "INSERT INTO `t` VALUES ('CREATE TABLE `fake` (`id` int);');\n",
+    "INSERT INTO `t` VALUES (1,'" + 'x' * 300 + "'),(2,'a;\\nb');\n",
+    "/* comment; CREATE TABLE `fake` (`id` int); */\n",
+    "-- CREATE TABLE `fake` (`id` int);\n",
+    "# CREATE TABLE `fake` (`id` int);\n",
+    "SET @a = 'CREATE TABLE;';\n",
+    "DELIMITER ;;\nCREATE TRIGGER `g` BEFORE INSERT ON `t` FOR EACH ROW SET NEW.v = ';' ;;\nDELIMITER ;\n",
+    "LOCK TABLES `t` WRITE;\n",
+    "\n",
+]
+
+
+def random_dump(seed, pieces=200):
+    rng = random.Random(seed)
+    return ''.join(rng.choice(PIECES).format(n=i) for i in range(pieces))
+
+
+def text_statements(path):
+    with open_sql_file(str(path)) as f:
+        return list(iter_create_statements(f))
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    """缩小扫描的分块大小，使块边界落在各种位置"""
+    monkeypatch.setattr(MappedInput, 'DATA_BLOCK_SIZE', 256)
+    monkeypatch.setattr(MappedInput, 'SEARCH_BLOCK_MIN', 16)
+    monkeypatch.setattr(MappedInput, 'SEARCH_BLOCK_SIZE', 512)
+    monkeypatch.setattr(MappedInput, 'SPECIAL_SPACING', 32)
+    monkeypatch.setattr(MappedInput, 'STATEMENT_SPACING', 32)
+
+
+def test_benchmark_dump_matches_text_splitter(tmp_path):
+    path = tmp_path / 'dump.sql'
+    path.write_text(generate_dump(200, 10, inserts=3), encoding='utf-8')
+    statements = list(iter_mapped_statements(str(path)))
+    assert len(statements) == 200
+    assert statements == text_statements(path)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_random_dump_matches_text_splitter(tmp_path, small_blocks, seed):
+    path = tmp_path / 'dump.sql'
+    # 带 BOM，换行混用 \n 与 \r\n
+    path.write_bytes(b'\xef\xbb\xbf' + random_dump(seed).encode('utf-8'))
+    assert list(iter_mapped_statements(str(path))) == text_statements(path)
+
+
+@pytest.mark.parametrize('module, suffix', [('gzip', '.gz'), ('bz2', '.bz2'), ('lzma', '.xz')])
+def test_compressed_input_round_trip(tmp_path, module, suffix):
+    text = random_dump(0)
+    plain = tmp_path / 'dump.sql'
+    plain.write_text(text, encoding='utf-8')
+    compressed = tmp_path / f'dump.sql{suffix}'
+    compressed.write_bytes(importlib.import_module(module).compress(b'\xef\xbb\xbf' + text.encode('utf-8')))
+
+    assert detect_compression(str(compressed)) == module
+    assert detect_compression(str(plain)) is None
+    with open_sql_file(str(compressed)) as f:
+        # 去除 BOM、换行统一为 \n，与未压缩文件的文本方式读取相同
+        assert f.read() == plain.read_text(encoding='utf-8')
+    assert list(iter_mapped_statements(str(compressed))) == list(iter_mapped_statements(str(plain)))
@@ -0,0 +1,67 @@
+import io
+import time
+import zipfile
+
+import pytest
+
+import DocxStream
+import SqlToWord
+from Benchmark import generate_dump
+from DocxStream import generate_word_doc_parallel, generate_word_doc_stream
+from SqlToWord import iter_tables, merge_config
+from WorkerPool import iter_pool
+
+
+def slow_square(value, delay):
+    # 先提交的任务后完成，结果仍按提交顺序产出
+    time.sleep(delay)
+    if value < 0:
+        raise ValueError(value)
+    return value * value
+
+
+def jobs(count):
+    return [(value, 0.02 * (count - value) / count) for value in range(count)]
+
+
+@pytest.mark.parametrize('workers', [1, 3])
+def test_iter_pool_keeps_submission_order(workers):
+    # 任务数远多于在途上限（进程数的 2 倍）
+    assert list(iter_pool(slow_square, iter(jobs(20)), workers)) == [value * value for value in range(20)]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_iter_pool_reports_errors_in_place(workers):
+    items = [(1, 0), (-1, 0), (3, 0)]
+    results = list(iter_pool(slow_square, items, workers, on_error=lambda job, e: ('failed', job[0], str(e))))
+    assert results == [1, ('failed', -1, '-1'), 9]
+    with pytest.raises(ValueError):
+        list(iter_pool(slow_square, items, workers))
+
+
+def test_parallel_parse_matches_serial(monkeypatch):
+    # 缩小批次和回退阈值，使少量语句也经过多个批次的滑动窗口
+    monkeypatch.setattr(SqlToWord, 'PARSE_BATCH_SIZE', 7)
+    monkeypatch.setattr(SqlToWord, 'PARALLEL_MIN_STATEMENTS', 10)
+    sql = generate_dump(150, 5, inserts=1)
+    stats = {}
+    parallel = list(iter_tables(sql, workers=2, stats=stats))
+    serial = list(iter_tables(sql))
+    assert len(serial) == 150
+    assert parallel == serial
+    assert sum(item['tables'] for item in stats.values()) == 150
+
+
+def test_parallel_render_matches_stream(monkeypatch):
+    monkeypatch.setattr(DocxStream, 'RENDER_BATCH_SIZE', 4)
+    config = merge_config({'basic_num': {'chapter_num': 2, 'start_table_num': 3}})
+    tables = list(iter_tables(generate_dump(60, 5, inserts=0)))
+
+    outputs = []
+    for generate, options in ((generate_word_doc_stream, {}), (generate_word_doc_parallel, {'workers': 2})):
+        output = io.BytesIO()
+        generate(iter(tables), output, **config, **options)
+        outputs.append(zipfile.ZipFile(output).read('word/document.xml'))
+    assert outputs[0] == outputs[1]
+    # 编号连续：第一张表为 3，最后一张表为 62
+    assert '表2-3'.encode('utf-8') in outputs[1] and '表2-62'.encode('utf-8') in outputs[1]
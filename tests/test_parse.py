@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from SqlToWord import parse_create_table, parse_fields
+
+
+def fields_of(definition):
+    return [(field['name'], field['type'], field['nullable'], field['comment']) for field in parse_fields(definition)]
+
+
+def test_decimal_and_enum_commas():
+    assert fields_of("`price` DECIMAL(10,2) NOT NULL, `state` ENUM('a','b') DEFAULT 'a' COMMENT '状态'") == [
+        ('price', 'DECIMAL(10,2)', 'NO', ''),
+        ('state', "ENUM('a','b')", 'YES', '状态'),
+    ]
+
+
+def test_commas_in_comment_and_default_strings():
+    assert fields_of("`a` varchar(20) DEFAULT 'x,y' COMMENT '名称,别名', `b` int COMMENT 'it''s, \\'ok\\''") == [
+        ('a', 'VARCHAR(20)', 'YES', '名称,别名'),
+        ('b', 'INT', 'YES', "it's, 'ok'"),
+    ]
+
+
+def test_character_set_not_null():
+    assert fields_of("`name` varchar(64) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL COMMENT '姓名'") == [
+        ('name', 'VARCHAR(64)', 'NO', '姓名'),
+    ]
+
+
+def test_default_null_and_keys_skipped():
+    assert fields_of("`a` int DEFAULT NULL, `b` int NOT NULL DEFAULT '0', PRIMARY KEY (`a`), "
+                     "UNIQUE KEY `u` (`a`,`b`), CONSTRAINT `fk` FOREIGN KEY (`b`) REFERENCES t (`id`)") == [
+        ('a', 'INT', 'YES', ''),
+        ('b', 'INT', 'NO', ''),
+    ]
+
+
+def test_not_null_across_lines():
+    table = parse_create_table("CREATE TABLE `t` (\n  `a` int NOT\n  NULL COMMENT '多\n行'\n) COMMENT='表'")
+    assert [(field['name'], field['nullable'], field['comment']) for field in table['fields']] == [('a', 'NO', '多行')]
+    assert table['table_comment'] == '表'
+
+
+# 最坏输入：超长单词、深层嵌套括号、大量引号内逗号、未闭合的字符串
+WORST_CASES = {
+    'long_word': lambda n: '`id` int ' + 'x' * n,
+    'nested_parens': lambda n: '`a` int DEFAULT ' + '(' * (n // 2) + ')' * (n // 2) + ", `b` int COMMENT 'x'",
+    'quoted_commas': lambda n: "`a` varchar(10) COMMENT '" + ',' * n + "', `b` int",
+    'enum_values': lambda n: '`a` enum(' + ','.join(["'v,w'"] * (n // 6)) + ') NOT NULL',
+    'unclosed_string': lambda n: "`a` enum('" + 'a,' * (n // 2),
+}
+
+
+def best_time(func, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@pytest.mark.parametrize('name', sorted(WORST_CASES))
+def test_worst_case_scales_linearly(name):
+    make = WORST_CASES[name]
+    small, large = make(50_000), make(400_000)
+    parse_fields(small)
+    small_seconds = best_time(lambda: parse_fields(small))
+    large_seconds = best_time(lambda: parse_fields(large))
+    # 输入长 8 倍：线性约 8 倍，平方增长约 64 倍；下限避免计时过短时比值失真
+    assert large_seconds < max(small_seconds, 0.002) * 20
+    assert large_seconds < 1.0
+
+
+def test_worst_case_results():
+    assert fields_of(WORST_CASES['nested_parens'](1000))[1] == ('b', 'INT', 'YES', 'x')
+    assert fields_of(WORST_CASES['quoted_commas'](1000)) == [('a', 'VARCHAR(10)', 'YES', ',' * 1000),
+                                                             ('b', 'INT', 'YES', '')]
+    assert fields_of(WORST_CASES['enum_values'](60))[0][2] == 'NO'
@@ -0,0 +1,87 @@
+import os
+import zipfile
+
+from DocxStream import generate_word_doc_stream
+from RenderCache import generate_word_doc_cached, evict
+from SqlToWord import merge_config, parse_create_table
+
+STATEMENTS = [f"CREATE TABLE `t{i}` (`id` int NOT NULL COMMENT '编号{i}', `name` varchar(20)) COMMENT='表{i}'"
+              for i in range(4)]
+
+
+def document_xml(path):
+    return zipfile.ZipFile(path).read('word/document.xml')
+
+
+def cache_files(cache_dir):
+    return sorted(os.path.join(root, name) for root, _, files in os.walk(cache_dir) for name in files)
+
+
+def test_cache_hit_matches_uncached_output(tmp_path):
+    config = merge_config()
+    cache_dir = str(tmp_path / 'cache')
+    stats = generate_word_doc_cached(STATEMENTS, tmp_path / 'first.docx', cache_dir=cache_dir, **config)
+    assert (stats['hits'], stats['misses']) == (0, 4)
+    stats = generate_word_doc_cached(STATEMENTS, tmp_path / 'second.docx', cache_dir=cache_dir, **config)
+    assert (stats['hits'], stats['misses'], stats['evicted']) == (4, 0, 0)
+
+    generate_word_doc_stream(map(parse_create_table, STATEMENTS), tmp_path / 'plain.docx', **config)
+    assert document_xml(tmp_path / 'second.docx') == document_xml(tmp_path / 'plain.docx')
+
+
+def test_cached_fragments_are_renumbered(tmp_path):
+    config = merge_config({'basic_num': {'chapter_num': 2, 'start_table_num': 5}})
+    cache_dir = str(tmp_path / 'cache')
+    generate_word_doc_cached(STATEMENTS, tmp_path / 'all.docx', cache_dir=cache_dir, **config)
+
+    # 表的位置和起始编号都变化后，缓存片段按新位置编号
+    config['basic_num']['start_table_num'] = 1
+    reordered = [STATEMENTS[3], STATEMENTS[0]]
+    stats = generate_word_doc_cached(reordered, tmp_path / 'cached.docx', cache_dir=cache_dir, **config)
+    assert (stats['hits'], stats['misses']) == (2, 0)
+
+    generate_word_doc_stream(map(parse_create_table, reordered), tmp_path / 'plain.docx', **config)
+    xml = document_xml(tmp_path / 'cached.docx')
+    assert xml == document_xml(tmp_path / 'plain.docx')
+    assert '表2-1'.encode('utf-8') in xml and '表2-2'.encode('utf-8') in xml
+
+
+def test_eviction_after_write_keeps_temp_files(tmp_path):
+    config = merge_config()
+    cache_dir = str(tmp_path / 'cache')
+    generate_word_doc_cached(STATEMENTS[:2], tmp_path / 'a.docx', cache_dir=cache_dir, **config)
+    kept = cache_files(cache_dir)
+    # 其他运行正在写入的临时文件
+    temp_path = kept[0] + '.999.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('x' * 100000)
+
+    # 全部命中时不淘汰
+    stats = generate_word_doc_cached(STATEMENTS[:2], tmp_path / 'b.docx', cache_dir=cache_dir, max_bytes=1, **config)
+    assert stats['evicted'] == 0
+    assert set(kept) <= set(cache_files(cache_dir))
+
+    # 写入新片段后超出上限，从最久未使用的开始淘汰，保留临时文件
+    size = sum(os.path.getsize(path) for path in kept)
+    stats = generate_word_doc_cached(STATEMENTS[2:], tmp_path / 'c.docx', cache_dir=cache_dir, max_bytes=size,
+                                     **config)
+    assert stats['evicted'] == 2
+    remaining = cache_files(cache_dir)
+    assert temp_path in remaining
+    assert not set(kept) & set(remaining)
+
+
+def test_evict_skips_files_removed_concurrently(tmp_path, monkeypatch):
+    cache_dir = tmp_path / 'cache'
+    (cache_dir / 'ab').mkdir(parents=True)
+    (cache_dir / 'ab' / 'old.xml').write_text('x' * 100, encoding='utf-8')
+    walk = os.walk
+
+    def racing_walk(top):
+        for root, dirs, files in walk(top):
+            # 遍历时已被其他运行删除的文件
+            yield root, dirs, files + ['gone.xml']
+
+    monkeypatch.setattr(os, 'walk', racing_walk)
+    assert evict(str(cache_dir), max_bytes=10) == 1
+    assert not (cache_dir / 'ab' / 'old.xml').exists()
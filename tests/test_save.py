@@ -0,0 +1,81 @@
+import io
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+
+from SqlToWord import iter_tables, merge_config, select_renderer, zip_compression
+
+SQL = ''.join(f"CREATE TABLE `t{i}` (`id` int NOT NULL COMMENT '编号', `name` varchar(20) COMMENT '名称{i}') "
+              f"COMMENT='表{i}';\n" for i in range(30))
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+
+class PipeWriter(io.RawIOBase):
+    """只能顺序写入的输出（如管道、套接字），记录是否被关闭"""
+
+    def __init__(self):
+        super().__init__()
+        self.data = bytearray()
+        self.was_closed = False
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.data += data
+        return len(data)
+
+    def close(self):
+        self.was_closed = True
+        super().close()
+
+
+def render(renderer, compresslevel, output=None):
+    output = io.BytesIO() if output is None else output
+    select_renderer(renderer, compresslevel)(iter_tables(SQL), output, **merge_config())
+    return output
+
+
+def test_zip_compression_levels():
+    assert zip_compression(None) == (zipfile.ZIP_DEFLATED, None)
+    assert zip_compression(0) == (zipfile.ZIP_STORED, None)
+    assert zip_compression(9) == (zipfile.ZIP_DEFLATED, 9)
+    with pytest.raises(ValueError):
+        zip_compression(10)
+
+
+@pytest.mark.parametrize('renderer', ['docx', 'stream'])
+def test_levels_change_size_not_content(renderer):
+    packages = {level: zipfile.ZipFile(render(renderer, level)) for level in (0, 1, 9, None)}
+    stored, fast, small, default = packages[0], packages[1], packages[9], packages[None]
+
+    assert {item.compress_type for item in stored.infolist()} == {zipfile.ZIP_STORED}
+    assert {item.compress_type for item in small.infolist()} == {zipfile.ZIP_DEFLATED}
+    size = {level: sum(item.compress_size for item in package.infolist()) for level, package in packages.items()}
+    assert size[0] > size[1] >= size[9]
+    assert size[1] >= size[None] >= size[9]
+    for package in (stored, fast, small):
+        assert package.namelist() == default.namelist()
+        assert all(package.read(name) == default.read(name) for name in default.namelist())
+
+
+@pytest.mark.parametrize('renderer, compresslevel', [('docx', None), ('docx', 1), ('stream', None), ('stream', 0)])
+def test_write_to_unseekable_stream(renderer, compresslevel):
+    output = render(renderer, compresslevel, PipeWriter())
+    assert not output.was_closed
+    package = zipfile.ZipFile(io.BytesIO(bytes(output.data)))
+    assert package.testzip() is None
+    assert '表29'.encode('utf-8') in package.read('word/document.xml')
+
+
+def test_command_line_writes_to_stdout(tmp_path):
+    sql_path = tmp_path / 'schema.sql'
+    sql_path.write_text(SQL, encoding='utf-8')
+    result = subprocess.run([sys.executable, os.path.join(SRC, 'SqlToWord.py'), str(sql_path), '-', '--no-cache',
+                             '--compress-level', '1'], stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+    package = zipfile.ZipFile(io.BytesIO(result.stdout))
+    assert package.testzip() is None
+    assert {item.compress_type for item in package.infolist()} == {zipfile.ZIP_DEFLATED}
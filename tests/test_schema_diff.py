@@ -0,0 +1,62 @@
+import pytest
+
+from SchemaDiff import ADDED_MARK, DROPPED_MARK, diff_to_word, iter_schema_diff
+from SqlToWord import iter_tables, merge_config
+
+OLD = """
+CREATE TABLE `same` (`id` int NOT NULL COMMENT '编号') COMMENT='不变';
+CREATE TABLE `Users` (
+  `id` int NOT NULL COMMENT '编号',
+  `name` varchar(20) COMMENT '姓名',
+  `age` int COMMENT '年龄',
+  `legacy` int COMMENT '旧字段'
+) COMMENT='用户';
+CREATE TABLE `gone` (`id` int COMMENT '编号') COMMENT='删除的表';
+CREATE TABLE `renamed_comment` (`id` int) COMMENT='旧说明';
+"""
+
+NEW = """
+CREATE TABLE `added` (`id` int NOT NULL COMMENT '编号') COMMENT='新表';
+CREATE TABLE `users` (
+  `ID` INT NOT NULL COMMENT '编号',
+  `name` varchar(40) COMMENT '姓名',
+  `age` int NOT NULL COMMENT '年龄（岁）',
+  `email` varchar(64) COMMENT '邮箱'
+) COMMENT='用户';
+CREATE TABLE `same` (`id` int NOT NULL COMMENT '编号') COMMENT='不变';
+CREATE TABLE `renamed_comment` (`id` int) COMMENT='新说明';
+"""
+
+
+def rows(table):
+    return [(field['name'], field['type'], field['nullable'], field['comment']) for field in table['fields']]
+
+
+def test_added_removed_and_changed_marks():
+    stats = {}
+    tables = list(iter_schema_diff(iter_tables(OLD), iter_tables(NEW), stats))
+    assert stats == {'added': 1, 'dropped': 1, 'modified': 2, 'unchanged': 1}
+    # 新增和修改的表按新顺序，删除的表在最后
+    assert [table['table_name'] for table in tables] == ['added', 'users', 'renamed_comment', 'gone']
+
+    added, users, renamed, gone = tables
+    assert rows(added) == [(ADDED_MARK + 'id', 'INT', 'NO', '编号')]
+    # 表名、字段名和类型的大小写不同不算修改；字段按新顺序，删除的字段在最后
+    assert users['table_comment'] == '用户'
+    assert rows(users) == [
+        ('name', 'VARCHAR(20) → VARCHAR(40)', 'YES', '姓名'),
+        ('age', 'INT', 'YES → NO', '年龄 → 年龄（岁）'),
+        (ADDED_MARK + 'email', 'VARCHAR(64)', 'YES', '邮箱'),
+        (DROPPED_MARK + 'legacy', 'INT', 'YES', '旧字段'),
+    ]
+    assert renamed['table_comment'] == '旧说明 → 新说明'
+    assert rows(renamed) == []
+    assert rows(gone) == [(DROPPED_MARK + 'id', 'INT', 'YES', '编号')]
+
+
+def test_missing_file(tmp_path):
+    existing = tmp_path / 'new.sql'
+    existing.write_text(NEW, encoding='utf-8')
+    with pytest.raises(FileNotFoundError, match='SQL文件不存在'):
+        diff_to_word(str(tmp_path / 'old.sql'), str(existing), str(tmp_path / 'diff.md'), renderer='markdown',
+                     **merge_config())
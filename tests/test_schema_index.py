@@ -0,0 +1,90 @@
+import os
+import sqlite3
+
+import pytest
+
+from SchemaIndex import build_index, index_is_current, index_path, iter_selected_statements, select_statements
+from SqlToWord import iter_create_statements, main
+
+SQL = """CREATE TABLE `a` (`id` int COMMENT '编号') COMMENT='甲';
+INSERT INTO `a` VALUES (1, 'x;y');
+CREATE TABLE `order_b` (`id` int) COMMENT='乙';
+/* CREATE TABLE `fake` (`id` int); */
+CREATE TABLE `order_c` (`id` int) COMMENT='丙';
+"""
+
+
+@pytest.fixture
+def sql_path(tmp_path):
+    path = tmp_path / 'dump.sql'
+    path.write_text(SQL, encoding='utf-8')
+    return str(path)
+
+
+def indexed_names(sql_path):
+    connection = sqlite3.connect(index_path(sql_path))
+    try:
+        return [row[0] for row in connection.execute('SELECT name FROM statements ORDER BY position')]
+    finally:
+        connection.close()
+
+
+def test_build_index_matches_text_splitter(sql_path):
+    assert build_index(sql_path) == 3
+    assert indexed_names(sql_path) == ['a', 'order_b', 'order_c']
+
+    positions, statements = select_statements(sql_path, names=['a', 'order_b', 'order_c'])
+    with open(sql_path, 'r', encoding='utf-8') as f:
+        assert list(statements) == list(iter_create_statements(f))
+    assert positions == [0, 1, 2]
+
+
+def test_index_rebuilt_after_change(sql_path):
+    build_index(sql_path)
+    assert index_is_current(sql_path, index_path(sql_path))
+
+    # 只改修改时间不重建
+    stat = os.stat(sql_path)
+    os.utime(sql_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert index_is_current(sql_path, index_path(sql_path))
+
+    with open(sql_path, 'a', encoding='utf-8') as f:
+        f.write("CREATE TABLE `d` (`id` int) COMMENT='丁';\n")
+    assert not index_is_current(sql_path, index_path(sql_path))
+    positions, statements = select_statements(sql_path, names=['d'])
+    assert positions == [3]
+    assert len(list(statements)) == 1
+    assert indexed_names(sql_path) == ['a', 'order_b', 'order_c', 'd']
+
+
+def test_statement_changed_after_index_check(sql_path):
+    build_index(sql_path)
+    connection = sqlite3.connect(index_path(sql_path))
+    rows = connection.execute('SELECT position, offset, length, part, name, hash FROM statements').fetchall()
+    connection.close()
+
+    # 长度不变的修改
+    with open(sql_path, 'w', encoding='utf-8') as f:
+        f.write(SQL.replace('甲', '乙'))
+    with pytest.raises(ValueError, match='表 a '):
+        list(iter_selected_statements(sql_path, rows))
+
+
+def test_selected_tables_keep_full_document_numbers(sql_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert main([sql_path, 'one.md', '--tables', 'order_c']) == 0
+    text = (tmp_path / 'one.md').read_text(encoding='utf-8')
+    assert '**表1-3 丙表(order_c)**' in text
+    assert 'order_b' not in text
+
+    main([sql_path, 'like.md', '--tables-like', 'order\\_%'])
+    text = (tmp_path / 'like.md').read_text(encoding='utf-8')
+    assert text.index('**表1-2 乙表(order_b)**') < text.index('**表1-3 丙表(order_c)**')
+    assert '(a)' not in text
+
+
+def test_unknown_table_name_fails_without_output(sql_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match='nope'):
+        main([sql_path, 'out.md', '--tables', 'order_b,nope'])
+    assert not (tmp_path / 'out.md').exists()
@@ -0,0 +1,73 @@
+import sqlite3
+
+import pytest
+
+from SchemaSource import iter_mysql_tables, iter_schema_tables, iter_sqlite_tables
+from SqlToWord import parse_sql
+
+MYSQL_DDL = """
+CREATE TABLE `order` (
+  `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT COMMENT '编号',
+  `amount` decimal(10,2) DEFAULT NULL COMMENT '金额',
+  `status` enum('new','paid') NOT NULL DEFAULT 'new' COMMENT '状态',
+  PRIMARY KEY (`id`)
+) ENGINE=InnoDB COMMENT='订单表';
+CREATE TABLE `user` (
+  `name` varchar(64) CHARACTER SET utf8mb4 NOT NULL COMMENT '姓名'
+) ENGINE=InnoDB COMMENT='用户表';
+"""
+
+# information_schema 中的同一结构：COLUMN_TYPE 为 MySQL 返回的小写形式
+MYSQL_TABLES = [
+    ('shop', 'order', 'BASE TABLE', '订单表'),
+    ('shop', 'user', 'BASE TABLE', '用户表'),
+    ('shop', 'order_view', 'VIEW', ''),
+    ('other', 'user', 'BASE TABLE', '其他库'),
+]
+MYSQL_COLUMNS = [
+    ('shop', 'order', 'id', 1, 'bigint(20) unsigned', 'NO', '编号'),
+    ('shop', 'order', 'amount', 2, 'decimal(10,2)', 'YES', '金额'),
+    ('shop', 'order', 'status', 3, "enum('new','paid')", 'NO', '状态'),
+    ('shop', 'user', 'name', 1, 'varchar(64)', 'NO', '姓名'),
+    ('shop', 'order_view', 'id', 1, 'bigint(20) unsigned', 'NO', ''),
+    ('other', 'user', 'id', 1, 'int', 'NO', ''),
+]
+
+
+@pytest.fixture
+def mysql_connection():
+    """用 SQLite 模拟 MySQL 的 information_schema 与 DATABASE()"""
+    connection = sqlite3.connect(':memory:')
+    connection.execute("ATTACH DATABASE ':memory:' AS information_schema")
+    connection.execute('CREATE TABLE information_schema.TABLES '
+                       '(TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE, TABLE_COMMENT)')
+    connection.execute('CREATE TABLE information_schema.COLUMNS (TABLE_SCHEMA, TABLE_NAME, COLUMN_NAME, '
+                       'ORDINAL_POSITION, COLUMN_TYPE, IS_NULLABLE, COLUMN_COMMENT)')
+    connection.executemany('INSERT INTO information_schema.TABLES VALUES (?, ?, ?, ?)', MYSQL_TABLES)
+    connection.executemany('INSERT INTO information_schema.COLUMNS VALUES (?, ?, ?, ?, ?, ?, ?)', MYSQL_COLUMNS)
+    connection.create_function('DATABASE', 0, lambda: 'shop')
+    yield connection
+    connection.close()
+
+
+def test_mysql_matches_sql_file(mysql_connection):
+    tables = list(iter_mysql_tables(mysql_connection, placeholder='?'))
+    assert tables == list(parse_sql(MYSQL_DDL))
+    assert [field['type'] for field in tables[0]['fields']] == ['BIGINT(20)', 'DECIMAL(10,2)', "ENUM('new','paid')"]
+
+
+def test_mysql_schema_and_views(mysql_connection):
+    assert [table['table_name'] for table in iter_mysql_tables(mysql_connection, 'other', '?')] == ['user']
+    tables = list(iter_schema_tables(mysql_connection, dialect='mysql', placeholder='?'))
+    assert [table['table_name'] for table in tables] == ['order', 'user']
+
+
+def test_sqlite_types_match_sql_file():
+    ddl = 'CREATE TABLE item (id integer PRIMARY KEY, name varchar(255) NOT NULL, price decimal(10,2), note)'
+    connection = sqlite3.connect(':memory:')
+    connection.execute(ddl)
+    (table,) = iter_sqlite_tables(connection)
+    (parsed,) = parse_sql(ddl + ';')
+    assert [field['type'] for field in table['fields']] == ['INTEGER', 'VARCHAR(255)', 'DECIMAL(10,2)', '']
+    assert [field['type'] for field in table['fields'][:3]] == [field['type'] for field in parsed['fields'][:3]]
+    assert [field['nullable'] for field in table['fields']] == ['NO', 'NO', 'YES', 'YES']
@@ -0,0 +1,128 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+import Server
+from Benchmark import generate_dump
+
+# 单个工作进程生成约需 1 秒的 SQL，用于制造在途任务
+SLOW_SQL = generate_dump(600, 20)
+SMALL_SQL = "CREATE TABLE `t` (`id` int NOT NULL COMMENT '编号') COMMENT='测试表';"
+
+
+@pytest.fixture
+def service():
+    """一个工作进程、不排队（容量为 1）的服务"""
+    service = Server.create_service(workers=1, queue_size=0, cache_size=64 << 20, timeout=30)
+    server = Server.create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    service['url'] = 'http://%s:%d' % server.server_address[:2]
+    yield service
+    server.shutdown()
+    server.server_close()
+    Server.close_service(service)
+
+
+def post(service, payload):
+    request = urllib.request.Request(service['url'] + '/convert', data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def get_metrics(service):
+    with urllib.request.urlopen(service['url'] + '/metrics') as response:
+        return json.load(response)
+
+
+def start_slow(service, results):
+    """在后台线程发出慢请求，等到任务已在途时返回线程"""
+    thread = threading.Thread(target=lambda: results.append(post(service, {'sql': SLOW_SQL})))
+    thread.start()
+    deadline = time.monotonic() + 10
+    while get_metrics(service)['in_flight'] == 0:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return thread
+
+
+def wait_idle(service):
+    deadline = time.monotonic() + 30
+    while get_metrics(service)['in_flight']:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def counters_after(service, requests):
+    """计数在响应发出后才更新，等到已计入 requests 个请求时返回指标"""
+    deadline = time.monotonic() + 5
+    while (metrics := get_metrics(service))['counters'].get('requests') != requests:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return metrics
+
+
+def test_repeated_request_hits_cache(service):
+    status, headers, first = post(service, {'sql': SMALL_SQL})
+    assert (status, headers['X-Cache'], headers['X-Tables']) == (200, 'miss', '1')
+    status, headers, second = post(service, {'sql': SMALL_SQL})
+    assert (status, headers['X-Cache']) == (200, 'hit')
+    assert second == first
+
+
+def test_concurrent_identical_requests_share_one_job(service):
+    results = []
+    thread = start_slow(service, results)
+    status, headers, shared = post(service, {'sql': SLOW_SQL})
+    thread.join()
+    assert (status, headers['X-Cache']) == (200, 'shared')
+    assert results[0][0] == 200 and results[0][1]['X-Cache'] == 'miss'
+    assert results[0][2] == shared
+    assert counters_after(service, 2)['counters']['cache_shared'] == 1
+
+
+def test_busy_service_returns_503(service):
+    results = []
+    thread = start_slow(service, results)
+    status, headers, body = post(service, {'sql': SMALL_SQL})
+    thread.join()
+    assert status == 503
+    assert headers['Retry-After'] == '1'
+    assert '繁忙' in json.loads(body)['error']
+    assert results[0][0] == 200
+
+
+def test_timeout_returns_504_and_result_is_cached(service):
+    service['timeout'] = 0.05
+    status, _, body = post(service, {'sql': SLOW_SQL})
+    assert status == 504
+    assert '超时' in json.loads(body)['error']
+
+    # 已开始的生成继续完成并写入缓存
+    wait_idle(service)
+    service['timeout'] = 30
+    status, headers, _ = post(service, {'sql': SLOW_SQL})
+    assert (status, headers['X-Cache']) == (200, 'hit')
+
+
+def test_metrics_counters(service):
+    post(service, {'sql': SMALL_SQL})
+    post(service, {'sql': SMALL_SQL})
+    post(service, {'path': '../outside.sql'})
+    post(service, {'sql': SMALL_SQL, 'config': {'bogus': {}}})
+
+    metrics = counters_after(service, 4)
+    counters = metrics['counters']
+    assert (counters['status_200'], counters['status_403'], counters['status_400']) == (2, 1, 1)
+    assert (counters['cache_miss'], counters['cache_hit']) == (1, 1)
+    assert metrics['in_flight'] == 0
+    assert metrics['cache']['entries'] == 1
+    assert metrics['latency_ms']['window'] == 4
@@ -0,0 +1,56 @@
+import os
+import re
+import zipfile
+
+import docx
+
+from Shard import shard_to_word, INDEX_HEADERS
+from SqlToWord import iter_tables
+
+# 前缀交替出现的表，字段数依次为 1、2、3……
+SQL = ''.join(f"CREATE TABLE `{prefix}_{i}` ({', '.join(f'`c{j}` int' for j in range(i + 1))}) COMMENT='表{i}';\n"
+              for i, prefix in enumerate(['user', 'order', 'user', 'order', 'log', 'user', 'order', 'user']))
+NAMES = ['user_0', 'order_1', 'user_2', 'order_3', 'log_4', 'user_5', 'order_6', 'user_7']
+OVERRIDES = [{'basic_num': {'chapter_num': 2, 'start_table_num': 5}}]
+
+
+def shard_numbers(path):
+    """分片文档中各表的 (表格编号, 表名)"""
+    text = zipfile.ZipFile(path).read('word/document.xml').decode('utf-8')
+    return re.findall(r'表(2-\d+) 表\d+表\((\w+)\)', text)
+
+
+def index_rows(path):
+    table = docx.Document(path).tables[0]
+    return [[cell.text for cell in row.cells] for row in table.rows]
+
+
+def test_numbering_continues_across_shards(tmp_path):
+    output = tmp_path / 'schema.docx'
+    paths = shard_to_word(iter_tables(SQL), str(output), OVERRIDES, max_tables=3, workers=2)
+    assert [os.path.basename(path) for path in paths] == ['schema-001.docx', 'schema-002.docx', 'schema-003.docx']
+
+    numbered = [item for path in paths for item in shard_numbers(path)]
+    assert numbered == [(f'2-{5 + i}', name) for i, name in enumerate(NAMES)]
+    assert [len(shard_numbers(path)) for path in paths] == [3, 3, 2]
+
+    rows = index_rows(output)
+    assert rows[0] == INDEX_HEADERS
+    assert rows[1:] == [[f'2-{5 + i}', name, f'表{i}', f'schema-{i // 3 + 1:03d}.docx']
+                        for i, name in enumerate(NAMES)]
+
+
+def test_grouped_shards_follow_group_order(tmp_path):
+    output = tmp_path / 'schema.docx'
+    # 每个分片最多 6 行（字段数加表头）
+    paths = shard_to_word(iter_tables(SQL), str(output), OVERRIDES, max_rows=6, group_by='prefix', workers=1)
+    names = [os.path.basename(path) for path in paths]
+    assert names == ['schema-001-user.docx', 'schema-002-user.docx', 'schema-003-user.docx',
+                     'schema-004-order.docx', 'schema-005-order.docx', 'schema-006-order.docx',
+                     'schema-007-log.docx']
+
+    # 按组重新排列后编号依然连续
+    grouped = ['user_0', 'user_2', 'user_5', 'user_7', 'order_1', 'order_3', 'order_6', 'log_4']
+    numbered = [item for path in paths for item in shard_numbers(path)]
+    assert numbered == [(f'2-{5 + i}', name) for i, name in enumerate(grouped)]
+    assert [row[1] for row in index_rows(output)[1:]] == grouped
@@ -0,0 +1,69 @@
+import io
+
+import pytest
+
+from SqlToWord import iter_create_statements
+
+DUMP = r"""-- MySQL dump; generated
+/*!40101 SET NAMES utf8mb4 */;
+/* block comment; CREATE TABLE `fake1` (`id` int); */
+# hash comment; CREATE TABLE `fake2` (`id` int);
+CREATE TABLE `a` (
+  `id` int NOT NULL COMMENT 'semi; colon',
+  `v` varchar(10) DEFAULT 'it''s;' COMMENT "dq; \"x\"",
+  `w` varchar(10) DEFAULT '\\' COMMENT 'back\\slash;' -- trailing; comment
+) ENGINE=InnoDB COMMENT='表;甲';
+INSERT INTO `a` VALUES (1,'CREATE TABLE `fake3` (`id` int);','x'),(2,'\';',"--;");
+INSERT INTO `a` VALUES (3,'/* not a comment; */','#;');
+DELIMITER ;;
+CREATE TRIGGER `trg` BEFORE INSERT ON `a` FOR EACH ROW BEGIN SET NEW.v = 'x;'; END ;;
+DELIMITER ;
+/*!50001 CREATE TABLE `b` (`id` int COMMENT 'in versioned; comment') */;
+CREATE TABLE IF NOT EXISTS `c-d` (`id` int /* inline; */ COMMENT '丙')
+"""
+
+EXPECTED = [
+    "CREATE TABLE `a` (\n"
+    "  `id` int NOT NULL COMMENT 'semi; colon',\n"
+    "  `v` varchar(10) DEFAULT 'it''s;' COMMENT \"dq; \\\"x\\\"\",\n"
+    "  `w` varchar(10) DEFAULT '\\\\' COMMENT 'back\\\\slash;'  ) ENGINE=InnoDB COMMENT='表;甲';",
+    "CREATE TABLE `b` (`id` int COMMENT 'in versioned; comment');",
+    # 末尾没有分号的语句照常产出
+    "CREATE TABLE IF NOT EXISTS `c-d` (`id` int   COMMENT '丙')",
+]
+
+
+def split(text, chunk_size=1 << 16):
+    return list(iter_create_statements(io.StringIO(text), chunk_size))
+
+
+def test_semicolons_in_strings_and_comments():
+    assert split(DUMP) == EXPECTED
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 5, 7, 8, 9, 10, 13, 64])
+def test_chunk_boundaries(chunk_size):
+    # 块边界落在引号、转义、注释起止符和可执行注释版本号中间时结果不变
+    assert split(DUMP, chunk_size) == EXPECTED
+
+
+def test_statements_between_creates_are_dropped():
+    text = ("CREATE TABLE `x` (`id` int);\n"
+            "INSERT INTO `x` VALUES (1),(2);\n"
+            "DELIMITER $$\n"
+            "CREATE PROCEDURE `p`() BEGIN SELECT 'CREATE TABLE `y` (`id` int)'; END$$\n"
+            "DELIMITER ;\n"
+            "LOCK TABLES `x` WRITE;\n"
+            "CREATE TEMPORARY TABLE `z` (`id` int);\n")
+    assert split(text) == ["CREATE TABLE `x` (`id` int);", "CREATE TEMPORARY TABLE `z` (`id` int);"]
+
+
+def test_long_data_statement_is_not_kept():
+    rows = ','.join(f"({i},'{'x;' * 20}')" for i in range(5000))
+    text = f"INSERT INTO `x` VALUES {rows};\nCREATE TABLE `x` (`id` int);"
+    assert split(text, 4096) == ["CREATE TABLE `x` (`id` int);"]
+
+
+def test_unterminated_comment_at_end():
+    assert split("CREATE TABLE `x` (`id` int); /* never closed; CREATE TABLE `y` (`id` int);") == [
+        "CREATE TABLE `x` (`id` int);"]
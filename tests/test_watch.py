@@ -0,0 +1,35 @@
+import gzip
+import logging
+import threading
+import time
+import zipfile
+
+from SqlToWord import merge_config
+from Watch import watch
+
+SQL = "CREATE TABLE `watch_ok` (`id` int NOT NULL COMMENT '编号') COMMENT='监视测试';\n" * 200
+
+
+def test_bad_file_does_not_stop_watching(tmp_path, caplog):
+    sql_path = tmp_path / 'schema.sql.gz'
+    output_path = tmp_path / 'schema.docx'
+    data = gzip.compress(SQL.encode('utf-8'))
+    # 写了一半的压缩文件，读取时抛出 EOFError
+    sql_path.write_bytes(data[:len(data) // 2])
+
+    thread = threading.Thread(target=watch, args=([str(sql_path)], str(output_path)),
+                              kwargs=dict(merge_config(), interval=0.01, debounce=0.01, max_builds=1), daemon=True)
+    with caplog.at_level(logging.ERROR, logger='Watch'):
+        thread.start()
+        deadline = time.monotonic() + 10
+        while not any(record.exc_info for record in caplog.records):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+
+        assert thread.is_alive()
+        assert not output_path.exists()
+        sql_path.write_bytes(data)
+        thread.join(10)
+
+    assert not thread.is_alive()
+    assert b'watch_ok' in zipfile.ZipFile(output_path).read('word/document.xml')